@@ -0,0 +1,226 @@
+"""
+推理延迟基准测试
+在固定图片集上遍历 推理后端 × 输入尺寸 × 批次大小 × 线程数 组合运行 YoloInfer，
+统计 p50/p95/p99 延迟、吞吐量和峰值内存，结果保存为 JSON 和 CSV，便于版本对比和硬件选型。
+每个组合在独立子进程中运行，保证线程设置和峰值内存互不影响。
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import copy
+import itertools
+import multiprocessing
+import yaml
+
+MONITOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'monitor')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+CSV_FIELDS = ['model', 'backend', 'path', 'input_size', 'batch_size', 'num_threads', 'images',
+              'iterations', 'p50_ms', 'p95_ms', 'p99_ms', 'mean_ms', 'throughput_fps',
+              'peak_rss_mb', 'error']
+
+
+def load_config(config_path):
+    """加载配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB），无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def list_images(image_dir, num_images):
+    """按文件名排序取固定的图片集"""
+    if not os.path.isdir(image_dir):
+        raise FileNotFoundError(f"未找到基准测试图片目录: {image_dir}")
+    images = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not images:
+        raise FileNotFoundError(f"基准测试图片目录为空: {image_dir}")
+    return images[:num_images]
+
+
+def _benchmark_worker(task):
+    """子进程：加载指定组合的模型并计时"""
+    # 使用无界面模式导入核心模块
+    os.environ['MONITOR_HEADLESS'] = '1'
+    sys.path.insert(0, MONITOR_DIR)
+
+    row = {
+        'model': task['name'],
+        'backend': task['backend'],
+        'path': task['path'],
+        'input_size': f"{task['input_size'][0]}x{task['input_size'][1]}",
+        'batch_size': task['batch_size'],
+        'num_threads': task['num_threads'],
+        'images': len(task['images']),
+        'iterations': task['iterations'],
+        'error': '',
+    }
+
+    try:
+        import cv2
+        import numpy as np
+        from core.model_infer import YoloInfer
+
+        config = copy.deepcopy(task['config'])
+        model_config = config['model']
+        model_config['path'] = task['path']
+        model_config['backend'] = task['backend']
+        model_config['input_size'] = list(task['input_size'])
+        model_config['num_threads'] = task['num_threads']
+        # 关闭场景变化门控和跟踪，保证每次调用都真正推理；关闭区域、切片和级联，只测模型本身在各组合下的延迟
+        model_config['change_gate'] = {'enabled': False}
+        config['tracking'] = {'enabled': False}
+        config['zones'] = {'enabled': False}
+        config['tiling'] = {'enabled': False}
+        config['cascade'] = {'enabled': False}
+
+        infer = YoloInfer(config)
+        errors = []
+        infer.error_occurred.connect(errors.append)
+        if not infer.load_model():
+            raise RuntimeError(errors[-1] if errors else "模型加载失败")
+
+        frames = [frame for frame in (cv2.imread(path) for path in task['images']) if frame is not None]
+        if not frames:
+            raise RuntimeError("没有可读取的图片")
+
+        batch_size = task['batch_size']
+        batches = [
+            [frames[(start + i) % len(frames)] for i in range(batch_size)]
+            for start in range(0, len(frames), batch_size)
+        ]
+
+        # 预热
+        for i in range(task['warmup']):
+            infer.infer_batch(batches[i % len(batches)])
+
+        latencies = []
+        for i in range(task['iterations']):
+            start = time.perf_counter()
+            results = infer.infer_batch(batches[i % len(batches)])
+            latencies.append(time.perf_counter() - start)
+            if results is None:
+                raise RuntimeError(errors[-1] if errors else "推理失败")
+
+        latencies_ms = np.array(latencies) * 1000
+        row.update({
+            'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(latencies_ms, 95)), 3),
+            'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+            'mean_ms': round(float(latencies_ms.mean()), 3),
+            'throughput_fps': round(batch_size * len(latencies) / float(np.sum(latencies)), 2),
+        })
+    except Exception as e:
+        row['error'] = str(e)
+
+    peak = peak_rss_mb()
+    row['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+    return row
+
+
+def build_tasks(config, bench_config, images):
+    """展开所有测试组合"""
+    default_model = {'name': 'pytorch', 'path': config['model']['path'], 'backend': 'ultralytics'}
+    models = bench_config.get('models') or [default_model]
+    input_sizes = bench_config.get('input_sizes') or [config['model']['input_size']]
+    batch_sizes = bench_config.get('batch_sizes') or [1]
+    thread_counts = bench_config.get('num_threads') or [0]
+
+    tasks = []
+    for model, input_size, batch_size, num_threads in itertools.product(
+            models, input_sizes, batch_sizes, thread_counts):
+        tasks.append({
+            'name': model.get('name', model['path']),
+            'path': model['path'],
+            'backend': model.get('backend', 'auto'),
+            'input_size': input_size,
+            'batch_size': batch_size,
+            'num_threads': num_threads,
+            'images': images,
+            'warmup': bench_config.get('warmup', 5),
+            'iterations': bench_config.get('iterations', 100),
+            'config': config,
+        })
+    return tasks
+
+
+def save_results(rows, output_dir, meta):
+    """保存 JSON 和 CSV 结果"""
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    json_path = os.path.join(output_dir, f"benchmark_{stamp}.json")
+    csv_path = os.path.join(output_dir, f"benchmark_{stamp}.csv")
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': rows}, f, ensure_ascii=False, indent=2)
+
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({field: row.get(field) for field in CSV_FIELDS})
+
+    return json_path, csv_path
+
+
+def run_benchmark(config_path='config.yaml'):
+    """运行基准测试"""
+    print("开始推理延迟基准测试...")
+
+    config = load_config(config_path)
+    bench_config = config.get('benchmark') or {}
+    images = list_images(bench_config.get('images', 'dataset/powerplant_safety/test/images'),
+                         bench_config.get('num_images', 50))
+    tasks = build_tasks(config, bench_config, images)
+    print(f"图片 {len(images)} 张，共 {len(tasks)} 个测试组合")
+
+    # 每个组合使用全新的子进程
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    with context.Pool(processes=1, maxtasksperchild=1) as pool:
+        for index, row in enumerate(pool.imap(_benchmark_worker, tasks), start=1):
+            rows.append(row)
+            prefix = (f"[{index}/{len(tasks)}] {row['model']} {row['input_size']} "
+                      f"batch={row['batch_size']} threads={row['num_threads']}")
+            if row['error']:
+                print(f"{prefix}: 失败 - {row['error']}")
+            else:
+                print(f"{prefix}: p50 {row['p50_ms']:.1f}ms, p95 {row['p95_ms']:.1f}ms, "
+                      f"p99 {row['p99_ms']:.1f}ms, 吞吐 {row['throughput_fps']:.1f} 帧/秒, "
+                      f"峰值内存 {row['peak_rss_mb']}MB")
+
+    meta = {
+        'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'platform': sys.platform,
+        'cpu_count': os.cpu_count(),
+        'python': sys.version.split()[0],
+        'images': len(images),
+    }
+    json_path, csv_path = save_results(rows, bench_config.get('output_dir', 'benchmark_results'), meta)
+    print(f"\n基准测试结果已保存到: {json_path} 和 {csv_path}")
+    return rows
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,14 +1,47 @@
 import os
+import sys
+import json
+import shutil
+import random
+import yaml
 from ultralytics import YOLO
 
-def export_model():
+# 复用监控系统的 letterbox 预处理，保证校准数据与线上推理输入一致
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'monitor'))
+
+# 候选模型权重路径（按优先级）
+MODEL_CANDIDATES = [
+    'runs/detect/train/weights/best.pt',
+    'powerplant_safety_detection/yolov8n_experiment/weights/best.pt',
+]
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_config(config_path):
+    """加载配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def find_model_path(model_path=None):
+    """查找待导出的模型权重"""
+    if model_path:
+        return model_path if os.path.exists(model_path) else None
+    for candidate in MODEL_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def export_model(model_path=None):
     """导出训练好的模型为不同格式"""
     print("开始导出模型...")
     
     # 检查最佳模型权重是否存在
-    best_model_path = 'runs/detect/train/weights/best.pt'
+    best_model_path = find_model_path(model_path)
     
-    if not os.path.exists(best_model_path):
+    if best_model_path is None:
         print("未找到训练好的模型权重文件")
         return
     
@@ -67,5 +100,194 @@ def export_model():
         print(f"导出过程中出现错误: {str(e)}")
         raise e
 
+def sample_calibration_images(image_dir, num_images, seed=0):
+    """从验证集图片中随机抽取校准样本"""
+    if not os.path.isdir(image_dir):
+        raise FileNotFoundError(f"未找到校准图片目录: {image_dir}")
+    images = sorted(
+        os.path.join(image_dir, name) for name in os.listdir(image_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if not images:
+        raise FileNotFoundError(f"校准图片目录为空: {image_dir}")
+    random.Random(seed).shuffle(images)
+    return images[:num_images]
+
+
+def create_calibration_reader(image_paths, input_name, input_size):
+    """创建 ONNX Runtime 静态量化的校准数据读取器"""
+    import cv2
+    from onnxruntime.quantization import CalibrationDataReader
+    from core.preprocess import LetterboxPreprocessor
+    from core.backends import to_blob
+
+    class LetterboxCalibrationReader(CalibrationDataReader):
+        """逐张读取校准图片，使用与线上推理相同的 letterbox 预处理"""
+
+        def __init__(self):
+            self.preprocessor = LetterboxPreprocessor(input_size)
+            self.index = 0
+
+        def get_next(self):
+            while self.index < len(image_paths):
+                frame = cv2.imread(image_paths[self.index])
+                self.index += 1
+                if frame is None:
+                    continue
+                batch, _ = self.preprocessor.letterbox_batch([frame])
+                return {input_name: to_blob(batch)}
+            return None
+
+        def rewind(self):
+            self.index = 0
+
+    return LetterboxCalibrationReader()
+
+
+def quantize_onnx_int8(model, image_paths, input_size, output_dir):
+    """导出 FP32 ONNX 并使用校准数据做 INT8 静态量化，返回量化模型路径"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+
+    print("正在导出FP32 ONNX模型...")
+    fp32_path = model.export(format='onnx', opset=12, dynamic=False, simplify=True,
+                             imgsz=[input_size[1], input_size[0]])
+
+    input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    int8_path = os.path.join(output_dir, os.path.splitext(os.path.basename(fp32_path))[0] + '_int8.onnx')
+
+    print(f"正在进行ONNX INT8静态量化（校准图片 {len(image_paths)} 张）...")
+    quantize_static(
+        fp32_path,
+        int8_path,
+        create_calibration_reader(image_paths, input_name, input_size),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+    )
+    print(f"ONNX INT8模型已生成: {int8_path}")
+    return int8_path
+
+
+def quantize_openvino_int8(model, data_config, input_size, output_dir, fraction):
+    """使用 ultralytics 的 OpenVINO 导出（NNCF 校准）生成 INT8 IR，返回模型目录"""
+    print("正在导出OpenVINO INT8模型...")
+    export_path = model.export(format='openvino', int8=True, data=data_config, fraction=fraction,
+                               imgsz=[input_size[1], input_size[0]])
+    int8_dir = os.path.join(output_dir, os.path.basename(export_path.rstrip('/\\')))
+    if os.path.exists(int8_dir):
+        shutil.rmtree(int8_dir)
+    shutil.move(export_path, int8_dir)
+    print(f"OpenVINO INT8模型已生成: {int8_dir}")
+    return int8_dir
+
+
+def evaluate_map50(model_path, data_config, input_size):
+    """使用与 evaluate.py 相同的验证流程计算 mAP50"""
+    metrics = YOLO(model_path, task='detect').val(data=data_config, split='val',
+                                                  imgsz=input_size[0], verbose=False, plots=False)
+    return float(metrics.box.map50), float(metrics.box.map), float(metrics.speed['inference'])
+
+
+def publish_model(candidate_path, publish_dir):
+    """将通过精度检查的量化模型复制到发布目录"""
+    os.makedirs(publish_dir, exist_ok=True)
+    target = os.path.join(publish_dir, os.path.basename(candidate_path.rstrip('/\\')))
+    if os.path.isdir(candidate_path):
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        shutil.copytree(candidate_path, target)
+    else:
+        shutil.copy2(candidate_path, target)
+    return target
+
+
+def quantize_model(model_path=None, config_path='config.yaml'):
+    """INT8训练后量化：校准、评估，mAP50下降超过允许范围时拒绝发布"""
+    print("开始INT8量化...")
+
+    best_model_path = find_model_path(model_path)
+    if best_model_path is None:
+        print("未找到训练好的模型权重文件")
+        return None
+
+    config = load_config(config_path)
+    quant_config = config.get('quantization') or {}
+    input_size = config['model']['input_size']
+    data_config = quant_config.get('data', 'dataset/powerplant_safety/data.yaml')
+    calib_dir = quant_config.get('calibration_images', 'dataset/powerplant_safety/valid/images')
+    num_calib = quant_config.get('num_calibration_images', 300)
+    max_drop = quant_config.get('max_map50_drop', 0.01)
+    formats = quant_config.get('formats', ['onnx', 'openvino'])
+    staging_dir = quant_config.get('staging_dir', 'exported_models/int8_candidates')
+    publish_dir = quant_config.get('publish_dir', 'exported_models/int8')
+    os.makedirs(staging_dir, exist_ok=True)
+
+    try:
+        model = YOLO(best_model_path)
+        print(f"模型加载成功: {best_model_path}")
+
+        # FP32 基准精度
+        print("评估FP32基准模型...")
+        fp32_map50, fp32_map, fp32_speed = evaluate_map50(best_model_path, data_config, input_size)
+        print(f"FP32 mAP50: {fp32_map50:.4f}, mAP50-95: {fp32_map:.4f}, 推理时间: {fp32_speed:.2f}ms")
+
+        image_paths = sample_calibration_images(calib_dir, num_calib)
+        report = {
+            'model': best_model_path,
+            'fp32': {'map50': fp32_map50, 'map50_95': fp32_map, 'inference_ms': fp32_speed},
+            'max_map50_drop': max_drop,
+            'calibration_images': len(image_paths),
+            'candidates': {},
+        }
+
+        for fmt in formats:
+            try:
+                if fmt == 'onnx':
+                    candidate = quantize_onnx_int8(model, image_paths, input_size, staging_dir)
+                elif fmt == 'openvino':
+                    fraction = min(1.0, len(image_paths) / max(1, len(os.listdir(calib_dir))))
+                    candidate = quantize_openvino_int8(model, data_config, input_size, staging_dir, fraction)
+                else:
+                    print(f"不支持的量化格式: {fmt}")
+                    continue
+
+                print(f"评估{fmt} INT8模型...")
+                int8_map50, int8_map, int8_speed = evaluate_map50(candidate, data_config, input_size)
+                drop = fp32_map50 - int8_map50
+                passed = drop <= max_drop
+                print(f"{fmt} INT8 mAP50: {int8_map50:.4f} (下降 {drop:.4f}), "
+                      f"mAP50-95: {int8_map:.4f}, 推理时间: {int8_speed:.2f}ms")
+
+                entry = {
+                    'path': candidate,
+                    'map50': int8_map50,
+                    'map50_95': int8_map,
+                    'inference_ms': int8_speed,
+                    'map50_drop': drop,
+                    'passed': passed,
+                }
+                if passed:
+                    entry['published'] = publish_model(candidate, publish_dir)
+                    print(f"精度检查通过，已发布到: {entry['published']}")
+                else:
+                    print(f"精度下降超过允许范围 {max_drop:.4f}，拒绝发布{fmt} INT8模型")
+                report['candidates'][fmt] = entry
+
+            except Exception as e:
+                print(f"{fmt} INT8量化失败: {str(e)}")
+                report['candidates'][fmt] = {'error': str(e), 'passed': False}
+
+        report_path = os.path.join(staging_dir, 'quantization_report.json')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n量化报告已保存到: {report_path}")
+        return report
+
+    except Exception as e:
+        print(f"量化过程中出现错误: {str(e)}")
+        raise e
+
 if __name__ == "__main__":
     export_model()
\ No newline at end of file
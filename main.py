@@ -8,7 +8,8 @@ import sys
 import argparse
 from train import train_model
 from evaluate import evaluate_model
-from export_model import export_model
+from export_model import export_model, quantize_model
+from benchmark import run_benchmark
 
 def show_menu():
     """显示操作菜单"""
@@ -20,6 +21,8 @@ def show_menu():
     print("3. 评估模型性能")
     print("4. 导出模型")
     print("5. 全流程执行 (训练->评估->导出)")
+    print("6. INT8量化导出 (带精度检查)")
+    print("7. 推理延迟基准测试")
     print("0. 退出")
     print("="*60)
 
@@ -29,8 +32,10 @@ def main():
     
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='电力设施安全检测模型训练系统')
-    parser.add_argument('--mode', type=str, choices=['train', 'eval', 'export', 'all'], 
-                       help='运行模式: train(训练), eval(评估), export(导出), all(全流程)')
+    parser.add_argument('--mode', type=str, choices=['train', 'eval', 'export', 'quantize', 'benchmark', 'all'], 
+                       help='运行模式: train(训练), eval(评估), export(导出), quantize(INT8量化), benchmark(基准测试), all(全流程)')
+    parser.add_argument('--model', type=str, default=None,
+                       help='导出/量化使用的模型权重路径（默认自动查找best.pt）')
     args = parser.parse_args()
     
     # 如果提供了命令行参数，直接执行相应功能
@@ -40,7 +45,11 @@ def main():
         elif args.mode == 'eval':
             evaluate_model()
         elif args.mode == 'export':
-            export_model()
+            export_model(args.model)
+        elif args.mode == 'quantize':
+            quantize_model(args.model)
+        elif args.mode == 'benchmark':
+            run_benchmark()
         elif args.mode == 'all':
             print("开始全流程执行...")
             train_model()
@@ -52,7 +61,7 @@ def main():
     # 否则显示交互式菜单
     while True:
         show_menu()
-        choice = input("请选择操作 (0-5): ").strip()
+        choice = input("请选择操作 (0-7): ").strip()
         
         if choice == '0':
             print("感谢使用，再见!")
@@ -71,6 +80,10 @@ def main():
             evaluate_model()
             export_model()
             print("全流程执行完成!")
+        elif choice == '6':
+            quantize_model()
+        elif choice == '7':
+            run_benchmark()
         else:
             print("无效选择，请重新输入!")
 
@@ -0,0 +1,245 @@
+"""
+离线批量图片分析
+扫描目录或通配符匹配的巡检照片，由线程池预读取并解码，按批次推理，识别结果批量写入 SQLite。
+每次提交后将已处理的图片追加到清单文件，中断后重新运行会跳过清单中已处理的图片。
+
+用法:
+    python src/monitor/batch_images.py photos/                       # 分析目录下（含子目录）的全部图片
+    python src/monitor/batch_images.py "photos/2024-*/*.jpg"         # 通配符
+    python src/monitor/batch_images.py photos/ --manifest audit.txt  # 指定清单文件
+    python src/monitor/batch_images.py photos/ --no-resume           # 忽略清单，全部重新分析
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+import yaml
+
+# 必须在导入核心模块之前设置，核心模块将使用纯 Python 信号实现
+os.environ['MONITOR_HEADLESS'] = '1'
+
+# 添加监控系统目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.data_input import ImageFolderInput
+from core.model_infer import YoloInfer
+from core.data_storage import SqliteStorage
+from core.profiler import profiler
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+
+
+def load_config(config_path):
+    """加载配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+class ImageManifest:
+    """已处理图片清单（每行一个绝对路径，只追加）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def load(self):
+        """读取已处理的图片路径"""
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    def reset(self):
+        """清空清单"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def append(self, paths):
+        """追加已处理的图片（在对应记录提交后调用）"""
+        if not paths:
+            return
+        if self.file is None:
+            manifest_dir = os.path.dirname(self.path)
+            if manifest_dir:
+                os.makedirs(manifest_dir, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(''.join(f"{path}\n" for path in paths))
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class BatchImageAnalyzer:
+    """离线批量图片分析"""
+
+    def __init__(self, config, manifest_path=None, resume=True):
+        self.config = config
+        batch_config = config.get('batch') or {}
+        self.batch_size = batch_config.get('batch_size', 8)
+        # 每处理多少张图片提交一次数据库事务并更新清单
+        self.commit_images = batch_config.get('commit_images', 500)
+        self.manifest = ImageManifest(manifest_path or batch_config.get('image_manifest', 'logs/image_manifest.txt'))
+        self.resume = resume
+
+        profiler.configure(config)
+        self.infer = YoloInfer(config)
+        self.storage = SqliteStorage(config)
+        self.infer.error_occurred.connect(self.on_error)
+        self.storage.error_occurred.connect(self.on_error)
+        # 统计信息
+        self.image_count = 0
+        self.detection_count = 0
+        self.risk_counts = {}
+        self.failed_images = []
+        self.start_time = time.perf_counter()
+
+    def on_error(self, error_msg):
+        """推理或存储错误"""
+        print(f"错误: {error_msg}")
+
+    def _to_records(self, path, detections):
+        """一张图片的检测结果转换为识别记录表的行"""
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        ts = int(now.timestamp())
+        source = os.path.basename(os.path.dirname(path))
+        return [
+            (timestamp, ts, "图片", source, class_name, confidence, risk_level, path, None)
+            for class_name, confidence, risk_level in detections.rows('class_name', 'confidence', 'risk_level')
+        ]
+
+    def run(self, input_path):
+        """分析目录、通配符或单个图片"""
+        try:
+            if not self.infer.load_model():
+                print("模型加载失败，请检查模型路径配置")
+                return
+
+            if self.resume:
+                done = self.manifest.load()
+            else:
+                self.manifest.reset()
+                done = set()
+
+            image_input = ImageFolderInput(self.config)
+            image_input.set_image_path(input_path)
+            image_input.set_skip_paths(done)
+            paths = image_input.list_images()
+            print(f"待分析图片 {len(paths)} 张，已处理 {len(done)} 张（清单: {self.manifest.path}）")
+            if not paths:
+                return
+
+            self._process(image_input.iter_images(paths), len(paths))
+        except KeyboardInterrupt:
+            print("\n已中断，已提交的图片不会重复分析")
+        except Exception as e:
+            print(f"分析中止: {str(e)}（已提交的图片不会重复分析）")
+        finally:
+            self.manifest.close()
+            self.storage.close()
+            self.print_summary()
+
+    def _process(self, images, total):
+        """按批次推理，每 commit_images 张提交一次"""
+        self.start_time = time.perf_counter()
+        frames, frame_paths = [], []
+        records, committed_paths = [], []
+        last_report = self.start_time
+
+        for path, frame in images:
+            if frame is None:
+                # 无法读取的图片不写入清单，重新运行时重试
+                self.failed_images.append(path)
+            else:
+                frames.append(frame)
+                frame_paths.append(path)
+
+            if len(frames) >= self.batch_size:
+                records.extend(self._infer_batch(frames, frame_paths))
+                committed_paths.extend(frame_paths)
+                frames, frame_paths = [], []
+                if len(committed_paths) >= self.commit_images:
+                    self._commit(records, committed_paths)
+                    records, committed_paths = [], []
+
+            now = time.perf_counter()
+            if now - last_report >= 5.0:
+                self.print_progress(total)
+                last_report = now
+
+        if frames:
+            records.extend(self._infer_batch(frames, frame_paths))
+            committed_paths.extend(frame_paths)
+        self._commit(records, committed_paths)
+        self.print_progress(total)
+
+    def _infer_batch(self, frames, paths):
+        """推理一个批次，返回识别记录"""
+        batch_results = self.infer.infer_batch(frames)
+        if batch_results is None:
+            raise RuntimeError("批量推理失败")
+
+        records = []
+        for path, result_data in zip(paths, batch_results):
+            detections = result_data['detections']
+            records.extend(self._to_records(path, detections))
+            for risk_level in detections.risk_levels.tolist():
+                self.risk_counts[risk_level] = self.risk_counts.get(risk_level, 0) + 1
+        self.image_count += len(frames)
+        self.detection_count += sum(len(result_data['detections']) for result_data in batch_results)
+        return records
+
+    def _commit(self, records, paths):
+        """在一个事务中写入识别记录，提交成功后再更新清单"""
+        self.storage.insert_records(records)
+        self.manifest.append(paths)
+
+    def print_progress(self, total):
+        """打印进度"""
+        elapsed = time.perf_counter() - self.start_time
+        fps = self.image_count / elapsed if elapsed > 0 else 0.0
+        print(f"[进度] {self.image_count + len(self.failed_images)}/{total} 张 | "
+              f"{self.detection_count} 个目标 | {fps:.1f} 张/秒")
+
+    def print_summary(self):
+        """打印汇总信息"""
+        elapsed = time.perf_counter() - self.start_time
+        fps = self.image_count / elapsed if elapsed > 0 else 0.0
+        risks = ", ".join(f"{level} {count}" for level, count in sorted(self.risk_counts.items()))
+        print("\n离线分析完成:")
+        print(f"  处理图片: {self.image_count}，耗时 {elapsed:.1f} 秒，平均 {fps:.1f} 张/秒")
+        print(f"  检测目标: {self.detection_count}" + (f" ({risks})" if risks else ""))
+        cascade = self.infer.cascade_stats()
+        if cascade:
+            print(f"  级联升级: {cascade['escalated']}/{cascade['inputs']} ({cascade['escalation_rate'] * 100:.1f}%)，"
+                  f"平均附加延迟 {cascade['added_latency'] * 1000:.1f}ms")
+        if self.failed_images:
+            print(f"  无法读取: {len(self.failed_images)} 张（重新运行将重试），例如 {self.failed_images[0]}")
+        if profiler.enabled:
+            print(profiler.format_table())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='电站安全监控离线批量图片分析')
+    parser.add_argument('input', help='图片目录、通配符（需加引号）或单个图片')
+    parser.add_argument('--config', type=str, default=DEFAULT_CONFIG_PATH, help='配置文件路径')
+    parser.add_argument('--manifest', type=str, default=None, help='已处理图片清单文件路径')
+    parser.add_argument('--batch-size', type=int, default=None, help='单次批量推理的图片数')
+    parser.add_argument('--no-resume', action='store_true', help='清空清单，全部重新分析')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if args.batch_size is not None:
+        config.setdefault('batch', {})['batch_size'] = args.batch_size
+
+    analyzer = BatchImageAnalyzer(config, manifest_path=args.manifest, resume=not args.no_resume)
+    analyzer.run(args.input)
+
+
+if __name__ == "__main__":
+    main()
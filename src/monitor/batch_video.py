@@ -0,0 +1,355 @@
+"""
+离线批量视频分析
+将多个视频（或长视频按时间切分的分段）分发到进程池并行分析，每个工作进程持有独立的推理实例，
+识别结果由主进程通过唯一的写入线程写入 SQLite。每个分段的记录与完成标记在同一事务中提交，
+中断后重新运行会跳过已完成的分段。
+
+用法:
+    python src/monitor/batch_video.py recordings/                 # 分析目录下的全部视频
+    python src/monitor/batch_video.py a.mp4 b.mp4 --workers 8     # 指定工作进程数
+    python src/monitor/batch_video.py recordings/ --no-resume     # 忽略已完成记录，全部重新分析
+    python src/monitor/batch_video.py a.mp4 --start-time "2024-05-01 08:00:00"   # 指定录像开始时间
+
+识别记录的时间为录像中的时间：录像开始时间默认按文件修改时间减去视频时长估算，加上帧在视频中的位置。
+"""
+
+import os
+import sys
+import copy
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+import yaml
+
+# 必须在导入核心模块之前设置，核心模块将使用纯 Python 信号实现
+os.environ['MONITOR_HEADLESS'] = '1'
+
+# 添加监控系统目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+from core.data_storage import SqliteStorage
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.flv', '.ts', '.m4v', '.wmv')
+
+# 工作进程内的全局状态（每个进程一份）
+_worker_config = None
+_worker_infer = None
+
+
+def load_config(config_path):
+    """加载配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def find_videos(inputs):
+    """展开输入的文件和目录，返回排序后的视频文件绝对路径列表"""
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                videos.extend(os.path.join(root, name) for name in names
+                              if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"跳过不存在的输入: {path}")
+    return sorted({os.path.abspath(video) for video in videos})
+
+
+def plan_segments(video_path, segment_seconds, start_time=None):
+    """读取视频帧数和帧率，按时长切分为分段任务
+
+    start_time 为录像开始时间（时间戳），未指定时按文件修改时间（录像结束写入）减去视频时长估算
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise RuntimeError("无法打开视频文件")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+    if total_frames <= 0:
+        raise RuntimeError("无法获取视频帧数")
+
+    stat = os.stat(video_path)
+    if start_time is None:
+        start_time = stat.st_mtime - total_frames / fps
+    segment_frames = max(1, int(segment_seconds * fps)) if segment_seconds > 0 else total_frames
+    return [
+        {
+            'video_path': video_path,
+            'file_size': stat.st_size,
+            'file_mtime': int(stat.st_mtime),
+            'fps': fps,
+            'recording_start': start_time,
+            'start_frame': start,
+            'end_frame': min(start + segment_frames, total_frames),
+        }
+        for start in range(0, total_frames, segment_frames)
+    ]
+
+
+def segment_key(segment):
+    """分段的唯一标识（文件大小或修改时间变化后视为新文件）"""
+    return (segment['video_path'], segment['file_size'], segment['file_mtime'],
+            segment['start_frame'], segment['end_frame'])
+
+
+def _init_worker(config):
+    """工作进程初始化：只保存配置，模型在处理第一个分段时加载"""
+    global _worker_config
+    _worker_config = config
+
+
+def _get_worker_infer():
+    """获取当前工作进程的推理实例"""
+    global _worker_infer
+    if _worker_infer is None:
+        from core.model_infer import YoloInfer
+
+        infer = YoloInfer(_worker_config)
+        errors = []
+        infer.error_occurred.connect(errors.append)
+        if not infer.load_model():
+            raise RuntimeError(errors[-1] if errors else "模型加载失败")
+        infer.error_occurred.disconnect(errors.append)
+        _worker_infer = infer
+    return _worker_infer
+
+
+def process_segment(segment):
+    """工作进程：分析一个视频分段，返回检测结果 (视频内秒数, 类别, 置信度, 风险等级) 列表和统计信息"""
+    start_time = time.perf_counter()
+    result = dict(segment, frames=0, detections=[], error=None)
+    cap = None
+    infer = None
+    errors = []
+    try:
+        infer = _get_worker_infer()
+        infer.error_occurred.connect(errors.append)
+
+        batch_config = _worker_config.get('batch') or {}
+        process_fps = batch_config.get('process_fps', 5)
+        batch_size = batch_config.get('batch_size', 8)
+        fps = segment['fps']
+        stride = max(1, int(round(fps / process_fps))) if process_fps > 0 else 1
+
+        cap = cv2.VideoCapture(segment['video_path'])
+        if not cap.isOpened():
+            raise RuntimeError("无法打开视频文件")
+        if segment['start_frame'] > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, segment['start_frame'])
+
+        frames = []
+        positions = []
+
+        def run_batch():
+            batch_results = infer.infer_batch(frames)
+            if batch_results is None:
+                raise RuntimeError(errors[-1] if errors else "推理失败")
+            for position, result_data in zip(positions, batch_results):
+                result['detections'].extend(
+                    (position,) + row
+                    for row in result_data['detections'].rows('class_name', 'confidence', 'risk_level')
+                )
+            result['frames'] += len(frames)
+            frames.clear()
+            positions.clear()
+
+        frame_index = segment['start_frame']
+        while frame_index < segment['end_frame']:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+            positions.append(frame_index / fps)
+            if len(frames) >= batch_size:
+                run_batch()
+
+            # 跳过不需要处理的帧（只 grab 不解码输出）
+            skip = min(stride, segment['end_frame'] - frame_index) - 1
+            for _ in range(skip):
+                if not cap.grab():
+                    break
+            frame_index += stride
+
+        if frames:
+            run_batch()
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        # 推理实例在进程内复用，无论成功与否都要断开本分段的错误收集
+        if infer is not None:
+            infer.error_occurred.disconnect(errors.append)
+        if cap is not None:
+            cap.release()
+        result['elapsed'] = time.perf_counter() - start_time
+    return result
+
+
+def format_position(seconds):
+    """秒数格式化为 时:分:秒"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class BatchVideoAnalyzer:
+    """离线批量视频分析"""
+
+    def __init__(self, config, workers=None, segment_seconds=None, resume=True, start_time=None):
+        self.config = copy.deepcopy(config)
+        batch_config = self.config.setdefault('batch', {})
+        cpu_count = os.cpu_count() or 1
+        self.workers = workers or batch_config.get('workers') or cpu_count
+        self.segment_seconds = segment_seconds if segment_seconds is not None \
+            else batch_config.get('segment_seconds', 600)
+        self.resume = resume
+        # 录像开始时间（时间戳，只用于单个视频），未指定时按文件修改时间估算
+        self.start_time = start_time
+
+        # 每个工作进程的推理线程数，避免多进程超额占用 CPU
+        if not self.config['model'].get('num_threads'):
+            self.config['model']['num_threads'] = max(1, cpu_count // self.workers)
+        # 离线分析按批次推理，不使用场景变化门控
+        self.config['model']['change_gate'] = {'enabled': False}
+
+        self.storage = SqliteStorage(self.config)
+        self.storage.error_occurred.connect(lambda msg: print(f"错误: {msg}"))
+        # 统计信息
+        self.frame_count = 0
+        self.detection_count = 0
+        self.risk_counts = {}
+        self.failed_segments = []
+
+    def _to_records(self, result):
+        """分段结果转换为识别记录表的行：时间为录像开始时间加上视频内位置，
+        视频内位置同时记录在 image_path 中，格式为 路径#t=秒"""
+        source = os.path.basename(result['video_path'])
+        records = []
+        for position, class_name, confidence, risk_level in result['detections']:
+            moment = datetime.fromtimestamp(result['recording_start'] + position)
+            records.append((moment.strftime("%Y-%m-%d %H:%M:%S"), int(moment.timestamp()), "视频", source,
+                            class_name, confidence, risk_level, f"{result['video_path']}#t={position:.2f}", None))
+        return records
+
+    def run(self, inputs):
+        """分析输入的视频文件和目录"""
+        videos = find_videos(inputs)
+        if not videos:
+            print("未找到视频文件")
+            self.storage.close()
+            return
+        if self.start_time is not None and len(videos) > 1:
+            print("--start-time 只能用于单个视频")
+            self.storage.close()
+            return
+
+        segments = []
+        for video_path in videos:
+            try:
+                segments.extend(plan_segments(video_path, self.segment_seconds, self.start_time))
+            except Exception as e:
+                print(f"跳过视频 {video_path}: {str(e)}")
+
+        completed = self.storage.query_batch_segments() if self.resume else set()
+        pending = [segment for segment in segments if segment_key(segment) not in completed]
+        print(f"视频 {len(videos)} 个，分段 {len(segments)} 个，已完成 {len(segments) - len(pending)} 个，"
+              f"待分析 {len(pending)} 个，工作进程 {self.workers} 个")
+        if not pending:
+            self.storage.close()
+            return
+
+        start_time = time.perf_counter()
+        context = multiprocessing.get_context('spawn')
+        pool = context.Pool(processes=self.workers, initializer=_init_worker, initargs=(self.config,))
+        try:
+            for index, result in enumerate(pool.imap_unordered(process_segment, pending), start=1):
+                self._on_segment_done(index, len(pending), result, start_time)
+            pool.close()
+        except KeyboardInterrupt:
+            print("\n已中断，已完成的分段不会重复分析")
+            pool.terminate()
+        finally:
+            pool.join()
+            self.storage.close()
+            self.print_summary(time.perf_counter() - start_time)
+
+    def _on_segment_done(self, index, total, result, start_time):
+        """写入一个分段的结果并打印进度"""
+        name = os.path.basename(result['video_path'])
+        span = (f"{format_position(result['start_frame'] / result['fps'])}-"
+                f"{format_position(result['end_frame'] / result['fps'])}")
+        if result['error']:
+            self.failed_segments.append(result)
+            print(f"[{index}/{total}] {name} {span} 失败: {result['error']}")
+            return
+
+        records = self._to_records(result)
+        try:
+            self.storage.insert_batch_segment(records, result)
+        except Exception as e:
+            self.failed_segments.append(result)
+            print(f"[{index}/{total}] {name} {span} 写入数据库失败: {str(e)}")
+            return
+
+        self.frame_count += result['frames']
+        self.detection_count += len(records)
+        for _, _, _, risk_level in result['detections']:
+            self.risk_counts[risk_level] = self.risk_counts.get(risk_level, 0) + 1
+
+        segment_fps = result['frames'] / result['elapsed'] if result['elapsed'] > 0 else 0.0
+        overall_fps = self.frame_count / (time.perf_counter() - start_time)
+        print(f"[{index}/{total}] {name} {span}: {result['frames']} 帧, {len(records)} 个目标, "
+              f"{segment_fps:.1f} 帧/秒 (总体 {overall_fps:.1f} 帧/秒)")
+
+    def print_summary(self, elapsed):
+        """打印汇总信息"""
+        fps = self.frame_count / elapsed if elapsed > 0 else 0.0
+        risks = ", ".join(f"{level} {count}" for level, count in sorted(self.risk_counts.items()))
+        print("\n离线分析完成:")
+        print(f"  处理帧数: {self.frame_count}，耗时 {elapsed:.1f} 秒，平均 {fps:.1f} 帧/秒")
+        print(f"  检测目标: {self.detection_count}" + (f" ({risks})" if risks else ""))
+        if self.failed_segments:
+            print(f"  失败分段: {len(self.failed_segments)} 个（重新运行将重试）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='电站安全监控离线批量视频分析')
+    parser.add_argument('inputs', nargs='+', help='视频文件或目录')
+    parser.add_argument('--config', type=str, default=DEFAULT_CONFIG_PATH, help='配置文件路径')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数（默认 CPU 核数）')
+    parser.add_argument('--segment-seconds', type=float, default=None, help='长视频切分的分段时长（秒），0 表示不切分')
+    parser.add_argument('--process-fps', type=float, default=None, help='每秒视频处理的帧数（按视频时间）')
+    parser.add_argument('--batch-size', type=int, default=None, help='单次批量推理的帧数')
+    parser.add_argument('--no-resume', action='store_true', help='忽略已完成的分段，全部重新分析')
+    parser.add_argument('--start-time', type=str, default=None,
+                        help='录像开始时间，如 "2024-05-01 08:00:00"（只用于单个视频，默认按文件修改时间减去视频时长估算）')
+    args = parser.parse_args()
+
+    start_time = None
+    if args.start_time:
+        try:
+            start_time = datetime.strptime(args.start_time, "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            parser.error('--start-time 格式应为 "YYYY-MM-DD HH:MM:SS"')
+
+    config = load_config(args.config)
+    batch_config = config.setdefault('batch', {})
+    if args.process_fps is not None:
+        batch_config['process_fps'] = args.process_fps
+    if args.batch_size is not None:
+        batch_config['batch_size'] = args.batch_size
+
+    analyzer = BatchVideoAnalyzer(config, workers=args.workers, segment_seconds=args.segment_seconds,
+                                  resume=not args.no_resume, start_time=start_time)
+    analyzer.run(args.inputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import threading
+import time
+import uuid
+from core.qt_compat import QObject, pyqtSignal
+from core.detections import ALERT_RISK_LEVEL
+
+# 告警事件状态
+EVENT_PENDING = '待确认'
+EVENT_OPEN = '进行中'
+EVENT_CLOSED = '已结束'
+
+
+class AlertEvent:
+    """一次告警事件：同一输入源上同一风险条件（类别 + 区域，启用跟踪时再加跟踪ID）从出现到消失的全过程"""
+    __slots__ = ('event_id', 'source', 'class_name', 'chinese_name', 'risk_level', 'track_id', 'zone_id', 'status',
+                 'start_ts', 'last_seen_ts', 'end_ts', 'frame_count', 'max_targets', 'max_confidence',
+                 'last_saved_ts')
+
+    def __init__(self, source, class_name, chinese_name, risk_level, track_id, zone_id, now):
+        self.event_id = uuid.uuid4().hex
+        self.source = source
+        self.class_name = class_name
+        self.chinese_name = chinese_name
+        self.risk_level = risk_level
+        self.track_id = track_id
+        self.zone_id = zone_id
+        self.status = EVENT_PENDING
+        self.start_ts = now
+        self.last_seen_ts = now
+        self.end_ts = None
+        self.frame_count = 0
+        self.max_targets = 0
+        self.max_confidence = 0.0
+        self.last_saved_ts = now
+
+    def hit(self, now, targets, confidence):
+        """本帧仍满足风险条件"""
+        self.last_seen_ts = now
+        self.frame_count += 1
+        if targets > self.max_targets:
+            self.max_targets = targets
+        if confidence > self.max_confidence:
+            self.max_confidence = confidence
+
+    @property
+    def duration(self):
+        """持续时间（秒），进行中的事件计到最后一次出现"""
+        return (self.end_ts or self.last_seen_ts) - self.start_ts
+
+    def label(self):
+        """目标描述，如 “未戴安全帽 #12 @开关场”"""
+        label = self.chinese_name if self.track_id is None else f"{self.chinese_name} #{self.track_id}"
+        return label if self.zone_id is None else f"{label} @{self.zone_id}"
+
+    def summary(self):
+        """事件摘要"""
+        minutes, seconds = divmod(int(self.duration), 60)
+        duration = f"{minutes}分{seconds}秒" if minutes else f"{seconds}秒"
+        targets = f"，最多 {self.max_targets} 个目标" if self.max_targets > 1 else ""
+        return (f"[{self.source}] {self.label()} 持续 {duration}，{self.frame_count} 帧{targets}，"
+                f"最高置信度 {self.max_confidence:.2f}")
+
+    def to_row(self):
+        """告警事件表的写入参数"""
+        return (self.event_id, int(self.start_ts), self.source, self.class_name, self.risk_level, self.track_id,
+                int(self.last_seen_ts), None if self.end_ts is None else int(self.end_ts), round(self.duration, 1),
+                self.frame_count, self.max_targets, self.max_confidence, self.status, self.summary(), self.zone_id)
+
+
+class AlertEventEngine(QObject):
+    """增量告警事件引擎
+
+    每帧按 (输入源, 类别, 区域[, 跟踪ID]) 在字典中查找进行中的事件并更新，不逐帧写库：
+    风险条件首次出现（置信度需达到 open_confidence）时创建待确认事件，持续 min_duration 秒后开启事件并告警；
+    条件消失不超过 clear_after 秒的间断视为同一事件（置信度只需达到检测阈值），超过后关闭事件并生成摘要。
+    待确认期间消失的闪烁目标直接丢弃。每帧的开销与该输入源进行中的事件数成正比。
+    """
+    event_opened = pyqtSignal(object)   # AlertEvent
+    event_updated = pyqtSignal(object)  # AlertEvent（进行中的事件每隔 update_interval 秒一次）
+    event_closed = pyqtSignal(object)   # AlertEvent
+
+    def __init__(self, config):
+        super().__init__()
+        event_config = config.get('alert_events') or {}
+        # 参与告警的最低风险等级
+        self.min_level = event_config.get('min_level', ALERT_RISK_LEVEL)
+        # 风险条件持续多少秒后开启事件（过滤单帧误检）
+        self.min_duration = event_config.get('min_duration', 1.0)
+        # 开启事件所需的最低置信度（维持事件只需达到检测阈值）
+        self.open_confidence = event_config.get('open_confidence', 0.0)
+        # 风险条件消失多少秒后关闭事件
+        self.clear_after = event_config.get('clear_after', 3.0)
+        # 进行中的事件每隔多少秒更新一次数据库中的持续时间
+        self.update_interval = event_config.get('update_interval', 60.0)
+        # 启用跟踪时按跟踪ID区分事件（每个目标一个事件），否则同一类别合并为一个事件
+        self.per_track = event_config.get('per_track', True)
+
+        self.events = {}  # 输入源 -> {条件键: AlertEvent}
+        self.lock = threading.Lock()
+        # 统计信息
+        self.opened_count = 0
+        self.closed_count = 0
+        self.suppressed_count = 0
+
+    def update(self, source, detections, now=None, still=False):
+        """处理一帧的检测结果（包括没有目标的帧，用于关闭事件）
+
+        still 为 True 表示静态图片：各图片之间没有时间上的连续性，风险目标立即开启事件并随即关闭
+        """
+        now = time.time() if now is None else now
+        min_duration = 0.0 if still else self.min_duration
+        opened, updated, closed = [], [], []
+
+        with self.lock:
+            events = self.events.setdefault(source, {})
+
+            # 按条件键合并本帧的目标
+            hits = {}
+            if detections:
+                alerts = detections.at_least(self.min_level)
+                for class_name, chinese_name, risk_level, confidence, track_id, zone_id in alerts.rows(
+                        'class_name', 'chinese_name', 'risk_level', 'confidence', 'track_id', 'zone_id'):
+                    key = (class_name, track_id if self.per_track else None, zone_id)
+                    hit = hits.get(key)
+                    if hit is None:
+                        hits[key] = [chinese_name, risk_level, confidence, 1]
+                    else:
+                        hit[2] = max(hit[2], confidence)
+                        hit[3] += 1
+
+            for key, (chinese_name, risk_level, confidence, targets) in hits.items():
+                event = events.get(key)
+                if event is None:
+                    if confidence < self.open_confidence:
+                        continue
+                    event = AlertEvent(source, key[0], chinese_name, risk_level, key[1], key[2], now)
+                    events[key] = event
+                event.hit(now, targets, confidence)
+
+            for key, event in list(events.items()):
+                if now - event.last_seen_ts >= self.clear_after:
+                    del events[key]
+                    if event.status == EVENT_OPEN:
+                        event.status = EVENT_CLOSED
+                        event.end_ts = event.last_seen_ts
+                        self.closed_count += 1
+                        closed.append(event)
+                    else:
+                        self.suppressed_count += 1
+                elif event.status == EVENT_PENDING:
+                    if now - event.start_ts >= min_duration:
+                        event.status = EVENT_OPEN
+                        event.last_saved_ts = now
+                        self.opened_count += 1
+                        opened.append(event)
+                elif now - event.last_saved_ts >= self.update_interval:
+                    event.last_saved_ts = now
+                    updated.append(event)
+
+        # 在锁外发出信号，回调中可以写库或告警
+        for event in closed:
+            self.event_closed.emit(event)
+        for event in opened:
+            self.event_opened.emit(event)
+        for event in updated:
+            self.event_updated.emit(event)
+
+        if still:
+            self.close_all(source)
+
+    def close_all(self, source=None):
+        """停止输入时关闭进行中的事件（source 为 None 时关闭全部输入源），丢弃待确认的事件"""
+        closed = []
+        with self.lock:
+            sources = list(self.events) if source is None else [source]
+            for key in sources:
+                for event in self.events.pop(key, {}).values():
+                    if event.status == EVENT_OPEN:
+                        event.status = EVENT_CLOSED
+                        event.end_ts = event.last_seen_ts
+                        self.closed_count += 1
+                        closed.append(event)
+                    else:
+                        self.suppressed_count += 1
+
+        for event in closed:
+            self.event_closed.emit(event)
+
+    def active_count(self):
+        """进行中的事件数"""
+        with self.lock:
+            return sum(event.status == EVENT_OPEN
+                       for events in self.events.values() for event in events.values())
@@ -0,0 +1,269 @@
+"""
+推理后端
+所有后端的输入都是 letterbox 后的 (N, H, W, 3) BGR uint8 批量缓冲区，
+输出为 letterbox 坐标系下的检测框数组列表（每行 x1, y1, x2, y2, conf, cls）。
+依赖库（torch/ultralytics、onnxruntime、openvino）只在加载对应后端时导入。
+"""
+
+import os
+import numpy as np
+
+
+def nms(boxes, scores, iou_threshold):
+    """非极大值抑制，返回保留框的下标（按置信度降序）"""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        rest = order[1:]
+        # 与当前最高分框的交并比（向量化计算）
+        inter_w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        inter_h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = inter_w * inter_h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def batched_nms(boxes, scores, class_ids, iou_threshold):
+    """按类别分别做 NMS（通过按类别平移坐标一次完成）"""
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = class_ids.astype(boxes.dtype)[:, None] * (boxes.max() + 1)
+    return nms(boxes + offsets, scores, iou_threshold)
+
+
+def postprocess_yolo(output, conf_threshold, iou_threshold, max_det=300):
+    """解析 YOLOv8/YOLO11 导出模型的原始输出 (N, 4 + 类别数, 锚点数)，返回每张图的检测框数组"""
+    box_data_list = []
+    for prediction in output:
+        # (4 + nc, A) -> (A, 4 + nc)
+        prediction = prediction.T
+        class_scores = prediction[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        confidences = class_scores[np.arange(len(class_scores)), class_ids]
+
+        mask = confidences >= conf_threshold
+        if not mask.any():
+            box_data_list.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+
+        xywh = prediction[mask, :4]
+        confidences = confidences[mask]
+        class_ids = class_ids[mask]
+
+        # 中心点宽高 -> 左上右下
+        boxes = np.empty_like(xywh)
+        boxes[:, :2] = xywh[:, :2] - xywh[:, 2:4] / 2
+        boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:4] / 2
+
+        keep = batched_nms(boxes, confidences, class_ids, iou_threshold)[:max_det]
+        box_data = np.empty((len(keep), 6), dtype=np.float32)
+        box_data[:, :4] = boxes[keep]
+        box_data[:, 4] = confidences[keep]
+        box_data[:, 5] = class_ids[keep]
+        box_data_list.append(box_data)
+    return box_data_list
+
+
+def to_blob(batch, dtype=np.float32):
+    """(N, H, W, 3) BGR uint8 -> (N, 3, H, W) RGB 归一化数组"""
+    blob = batch[..., ::-1].transpose(0, 3, 1, 2).astype(dtype)
+    blob *= 1.0 / 255.0
+    return np.ascontiguousarray(blob)
+
+
+class InferenceBackend:
+    """推理后端基类"""
+    name = "base"
+
+    def __init__(self, config):
+        self.config = config
+        model_config = config['model']
+        self.iou_threshold = model_config.get('iou_threshold', 0.7)
+        self.max_det = model_config.get('max_det', 300)
+        self.num_threads = model_config.get('num_threads', 0)
+        self.device = 'cpu'
+
+    def load(self, model_path):
+        """加载模型"""
+        raise NotImplementedError
+
+    def predict(self, batch, conf_threshold):
+        """对 letterbox 后的批量缓冲区推理"""
+        raise NotImplementedError
+
+
+class UltralyticsBackend(InferenceBackend):
+    """ultralytics 后端（.pt / TorchScript 等，依赖 PyTorch）"""
+    name = "ultralytics"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.model = None
+        self.torch = None
+
+    def load(self, model_path):
+        import torch
+        from ultralytics import YOLO
+
+        self.torch = torch
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        self.model = YOLO(model_path)
+        # 设置模型为评估模式
+        if hasattr(self.model, 'model') and hasattr(self.model.model, 'eval'):
+            self.model.model.eval()
+
+    def _to_tensor(self, batch):
+        """将 (N, H, W, 3) 的 BGR uint8 缓冲区转换为 (N, 3, H, W) 的 RGB 归一化张量"""
+        tensor = self.torch.from_numpy(batch).to(self.device)
+        # flip 会生成新张量，之后缓冲区可以安全复用
+        tensor = tensor.permute(0, 3, 1, 2).flip(1).contiguous()
+        tensor = tensor.half() if self.device == 'cuda' else tensor.float()
+        return tensor.div_(255.0)
+
+    def predict(self, batch, conf_threshold):
+        # 直接输入张量，模型内部不再重复缩放
+        results = self.model(
+            self._to_tensor(batch),
+            conf=conf_threshold,
+            iou=self.iou_threshold,
+            max_det=self.max_det,
+            device=self.device,
+            verbose=False,  # 减少日志输出
+            half=(self.device == 'cuda'),  # 如果使用CUDA则启用半精度
+            stream=False  # 禁用流式处理
+        )
+
+        box_data_list = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                box_data_list.append(np.zeros((0, 6), dtype=np.float32))
+            else:
+                box_data_list.append(boxes.data.cpu().numpy().astype(np.float32))
+        return box_data_list
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU 后端，使用 NumPy 后处理和 NMS"""
+    name = "onnxruntime"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.session = None
+        self.input_name = None
+        self.input_dtype = np.float32
+        self.static_batch = None
+
+    def load(self, model_path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_dtype = np.float16 if model_input.type == 'tensor(float16)' else np.float32
+        # 导出时 dynamic=False 的模型批次大小固定
+        batch_dim = model_input.shape[0]
+        self.static_batch = batch_dim if isinstance(batch_dim, int) else None
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    def predict(self, batch, conf_threshold):
+        blob = to_blob(batch, self.input_dtype)
+        if self.static_batch is None or self.static_batch == len(blob):
+            output = self._run(blob)
+        else:
+            # 固定批次大小的模型逐张推理
+            output = np.concatenate([self._run(blob[i:i + 1]) for i in range(len(blob))])
+        return postprocess_yolo(output.astype(np.float32), conf_threshold, self.iou_threshold, self.max_det)
+
+
+class OpenVinoBackend(InferenceBackend):
+    """OpenVINO IR CPU 后端，使用 NumPy 后处理和 NMS"""
+    name = "openvino"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.compiled_model = None
+        self.output = None
+        self.static_batch = None
+
+    @staticmethod
+    def _find_xml(model_path):
+        """支持直接指定 .xml 文件或 ultralytics 导出的 *_openvino_model 目录"""
+        if os.path.isdir(model_path):
+            for name in sorted(os.listdir(model_path)):
+                if name.endswith('.xml'):
+                    return os.path.join(model_path, name)
+            raise FileNotFoundError(f"目录中没有 OpenVINO 模型文件: {model_path}")
+        return model_path
+
+    def load(self, model_path):
+        import openvino as ov
+
+        core = ov.Core()
+        model = core.read_model(self._find_xml(model_path))
+        compile_config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if self.num_threads:
+            compile_config['INFERENCE_NUM_THREADS'] = self.num_threads
+        self.compiled_model = core.compile_model(model, 'CPU', compile_config)
+        self.output = self.compiled_model.output(0)
+
+        batch_dim = model.input(0).get_partial_shape()[0]
+        self.static_batch = batch_dim.get_length() if batch_dim.is_static else None
+
+    def _run(self, blob):
+        return self.compiled_model(blob)[self.output]
+
+    def predict(self, batch, conf_threshold):
+        blob = to_blob(batch)
+        if self.static_batch is None or self.static_batch == len(blob):
+            output = self._run(blob)
+        else:
+            output = np.concatenate([self._run(blob[i:i + 1]) for i in range(len(blob))])
+        return postprocess_yolo(output, conf_threshold, self.iou_threshold, self.max_det)
+
+
+BACKENDS = {
+    'ultralytics': UltralyticsBackend,
+    'onnxruntime': OnnxRuntimeBackend,
+    'openvino': OpenVinoBackend,
+}
+
+
+def resolve_backend_name(backend_name, model_path):
+    """backend 为 auto 时按模型文件类型选择后端"""
+    if backend_name != 'auto':
+        return backend_name
+    path = model_path.rstrip('/\\')
+    if path.endswith('.onnx'):
+        return 'onnxruntime'
+    if path.endswith('.xml') or path.endswith('_openvino_model'):
+        return 'openvino'
+    return 'ultralytics'
+
+
+def create_backend(config, model_path=None):
+    """根据 config.yaml 中 model.backend 创建推理后端（未加载模型）"""
+    model_path = model_path or config['model']['path']
+    backend_name = resolve_backend_name(config['model'].get('backend', 'auto'), model_path)
+    if backend_name not in BACKENDS:
+        raise ValueError(f"不支持的推理后端: {backend_name}")
+    return BACKENDS[backend_name](config)
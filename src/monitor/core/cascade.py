@@ -0,0 +1,64 @@
+import time
+import numpy as np
+from core.profiler import profiler
+
+
+class CascadeModel:
+    """两级级联推理：每个输入先由轻量模型推理，只有存在不确定目标（置信度落在 [uncertain_low, 置信度阈值) 区间）
+    或出现指定类别（如明火）候选的输入才交给较大、较准确的第二级模型重新推理
+
+    与推理后端接口一致（predict 的输入为 letterbox 后的批量缓冲区），对 YoloInfer 透明
+    """
+
+    def __init__(self, config, light, heavy):
+        cascade_config = config.get('cascade') or {}
+        self.light = light
+        self.heavy = heavy
+        self.name = f"级联 {light.name} -> {heavy.name}"
+        self.device = light.device
+        # 不确定区间下限：第一级以此阈值输出候选
+        self.uncertain_low = cascade_config.get('uncertain_low', 0.25)
+        # 不确定区间上限，未配置时使用当前置信度阈值
+        self.uncertain_high = cascade_config.get('uncertain_high')
+        # 出现这些类别的候选时总是升级
+        class_ids = {name: cls_id for cls_id, name in config['classes'].items()}
+        self.escalate_class_ids = np.array([class_ids[name] for name in cascade_config.get('always_escalate', ['fire'])
+                                            if name in class_ids], dtype=np.float32)
+        # 统计信息
+        self.input_count = 0
+        self.escalated_count = 0
+        self.escalation_seconds = 0.0
+
+    def predict(self, batch, conf_threshold):
+        high = self.uncertain_high if self.uncertain_high is not None else conf_threshold
+        low = min(self.uncertain_low, high)
+        box_data_list = self.light.predict(batch, low)
+
+        results, escalate = [], []
+        for index, box_data in enumerate(box_data_list):
+            scores = box_data[:, 4]
+            if (scores < high).any() or np.isin(box_data[:, 5], self.escalate_class_ids).any():
+                escalate.append(index)
+            results.append(box_data[scores >= conf_threshold])
+        self.input_count += len(box_data_list)
+
+        if escalate:
+            start_ns = time.perf_counter_ns()
+            heavy_results = self.heavy.predict(batch[escalate], conf_threshold)
+            duration_ns = time.perf_counter_ns() - start_ns
+            profiler.record('cascade', duration_ns)
+            for index, box_data in zip(escalate, heavy_results):
+                results[index] = box_data
+            self.escalated_count += len(escalate)
+            self.escalation_seconds += duration_ns / 1e9
+        return results
+
+    def stats(self):
+        """升级率和第二级模型带来的平均附加延迟（秒，按全部输入平均）"""
+        return {
+            'inputs': self.input_count,
+            'escalated': self.escalated_count,
+            'escalation_rate': self.escalated_count / self.input_count if self.input_count else 0.0,
+            'added_latency': self.escalation_seconds / self.input_count if self.input_count else 0.0,
+            'escalation_seconds': self.escalation_seconds,
+        }
@@ -0,0 +1,80 @@
+import time
+import cv2
+
+
+class SceneChangeGate:
+    """场景变化门控：比较降采样灰度图的分块差异，仅在画面明显变化或结果过期时才需要重新推理"""
+
+    def __init__(self, config):
+        gate_config = config['model'].get('change_gate') or {}
+        self.enabled = gate_config.get('enabled', True)
+        # 分块平均灰度差阈值（0-255）
+        self.threshold = gate_config.get('threshold', 6.0)
+        # 最长复用时间（秒）
+        self.max_stale_seconds = gate_config.get('max_stale_seconds', 1.0)
+        # 降采样尺寸 [宽, 高] 和分块网格 [列, 行]
+        self.size = tuple(gate_config.get('size', [64, 36]))
+        self.grid = tuple(gate_config.get('grid', [8, 6]))
+
+        # 参考帧（上次实际推理的帧）的签名
+        self.reference = None
+        self.reference_time = 0.0
+        self._pending = None
+        # 上次推理的检测框和所在区域ID（未配置区域时为 None），用于复用
+        self.last_box_data = None
+        self.last_zone_ids = None
+        # 统计信息
+        self.skipped_count = 0
+        self.last_score = 0.0
+
+    def signature(self, frame):
+        """计算帧签名：先按步长抽样再区域插值缩小，最后转为灰度"""
+        step = max(1, frame.shape[1] // (self.size[0] * 2))
+        sampled = frame[::step, ::step]
+        small = cv2.resize(sampled, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def change_score(self, signature):
+        """与参考帧比较，返回变化最大的分块的平均灰度差"""
+        diff = cv2.absdiff(signature, self.reference)
+        blocks = cv2.resize(diff, self.grid, interpolation=cv2.INTER_AREA)
+        return float(blocks.max())
+
+    def should_infer(self, frame, now=None):
+        """判断当前帧是否需要推理；返回 False 时调用方应复用 last_box_data"""
+        if not self.enabled:
+            return True
+
+        now = time.time() if now is None else now
+        signature = self.signature(frame)
+        self._pending = (signature, now)
+
+        if (self.reference is None
+                or self.last_box_data is None
+                or self.reference.shape != signature.shape
+                or now - self.reference_time >= self.max_stale_seconds):
+            return True
+
+        self.last_score = self.change_score(signature)
+        if self.last_score > self.threshold:
+            return True
+
+        self.skipped_count += 1
+        return False
+
+    def commit(self, box_data, zone_ids=None):
+        """记录一次实际推理：当前帧成为新的参考帧"""
+        if self._pending is not None:
+            self.reference, self.reference_time = self._pending
+            self._pending = None
+        self.last_box_data = box_data
+        self.last_zone_ids = zone_ids
+
+    def reset(self):
+        """清空参考帧"""
+        self.reference = None
+        self.last_box_data = None
+        self.last_zone_ids = None
+        self._pending = None
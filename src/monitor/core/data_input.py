@@ -2,15 +2,33 @@ import cv2
 import threading
 import queue
 import time
-from PyQt5.QtCore import QObject, pyqtSignal
+import glob
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from core.qt_compat import QObject, pyqtSignal
+from core.profiler import profiler
 import os
 
+# OpenCV 的 FFmpeg 后端只能通过进程级环境变量接收打开参数，各网络流在打开期间持有该锁并在打开后恢复原值
+_ffmpeg_options_lock = threading.Lock()
+
+
+def default_process_fps(config):
+    """摄像头/视频默认每秒送入推理的帧数：启用检测+跟踪时使用 tracking.process_fps（检测只在其中的关键帧上运行）"""
+    tracking_config = config.get('tracking') or {}
+    if tracking_config.get('enabled', False):
+        return tracking_config.get('process_fps', 25)
+    return config['ui'].get('process_fps', 5)
+
 
 class DataInput(QObject):
     """数据输入基类"""
+    input_type = "未知"  # 存储记录中的输入源类型
     frame_ready = pyqtSignal(object, object)  # 原始帧, 处理后帧
     finished = pyqtSignal()
     error_occurred = pyqtSignal(str)
+    status_changed = pyqtSignal(str)  # 不中断输入的状态信息（如网络流断开重连）
 
     def __init__(self, config):
         super().__init__()
@@ -24,6 +42,19 @@ class DataInput(QObject):
         self.frame_time = 1.0 / self.max_fps if self.max_fps > 0 else 0
         # 添加最新帧缓存，避免处理积压的帧
         self.latest_frame = None
+        # 多路输入时的流标识
+        self.stream_id = None
+        # 已采集的帧数
+        self.captured_count = 0
+        # 帧队列中未被取走就被新帧覆盖的帧数
+        self.dropped_count = 0
+        # 最近一次放入帧队列的时间（perf_counter_ns），用于统计排队时间
+        self.last_put_ns = 0
+        # 快速模式：不按时间节奏投递，帧队列满时等待消费方取走而不是覆盖旧帧
+        # （仅用于通过 get_latest_frame 取帧的场景，如无界面多路模式）
+        self.fast_mode = False
+        # 暂停/停止状态变化时唤醒输入线程
+        self.state_changed = threading.Condition()
 
     def start(self):
         """开始数据输入"""
@@ -36,29 +67,91 @@ class DataInput(QObject):
 
     def pause(self):
         """暂停数据输入"""
-        self.paused = not self.paused
+        with self.state_changed:
+            self.paused = not self.paused
+            self.state_changed.notify_all()
 
     def stop(self):
         """停止数据输入"""
-        self.running = False
+        with self.state_changed:
+            self.running = False
+            self.state_changed.notify_all()
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=2.0)  # 设置超时避免无限等待
 
+    def set_process_fps(self, process_fps):
+        """设置处理帧率"""
+        self.process_fps = process_fps
+        self.process_frame_time = 1.0 / self.process_fps if self.process_fps > 0 else 0
+
+    def set_stream_id(self, stream_id):
+        """设置流标识"""
+        self.stream_id = stream_id
+
+    def get_latest_frame(self):
+        """非阻塞获取最新帧，没有新帧时返回 None"""
+        try:
+            return self.frame_queue.get_nowait()
+        except queue.Empty:
+            return None
+
     def _run(self):
         """运行数据输入线程"""
         pass
 
+    def get_input_stats(self):
+        """输入源特有的统计信息"""
+        return {}
+
+    def _wait_while_paused(self):
+        """暂停期间阻塞等待（不占用CPU），返回是否仍在运行"""
+        with self.state_changed:
+            while self.paused and self.running:
+                self.state_changed.wait()
+            return self.running
+
+    def _wait_until(self, due):
+        """等待到 perf_counter 时刻 due，暂停或停止时立即返回"""
+        with self.state_changed:
+            while self.running and not self.paused:
+                delay = due - time.perf_counter()
+                if delay <= 0:
+                    break
+                self.state_changed.wait(delay)
+
+    def _preprocess_frame(self, frame):
+        """预处理帧
+        
+        缩放统一由推理端的 letterbox 预处理完成（只缩放一次，保持宽高比），
+        这里直接返回原始帧，不做额外缩放和拷贝
+        """
+        return frame
+
     def _put_frame(self, original_frame, processed_frame):
         """将帧放入队列"""
         try:
             if not self.paused and self.running:
+                if self.fast_mode:
+                    # 快速模式下不丢帧，等待消费方取走
+                    while self.running:
+                        try:
+                            self.last_put_ns = time.perf_counter_ns()
+                            self.frame_queue.put((original_frame, processed_frame), timeout=0.1)
+                            self.frame_ready.emit(original_frame, processed_frame)
+                            return
+                        except queue.Full:
+                            continue
+                    return
+
                 # 直接替换队列中的帧，确保处理的是最新帧
                 while not self.frame_queue.empty():
                     try:
                         self.frame_queue.get_nowait()
+                        self.dropped_count += 1
                     except queue.Empty:
                         break
                         
+                self.last_put_ns = time.perf_counter_ns()
                 self.frame_queue.put((original_frame, processed_frame))
                 self.frame_ready.emit(original_frame, processed_frame)
         except Exception as e:
@@ -67,6 +160,7 @@ class DataInput(QObject):
 
 class ImageInput(DataInput):
     """图片输入类"""
+    input_type = "图片"
 
     def __init__(self, config):
         super().__init__(config)
@@ -84,10 +178,13 @@ class ImageInput(DataInput):
                 return
 
             # 读取图片
+            start_ns = time.perf_counter_ns()
             frame = cv2.imread(self.image_path)
+            profiler.record('capture', time.perf_counter_ns() - start_ns)
             if frame is None:
                 self.error_occurred.emit("无法读取图片文件")
                 return
+            self.captured_count += 1
 
             # 预处理
             processed_frame = self._preprocess_frame(frame)
@@ -102,24 +199,130 @@ class ImageInput(DataInput):
         except Exception as e:
             self.error_occurred.emit(f"图片输入错误: {str(e)}")
 
-    def _preprocess_frame(self, frame):
-        """预处理帧"""
-        # 调整尺寸
-        input_size = self.config['model']['input_size']
-        processed = cv2.resize(frame, (input_size[0], input_size[1]))
-        return processed
+
+class ImageFolderInput(ImageInput):
+    """图片目录输入类：目录、通配符或单个图片，由线程池预读取并解码，按顺序投递"""
+
+    IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+    def __init__(self, config):
+        super().__init__(config)
+        folder_config = config['ui'].get('image_folder') or {}
+        # 解码线程数（cv2.imread 解码时释放 GIL，可并行）
+        self.decode_workers = folder_config.get('decode_workers', 4)
+        # 预读取的图片数量上限
+        self.prefetch = max(1, folder_config.get('prefetch', 32))
+        # 非快速模式下每秒投递的图片数
+        self.set_process_fps(config['ui'].get('process_fps', 5))
+        # 跳过的图片（绝对路径，用于断点续跑）
+        self.skip_paths = set()
+        # 统计信息
+        self.total_count = 0
+        self.failed_count = 0
+
+    def set_skip_paths(self, paths):
+        """设置需要跳过的图片路径"""
+        self.skip_paths = {os.path.abspath(path) for path in paths}
+
+    def set_fast_mode(self, enabled):
+        """设置快速模式（不按处理帧率节奏，尽快投递）"""
+        self.fast_mode = enabled
+
+    def list_images(self):
+        """展开目录（递归）或通配符，返回排序后且不在跳过列表中的图片绝对路径"""
+        path = self.image_path
+        if not path:
+            return []
+        if os.path.isdir(path):
+            paths = [os.path.join(root, name)
+                     for root, _, names in os.walk(path)
+                     for name in names if name.lower().endswith(self.IMAGE_EXTENSIONS)]
+        elif any(c in path for c in '*?['):
+            paths = [p for p in glob.glob(path, recursive=True)
+                     if os.path.isfile(p) and p.lower().endswith(self.IMAGE_EXTENSIONS)]
+        else:
+            paths = [path] if os.path.isfile(path) else []
+        paths = sorted({os.path.abspath(p) for p in paths} - self.skip_paths)
+        self.total_count = len(paths)
+        return paths
+
+    def _read_image(self, path):
+        """在解码线程中读取一张图片"""
+        start_ns = time.perf_counter_ns()
+        frame = cv2.imread(path)
+        profiler.record('capture', time.perf_counter_ns() - start_ns)
+        return frame
+
+    def iter_images(self, paths=None):
+        """按顺序生成 (路径, 图片)，无法读取的图片为 None；最多预读取 prefetch 张"""
+        if paths is None:
+            paths = self.list_images()
+        pending = collections.deque()
+        path_iter = iter(paths)
+        with ThreadPoolExecutor(max_workers=max(1, self.decode_workers)) as executor:
+            for path in itertools.islice(path_iter, self.prefetch):
+                pending.append((path, executor.submit(self._read_image, path)))
+            try:
+                while pending:
+                    path, future = pending.popleft()
+                    # 取走一张即补充一张，保持预读取数量
+                    for next_path in itertools.islice(path_iter, 1):
+                        pending.append((next_path, executor.submit(self._read_image, next_path)))
+                    frame = future.result()
+                    if frame is None:
+                        self.failed_count += 1
+                    else:
+                        self.captured_count += 1
+                    yield path, frame
+            finally:
+                # 提前结束时取消尚未开始的读取
+                for _, future in pending:
+                    future.cancel()
+
+    def _run(self):
+        """运行图片目录输入"""
+        try:
+            paths = self.list_images()
+            if not paths:
+                self.error_occurred.emit("未找到图片文件")
+                return
+
+            last_put = 0.0
+            images = self.iter_images(paths)
+            try:
+                for path, frame in images:
+                    if not self._wait_while_paused():
+                        break
+                    if frame is None:
+                        # 单张图片损坏不中断整个目录
+                        print(f"无法读取图片文件: {path}")
+                        continue
+
+                    if not self.fast_mode and self.process_frame_time > 0:
+                        # 按处理帧率投递
+                        self._wait_until(last_put + self.process_frame_time)
+                        last_put = time.perf_counter()
+
+                    self._put_frame(frame, self._preprocess_frame(frame))
+            finally:
+                images.close()
+        except Exception as e:
+            self.error_occurred.emit(f"图片目录输入错误: {str(e)}")
+        finally:
+            self.running = False
+            self.finished.emit()
 
 
 class CameraInput(DataInput):
     """摄像头输入类"""
+    input_type = "摄像头"
 
     def __init__(self, config):
         super().__init__(config)
         self.camera_id = 0
         self.cap = None
         # 设置目标处理帧率（每秒处理的帧数）
-        self.process_fps = 5  # 每秒处理5帧，可根据需要调整
-        self.process_frame_time = 1.0 / self.process_fps
+        self.set_process_fps(default_process_fps(config))
 
     def set_camera_id(self, camera_id):
         """设置摄像头ID"""
@@ -142,35 +345,32 @@ class CameraInput(DataInput):
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             
-            last_process_time = time.time()
-            last_frame_time = time.time()
-            
-            while self.running:
-                if not self.paused:
-                    current_time = time.time()
-                    # 控制显示帧率（最多30fps）
-                    if (current_time - last_frame_time) >= (1.0 / 30):
-                        ret, frame = self.cap.read()
-                        if not ret:
-                            self.error_occurred.emit("无法读取摄像头帧")
-                            break
-
-                        # 预处理
-                        processed_frame = self._preprocess_frame(frame)
-                        
-                        # 控制处理帧率（每秒处理指定数量的帧）
-                        if (current_time - last_process_time) >= self.process_frame_time:
-                            # 发送帧进行处理
-                            self._put_frame(frame.copy(), processed_frame)
-                            last_process_time = current_time
-                        
-                        last_frame_time = current_time
+            last_process_time = 0.0
 
-                    # 短暂休眠以减少CPU使用
-                    time.sleep(0.005)  # 5ms休眠
-                else:
-                    # 暂停时短暂休眠以减少CPU使用
-                    time.sleep(0.01)
+            while self.running:
+                if self.paused and not self._wait_while_paused():
+                    break
+
+                # 阻塞等待设备的下一帧，只抓取不解码
+                read_start_ns = time.perf_counter_ns()
+                if not self.cap.grab():
+                    self.error_occurred.emit("无法读取摄像头帧")
+                    break
+                self.captured_count += 1
+
+                # 控制处理帧率（每秒处理指定数量的帧），未选中的帧不解码、不预处理
+                current_time = time.perf_counter()
+                if (current_time - last_process_time) < self.process_frame_time:
+                    continue
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    self.error_occurred.emit("无法读取摄像头帧")
+                    break
+                profiler.record('capture', time.perf_counter_ns() - read_start_ns)
+                last_process_time = current_time
+
+                # 预处理并发送帧进行处理
+                self._put_frame(frame, self._preprocess_frame(frame))
 
         except Exception as e:
             self.error_occurred.emit(f"摄像头输入错误: {str(e)}")
@@ -179,88 +379,365 @@ class CameraInput(DataInput):
                 self.cap.release()
             self.finished.emit()
 
-    def _preprocess_frame(self, frame):
-        """预处理帧"""
-        # 调整尺寸
-        input_size = self.config['model']['input_size']
-        processed = cv2.resize(frame, (input_size[0], input_size[1]))
-        return processed
+
+
+class NetworkStreamInput(DataInput):
+    """网络摄像头输入类（RTSP/HTTP 等）
+
+    使用低延迟的 FFmpeg 参数打开，读取线程按码流速率持续 grab() 将缓冲区取空，只对按处理帧率选中的最新帧解码；
+    长时间无新帧、时间戳停滞或延迟超过上限时判定为卡顿，按指数退避重新连接
+    """
+    input_type = "网络摄像头"
+
+    URL_PREFIXES = ('rtsp://', 'rtsps://', 'rtmp://', 'http://', 'https://')
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.url = None
+        self.cap = None
+        # 设置目标处理帧率（每秒处理的帧数）
+        self.set_process_fps(default_process_fps(config))
+        stream_config = config['ui'].get('network_stream') or {}
+        # RTSP 传输协议（tcp 不丢包，udp 延迟更低）
+        self.transport = stream_config.get('transport', 'tcp')
+        # 连接和读取超时（毫秒）
+        self.open_timeout_ms = stream_config.get('open_timeout_ms', 5000)
+        self.read_timeout_ms = stream_config.get('read_timeout_ms', 5000)
+        # 超过该时间（秒）没有新帧或时间戳不前进视为卡顿
+        self.stall_timeout = stream_config.get('stall_timeout', 5.0)
+        # 画面落后实时超过该时间（秒）时重连，丢弃积压
+        self.max_lag = stream_config.get('max_lag', 2.0)
+        # 重连退避时间（秒）
+        self.reconnect_initial = stream_config.get('reconnect_initial', 1.0)
+        self.reconnect_max = stream_config.get('reconnect_max', 30.0)
+        # 统计信息
+        self.connected = False
+        self.reconnect_count = 0
+        self.stall_count = 0
+        self.lost_count = 0
+        self.lag = 0.0
+
+    @classmethod
+    def is_stream_url(cls, source):
+        """是否为网络流地址"""
+        return isinstance(source, str) and source.lower().startswith(cls.URL_PREFIXES)
+
+    def set_url(self, url):
+        """设置网络流地址"""
+        self.url = url
+
+    def get_input_stats(self):
+        """网络流统计：连接状态、落后实时的延迟、重连/卡顿次数和按时间戳估算的丢失帧数"""
+        return {
+            'connected': self.connected,
+            'lag': self.lag,
+            'reconnects': self.reconnect_count,
+            'stalls': self.stall_count,
+            'lost': self.lost_count,
+        }
+
+    def _open_capture(self):
+        """以低延迟参数打开网络流"""
+        params = []
+        if hasattr(cv2, 'CAP_PROP_OPEN_TIMEOUT_MSEC'):
+            params += [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, self.open_timeout_ms,
+                       cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.read_timeout_ms]
+
+        # VideoCapture 参数不支持 FFmpeg 选项，只能通过环境变量传入：打开期间临时设置本路的传输协议和低延迟选项，
+        # 打开后立即恢复，不影响其他网络流和视频文件的解码
+        options = f"rtsp_transport;{self.transport}|fflags;nobuffer|flags;low_delay|max_delay;500000"
+        with _ffmpeg_options_lock:
+            previous = os.environ.get('OPENCV_FFMPEG_CAPTURE_OPTIONS')
+            os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = options
+            try:
+                # 带参数的构造函数需要 OpenCV 4.5.2 以上，没有超时参数时使用普通构造函数
+                cap = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG, params) if params \
+                    else cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+            finally:
+                if previous is None:
+                    del os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS']
+                else:
+                    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = previous
+        if cap.isOpened():
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _release_capture(self):
+        self.connected = False
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _backoff(self, attempt):
+        """重连前等待（指数退避），停止时立即返回"""
+        delay = min(self.reconnect_initial * (2 ** attempt), self.reconnect_max)
+        with self.state_changed:
+            self.state_changed.wait_for(lambda: not self.running, timeout=delay)
+
+    def _read_stream(self):
+        """读取一次连接内的帧，直到卡顿、断开或停止；返回是否收到过帧"""
+        frame_interval = 0.0
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if 0 < fps < 1000:
+            frame_interval = 1000.0 / fps
+
+        received = False
+        last_process_time = 0.0
+        last_progress = time.perf_counter()
+        last_pos = None
+        base_time = None
+        base_pos = 0.0
+
+        while self.running:
+            if self.paused:
+                if not self._wait_while_paused():
+                    break
+                # 暂停的时间不计入延迟和卡顿判断
+                last_progress = time.perf_counter()
+                last_pos = None
+
+            read_start_ns = time.perf_counter_ns()
+            if not self.cap.grab():
+                self.stall_count += 1
+                self.status_changed.emit(f"网络流读取失败: {self.url}")
+                return received
+            now = time.perf_counter()
+            self.captured_count += 1
+            received = True
+
+            # 按码流时间戳估算延迟和丢失帧数（时间戳不可用时跳过）
+            pos = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+            if pos > 0:
+                if last_pos is None:
+                    base_time, base_pos = now, pos
+                elif pos > last_pos:
+                    if frame_interval and pos - last_pos > 1.5 * frame_interval:
+                        self.lost_count += int(round((pos - last_pos) / frame_interval)) - 1
+                    last_progress = now
+                    self.lag = max(0.0, (now - base_time) - (pos - base_pos) / 1000.0)
+                last_pos = pos
+            else:
+                last_progress = now
+
+            if now - last_progress > self.stall_timeout:
+                self.stall_count += 1
+                self.status_changed.emit(f"网络流时间戳停滞 {self.stall_timeout:.0f} 秒，重新连接: {self.url}")
+                return received
+            if self.lag > self.max_lag:
+                self.stall_count += 1
+                self.status_changed.emit(f"网络流延迟 {self.lag:.1f} 秒超过上限，重新连接: {self.url}")
+                return received
+
+            # 控制处理帧率，未选中的帧不解码
+            if (now - last_process_time) < self.process_frame_time:
+                continue
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                continue
+            profiler.record('capture', time.perf_counter_ns() - read_start_ns)
+            last_process_time = now
+            self._put_frame(frame, self._preprocess_frame(frame))
+
+        return received
+
+    def _run(self):
+        """运行网络流输入：断开或卡顿后按退避时间自动重连"""
+        attempt = 0
+        try:
+            if not self.url:
+                self.error_occurred.emit("未设置网络流地址")
+                return
+
+            while self.running:
+                self.cap = self._open_capture()
+                if self.cap.isOpened():
+                    self.connected = True
+                    self.lag = 0.0
+                    self.status_changed.emit(f"网络流已连接: {self.url}")
+                    if self._read_stream():
+                        attempt = 0
+                else:
+                    self.status_changed.emit(f"无法连接网络流: {self.url}")
+                self._release_capture()
+
+                if not self.running:
+                    break
+                self._backoff(attempt)
+                attempt += 1
+                self.reconnect_count += 1
+        except Exception as e:
+            self.error_occurred.emit(f"网络流输入错误: {str(e)}")
+        finally:
+            self._release_capture()
+            self.running = False
+            self.finished.emit()
 
 
 class VideoInput(DataInput):
-    """视频输入类"""
+    """视频输入类
+
+    解码在独立线程中进行：只对需要处理的帧执行完整解码，跳过的帧仅 grab()，抽帧间隔很大时直接定位跳转；
+    解码结果放入小容量环形缓冲区，由输入线程按视频时间轴节奏投递（快速模式下不按时间节奏，尽快处理）
+    """
+    input_type = "视频"
 
     def __init__(self, config):
         super().__init__(config)
         self.video_path = None
         self.cap = None
         # 设置目标处理帧率（每秒处理的帧数）
-        self.process_fps = 5  # 每秒处理5帧，可根据需要调整
-        self.process_frame_time = 1.0 / self.process_fps
+        self.set_process_fps(default_process_fps(config))
+        video_config = config['ui'].get('video') or {}
+        # 尝试使用硬件解码
+        self.hw_accel = video_config.get('hw_accel', True)
+        # 解码环形缓冲区容量（帧）
+        self.ring_size = video_config.get('ring_size', 4)
+        # 抽帧间隔超过该帧数时改为定位跳转
+        self.seek_threshold = video_config.get('seek_threshold', 60)
+        # 统计信息
+        self.skipped_count = 0
+        self.source_fps = 0.0
 
     def set_video_path(self, path):
         """设置视频路径"""
         self.video_path = path
 
+    def set_fast_mode(self, enabled):
+        """设置快速模式（离线回看录像时尽快处理，不按视频时间节奏）"""
+        self.fast_mode = enabled
+
+    def _open_capture(self):
+        """打开视频，优先使用硬件解码，不支持时回退到软件解码"""
+        if self.hw_accel and hasattr(cv2, 'CAP_PROP_HW_ACCELERATION'):
+            cap = cv2.VideoCapture(self.video_path, cv2.CAP_FFMPEG,
+                                   [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+            if cap.isOpened():
+                return cap
+            cap.release()
+        return cv2.VideoCapture(self.video_path)
+
+    def _frame_stride(self):
+        """按源帧率和处理帧率计算抽帧间隔（处理帧率按视频时间计，快速模式下同样抽帧）"""
+        if self.process_fps <= 0 or self.source_fps <= self.process_fps:
+            return 1
+        return max(1, int(round(self.source_fps / self.process_fps)))
+
+    def _ring_put(self, ring, item):
+        """放入环形缓冲区，满时等待（输入停止时放弃）"""
+        while self.running:
+            try:
+                ring.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self, ring, stride):
+        """解码线程：按抽帧间隔解码，跳过的帧只 grab() 或直接定位跳转"""
+        frame_index = 0
+        try:
+            while self.running:
+                read_start_ns = time.perf_counter_ns()
+                ret, frame = self.cap.read()
+                if not ret:
+                    # 视频结束
+                    break
+                profiler.record('capture', time.perf_counter_ns() - read_start_ns)
+                self.captured_count += 1
+
+                if not self._ring_put(ring, (frame_index, frame)):
+                    break
+
+                # 跳过不需要处理的帧
+                if stride > 1:
+                    if stride > self.seek_threshold:
+                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index + stride)
+                    else:
+                        for _ in range(stride - 1):
+                            if not self.cap.grab():
+                                break
+                    self.skipped_count += stride - 1
+                frame_index += stride
+        except Exception as e:
+            self.error_occurred.emit(f"视频解码错误: {str(e)}")
+        finally:
+            # 结束标记
+            self._ring_put(ring, None)
+
     def _run(self):
         """运行视频输入"""
+        decoder = None
         try:
             if not self.video_path or not os.path.exists(self.video_path):
                 self.error_occurred.emit("视频文件不存在")
                 return
 
             # 打开视频
-            self.cap = cv2.VideoCapture(self.video_path)
+            self.cap = self._open_capture()
             if not self.cap.isOpened():
                 self.error_occurred.emit("无法打开视频文件")
                 return
 
             # 获取视频帧率
-            fps = self.cap.get(cv2.CAP_PROP_FPS)
-            if fps <= 0:
-                fps = self.config['ui']['fps']
-            display_delay = 1.0 / min(fps, 30)  # 最大显示帧率30fps
+            self.source_fps = self.cap.get(cv2.CAP_PROP_FPS)
+            if self.source_fps <= 0:
+                self.source_fps = self.config['ui']['fps']
+            self.skipped_count = 0
+
+            ring = queue.Queue(maxsize=self.ring_size)
+            decoder = threading.Thread(target=self._decode_loop, args=(ring, self._frame_stride()))
+            decoder.daemon = True
+            decoder.start()
+
+            # 播放起点（视频时间轴与实际时间的对应关系）
+            start_time = None
+            first_index = 0
+            # 已解码但尚未投递的帧（等待节奏时被暂停，恢复后继续投递）
+            pending = None
 
-            last_process_time = time.time()
-            last_frame_time = time.time()
-            
             while self.running:
-                if not self.paused:
-                    current_time = time.time()
-                    # 控制显示帧率
-                    if (current_time - last_frame_time) >= display_delay:
-                        ret, frame = self.cap.read()
-                        if not ret:
-                            # 视频结束
-                            break
-
-                        # 预处理
-                        processed_frame = self._preprocess_frame(frame)
-                        
-                        # 控制处理帧率（每秒处理指定数量的帧）
-                        if (current_time - last_process_time) >= self.process_frame_time:
-                            # 发送帧进行处理
-                            self._put_frame(frame.copy(), processed_frame)
-                            last_process_time = current_time
-                        
-                        last_frame_time = current_time
+                if self.paused:
+                    pause_start = time.perf_counter()
+                    if not self._wait_while_paused():
+                        break
+                    # 暂停的时间不计入播放进度
+                    if start_time is not None:
+                        start_time += time.perf_counter() - pause_start
 
-                    # 短暂休眠以减少CPU使用
-                    time.sleep(0.005)  # 5ms休眠
-                else:
-                    # 暂停时短暂休眠以减少CPU使用
-                    time.sleep(0.01)
+                if pending is None:
+                    try:
+                        pending = ring.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if pending is None:
+                        # 视频结束
+                        break
+
+                frame_index, frame = pending
+                if not self.fast_mode:
+                    # 按视频时间轴节奏投递
+                    if start_time is None:
+                        start_time = time.perf_counter()
+                        first_index = frame_index
+                    due = start_time + (frame_index - first_index) / self.source_fps
+                    self._wait_until(due)
+                if self.paused:
+                    # 等待期间被暂停：保留该帧，恢复后按顺延的时间轴投递
+                    continue
+                pending = None
+
+                # 预处理
+                processed_frame = self._preprocess_frame(frame)
+
+                # 发送帧进行处理
+                self._put_frame(frame, processed_frame)
 
         except Exception as e:
             self.error_occurred.emit(f"视频输入错误: {str(e)}")
         finally:
+            self.running = False
+            if decoder and decoder.is_alive():
+                decoder.join(timeout=2.0)
             if self.cap:
                 self.cap.release()
             self.finished.emit()
-
-    def _preprocess_frame(self, frame):
-        """预处理帧"""
-        # 调整尺寸
-        input_size = self.config['model']['input_size']
-        processed = cv2.resize(frame, (input_size[0], input_size[1]))
-        return processed
\ No newline at end of file
@@ -1,22 +1,67 @@
 import sqlite3
 import threading
+import queue
 import os
 import time
 from datetime import datetime, timedelta
-from PyQt5.QtCore import QObject, pyqtSignal
+from core.qt_compat import QObject, pyqtSignal
+from core.profiler import profiler
+
+# 统计汇总的时间粒度（秒）
+ROLLUP_GRANULARITIES = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class StorageTask:
+    """在写入线程中执行的任务（如清理记录、刷新屏障）"""
+
+    def __init__(self, fn=None):
+        self.fn = fn
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def run(self, conn):
+        try:
+            if self.fn is not None:
+                self.result = self.fn(conn)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
 
 
 class SqliteStorage(QObject):
-    """SQLite数据存储类"""
+    """SQLite数据存储类
+
+    写入采用 write-behind 方式：插入接口只把记录放入内存队列，由后台写入线程持有一个 WAL 模式的
+    持久连接，按条数或时间阈值批量提交事务；队列满时写入方阻塞等待（背压），关闭时刷新全部积压记录。
+    """
     error_occurred = pyqtSignal(str)
-    
+
     def __init__(self, config):
         super().__init__()
         self.config = config
-        self.db_path = config['database']['path']
+        db_config = config['database']
+        self.db_path = db_config['path']
+        # 批量写入参数
+        self.batch_size = db_config.get('batch_size', 200)
+        self.flush_interval = db_config.get('flush_interval', 1.0)
+        self.put_timeout = db_config.get('put_timeout', 0.5)
+        self.pending = queue.Queue(maxsize=db_config.get('max_pending', 10000))
         self.lock = threading.Lock()
+        self.conn = None
+        self.read_conn = None
+        self.writer_thread = None
+        self.closed = False
+        # 统计信息
+        self.written_count = 0
+        self.dropped_count = 0
+        self.flush_count = 0
+        self.last_flush_latency = 0.0
+        # 本地时区偏移（秒），汇总桶按本地时间的整分/整点/零点对齐
+        self.utc_offset = int(datetime.now().astimezone().utcoffset().total_seconds())
         self.init_db()
-        
+
     def init_db(self):
         """初始化数据库"""
         try:
@@ -24,210 +69,651 @@ class SqliteStorage(QObject):
             db_dir = os.path.dirname(self.db_path)
             if db_dir and not os.path.exists(db_dir):
                 os.makedirs(db_dir)
-                
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # 创建识别记录表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS recognition_records (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        input_type TEXT NOT NULL,
-                        target_type TEXT NOT NULL,
-                        confidence REAL NOT NULL,
-                        risk_level TEXT NOT NULL,
-                        image_path TEXT
-                    )
-                ''')
-                
-                # 创建告警日志表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS alarm_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        risk_level TEXT NOT NULL,
-                        target_info TEXT NOT NULL,
-                        handle_status TEXT DEFAULT '未处理'
-                    )
-                ''')
-                
-                conn.commit()
-                conn.close()
-                print("数据库初始化成功")
-                
+
+            # 写入连接只在写入线程中使用
+            self.conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            cursor = self.conn.cursor()
+
+            # 创建识别记录表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS recognition_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    input_type TEXT NOT NULL,
+                    target_type TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    risk_level TEXT NOT NULL,
+                    image_path TEXT
+                )
+            ''')
+
+            # 创建告警日志表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS alarm_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    risk_level TEXT NOT NULL,
+                    target_info TEXT NOT NULL,
+                    handle_status TEXT DEFAULT '未处理'
+                )
+            ''')
+
+            self.conn.commit()
+
+            # 升级旧版本数据库结构
+            self._migrate()
+
+            # 查询使用独立的只读连接（WAL 模式下读写互不阻塞）
+            self.read_conn = sqlite3.connect(self.db_path, timeout=10.0, check_same_thread=False)
+
+            self.writer_thread = threading.Thread(target=self._writer_loop)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+            print("数据库初始化成功")
+
         except Exception as e:
             self.error_occurred.emit(f"数据库初始化失败: {str(e)}")
-    
-    def insert_recognition_record(self, input_type, detections, image_path=None):
-        """插入识别记录"""
+
+    def _migrate(self):
+        """按 PRAGMA user_version 记录的结构版本依次执行升级"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        migrations = [self._migrate_v1, self._migrate_v2, self._migrate_v3, self._migrate_v4,
+                      self._migrate_v5, self._migrate_v6, self._migrate_v7]
+        for target_version, migration in enumerate(migrations, start=1):
+            if version >= target_version:
+                continue
+            print(f"升级数据库结构到版本 {target_version}...")
+            with self.conn:
+                migration(self.conn)
+                self.conn.execute(f'PRAGMA user_version = {target_version}')
+            version = target_version
+
+    @staticmethod
+    def _column_names(conn, table):
+        """获取表的列名"""
+        return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+    def _migrate_v1(self, conn):
+        """版本1：增加整数时间戳 ts（秒）、输入源标识 source，并建立索引"""
+        if 'ts' not in self._column_names(conn, 'recognition_records'):
+            conn.execute('ALTER TABLE recognition_records ADD COLUMN ts INTEGER NOT NULL DEFAULT 0')
+            conn.execute('ALTER TABLE recognition_records ADD COLUMN source TEXT')
+            # 旧记录的文本时间为本地时间，转换为 UTC 秒
+            conn.execute('''
+                UPDATE recognition_records
+                SET ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+            ''')
+        if 'ts' not in self._column_names(conn, 'alarm_logs'):
+            conn.execute('ALTER TABLE alarm_logs ADD COLUMN ts INTEGER NOT NULL DEFAULT 0')
+            conn.execute('''
+                UPDATE alarm_logs
+                SET ts = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+            ''')
+
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_records_ts ON recognition_records (ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_records_risk_ts ON recognition_records (risk_level, ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_records_target_ts ON recognition_records (target_type, ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_records_source_ts ON recognition_records (source, ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_alarms_ts ON alarm_logs (ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_alarms_risk_ts ON alarm_logs (risk_level, ts)')
+
+    def _migrate_v2(self, conn):
+        """版本2：增加按分钟/小时/天汇总的检测统计表，并由已有识别记录回填"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS detection_rollups (
+                granularity INTEGER NOT NULL,
+                bucket_ts INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                target_type TEXT NOT NULL,
+                risk_level TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                max_confidence REAL NOT NULL,
+                PRIMARY KEY (granularity, bucket_ts, source, target_type, risk_level)
+            ) WITHOUT ROWID
+        ''')
+        for granularity in ROLLUP_GRANULARITIES.values():
+            conn.execute('''
+                INSERT OR REPLACE INTO detection_rollups
+                (granularity, bucket_ts, source, target_type, risk_level, count, max_confidence)
+                SELECT ?, ((ts + ?) / ?) * ? - ?, COALESCE(source, input_type), target_type, risk_level,
+                       COUNT(*), MAX(confidence)
+                FROM recognition_records
+                GROUP BY 2, 3, 4, 5
+            ''', (granularity, self.utc_offset, granularity, granularity, self.utc_offset))
+
+    def _migrate_v3(self, conn):
+        """版本3：增加离线批量分析的分段完成记录，用于中断后续跑"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS batch_segments (
+                video_path TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                file_mtime INTEGER NOT NULL,
+                start_frame INTEGER NOT NULL,
+                end_frame INTEGER NOT NULL,
+                frames INTEGER NOT NULL,
+                detections INTEGER NOT NULL,
+                elapsed REAL NOT NULL,
+                finished_ts INTEGER NOT NULL,
+                PRIMARY KEY (video_path, file_size, file_mtime, start_frame, end_frame)
+            ) WITHOUT ROWID
+        ''')
+
+    def _migrate_v4(self, conn):
+        """版本4：识别记录增加跟踪ID track_id（未启用跟踪时为空）"""
+        if 'track_id' not in self._column_names(conn, 'recognition_records'):
+            conn.execute('ALTER TABLE recognition_records ADD COLUMN track_id INTEGER')
+
+    def _migrate_v5(self, conn):
+        """版本5：增加告警事件表，ts 为事件开始时间，event_uid 用于更新进行中的事件"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS alert_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_uid TEXT NOT NULL UNIQUE,
+                ts INTEGER NOT NULL,
+                source TEXT,
+                target_type TEXT NOT NULL,
+                risk_level TEXT NOT NULL,
+                track_id INTEGER,
+                last_ts INTEGER NOT NULL,
+                end_ts INTEGER,
+                duration REAL NOT NULL,
+                frame_count INTEGER NOT NULL,
+                max_targets INTEGER NOT NULL,
+                max_confidence REAL NOT NULL,
+                status TEXT NOT NULL,
+                summary TEXT,
+                handle_status TEXT NOT NULL DEFAULT '未处理'
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_alert_events_ts ON alert_events (ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_alert_events_risk_ts ON alert_events (risk_level, ts)')
+
+    def _migrate_v6(self, conn):
+        """版本6：告警事件增加所在区域 zone_id（未配置区域时为空）"""
+        if 'zone_id' not in self._column_names(conn, 'alert_events'):
+            conn.execute('ALTER TABLE alert_events ADD COLUMN zone_id TEXT')
+
+    def _migrate_v7(self, conn):
+        """版本7：为已升级过版本1的数据库补建 (source, ts) 索引（新数据库在版本1中已建立）"""
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_records_source_ts ON recognition_records (source, ts)')
+
+    def _bucket_start(self, ts, granularity):
+        """计算时间戳所在汇总桶的起始时间"""
+        return (ts + self.utc_offset) // granularity * granularity - self.utc_offset
+
+    def _aggregate_rollups(self, records):
+        """将一批识别记录在内存中按桶聚合，返回汇总表的 upsert 参数"""
+        buckets = {}
+        for _, ts, input_type, source, target_type, confidence, risk_level, _, _ in records:
+            source_key = source or input_type
+            for granularity in ROLLUP_GRANULARITIES.values():
+                key = (granularity, self._bucket_start(ts, granularity), source_key, target_type, risk_level)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [1, confidence]
+                else:
+                    bucket[0] += 1
+                    if confidence > bucket[1]:
+                        bucket[1] = confidence
+        return [key + (count, max_confidence) for key, (count, max_confidence) in buckets.items()]
+
+    def _enqueue(self, item):
+        """放入写入队列，队列满时最多等待 put_timeout 秒"""
+        if self.closed or self.writer_thread is None:
+            return False
         try:
-            # 确保表存在
-            self._ensure_tables_exist()
-            
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                for detection in detections:
-                    cursor.execute('''
-                        INSERT INTO recognition_records 
-                        (timestamp, input_type, target_type, confidence, risk_level, image_path)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        timestamp,
-                        input_type,
-                        detection['class_name'],
-                        detection['confidence'],
-                        detection['risk_level'],
-                        image_path
-                    ))
-                
-                conn.commit()
-                conn.close()
-                
-        except Exception as e:
-            self.error_occurred.emit(f"插入识别记录失败: {str(e)}")
-    
+            self.pending.put(item, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            self.error_occurred.emit("写入队列已满，丢弃一批记录")
+            return False
+
+    def insert_recognition_record(self, input_type, detections, image_path=None, source=None):
+        """插入识别记录（异步批量写入），detections 为 Detections，source 为输入源标识（如摄像头流ID）"""
+        if not detections:
+            return
+
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        ts = int(now.timestamp())
+        rows = [
+            (timestamp, ts, input_type, source, class_name, confidence, risk_level, image_path, track_id)
+            for class_name, confidence, risk_level, track_id
+            in detections.rows('class_name', 'confidence', 'risk_level', 'track_id')
+        ]
+        self._enqueue(('records', rows))
+
     def insert_alarm_log(self, risk_level, target_info):
-        """插入告警日志"""
+        """插入告警日志（异步批量写入）"""
+        self.insert_alarm_logs([(risk_level, target_info)])
+
+    def insert_alarm_logs(self, entries):
+        """批量插入告警日志，entries 为 (风险等级, 目标信息) 列表，整批一次放入写入队列"""
+        if not entries:
+            return
+
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        ts = int(now.timestamp())
+        self._enqueue(('alarms', [(timestamp, ts, risk_level, target_info, '未处理')
+                                  for risk_level, target_info in entries]))
+
+    def upsert_alert_events(self, rows):
+        """写入或更新告警事件（异步批量写入），rows 为 AlertEvent.to_row() 列表"""
+        if rows:
+            self._enqueue(('events', rows))
+
+    def insert_records(self, records):
+        """离线批量分析：在一个事务中写入识别记录并等待提交，写入失败、写入线程已停止或等待超时时抛出异常
+
+        records 为 (timestamp, ts, input_type, source, target_type, confidence, risk_level, image_path, track_id) 列表
+        """
+        def write(conn):
+            with conn:
+                self._insert_records(conn, records)
+            self.written_count += len(records)
+            return True
+
+        # run_task 在无法放入写入队列或等待超时时返回 None，此时不能确认记录已提交
+        if records and not self.run_task(write):
+            raise RuntimeError("识别记录未能确认写入（写入线程已停止或等待超时）")
+
+    def insert_batch_segment(self, records, segment):
+        """离线批量分析：在一个事务中写入一个视频分段的全部识别记录并标记该分段已完成
+
+        records 为 (timestamp, ts, input_type, source, target_type, confidence, risk_level, image_path, track_id) 列表，
+        segment 包含 video_path、file_size、file_mtime、start_frame、end_frame、frames、elapsed
+        """
+        def write(conn):
+            with conn:
+                if records:
+                    self._insert_records(conn, records)
+                conn.execute('''
+                    INSERT OR REPLACE INTO batch_segments
+                    (video_path, file_size, file_mtime, start_frame, end_frame, frames, detections, elapsed, finished_ts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (segment['video_path'], segment['file_size'], segment['file_mtime'],
+                      segment['start_frame'], segment['end_frame'], segment['frames'],
+                      len(records), segment['elapsed'], int(time.time())))
+            self.written_count += len(records)
+            return True
+
+        # run_task 在无法放入写入队列或等待超时时返回 None，此时分段不能视为已完成
+        if not self.run_task(write):
+            raise RuntimeError("分段记录未能确认写入（写入线程已停止或等待超时）")
+
+    def query_batch_segments(self):
+        """查询已完成的离线分析分段，返回 (video_path, file_size, file_mtime, start_frame, end_frame) 集合"""
         try:
-            # 确保表存在
-            self._ensure_tables_exist()
-            
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO alarm_logs 
-                    (timestamp, risk_level, target_info, handle_status)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    timestamp,
-                    risk_level,
-                    target_info,
-                    '未处理'
-                ))
-                
-                conn.commit()
-                conn.close()
-                
+                rows = self.read_conn.execute('''
+                    SELECT video_path, file_size, file_mtime, start_frame, end_frame FROM batch_segments
+                ''').fetchall()
+            return set(rows)
         except Exception as e:
-            self.error_occurred.emit(f"插入告警日志失败: {str(e)}")
-    
-    def _ensure_tables_exist(self):
-        """确保数据库表存在"""
+            self.error_occurred.emit(f"查询分段记录失败: {str(e)}")
+            return set()
+
+    def run_task(self, fn, timeout=30.0):
+        """在写入线程中执行 fn(conn)（先刷新积压记录），等待并返回结果"""
+        task = StorageTask(fn)
+        if not self._enqueue_blocking(('task', task)):
+            return None
+        if not task.done.wait(timeout):
+            self.error_occurred.emit("数据库任务执行超时")
+            return None
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def flush(self, timeout=30.0):
+        """等待当前积压的记录全部写入"""
+        self.run_task(None, timeout)
+
+    def close(self):
+        """刷新积压记录并关闭数据库连接"""
+        if self.closed:
+            return
+        if self.writer_thread and self.writer_thread.is_alive():
+            self._enqueue_blocking(('stop', None))
+            self.writer_thread.join(timeout=10.0)
+        self.closed = True
+        with self.lock:
+            if self.read_conn:
+                self.read_conn.close()
+                self.read_conn = None
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def _enqueue_blocking(self, item):
+        """放入控制类消息（不受 put_timeout 限制）"""
+        if self.closed or self.writer_thread is None or not self.writer_thread.is_alive():
+            return False
+        self.pending.put(item)
+        return True
+
+    def _writer_loop(self):
+        """写入线程：按条数或时间阈值批量提交"""
+        records = []
+        alarms = []
+        events = []
+        tasks = []
+        last_flush = time.time()
+        stop = False
+
+        while not stop:
+            timeout = max(0.0, self.flush_interval - (time.time() - last_flush))
+            try:
+                kind, payload = self.pending.get(timeout=timeout)
+                if kind == 'records':
+                    records.extend(payload)
+                elif kind == 'alarms':
+                    alarms.extend(payload)
+                elif kind == 'events':
+                    events.extend(payload)
+                elif kind == 'task':
+                    tasks.append(payload)
+                elif kind == 'stop':
+                    stop = True
+            except queue.Empty:
+                pass
+
+            due = (len(records) + len(alarms) + len(events) >= self.batch_size
+                   or time.time() - last_flush >= self.flush_interval
+                   or tasks or stop)
+            if not due:
+                continue
+
+            if records or alarms or events:
+                self._flush(records, alarms, events)
+                records = []
+                alarms = []
+                events = []
+            last_flush = time.time()
+
+            for task in tasks:
+                task.run(self.conn)
+            tasks = []
+
+    def _insert_records(self, conn, records):
+        """写入识别记录，并在同一事务内增量更新汇总表"""
+        conn.executemany('''
+            INSERT INTO recognition_records
+            (timestamp, ts, input_type, source, target_type, confidence, risk_level, image_path, track_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', records)
+        conn.executemany('''
+            INSERT INTO detection_rollups
+            (granularity, bucket_ts, source, target_type, risk_level, count, max_confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (granularity, bucket_ts, source, target_type, risk_level)
+            DO UPDATE SET count = count + excluded.count,
+                          max_confidence = MAX(max_confidence, excluded.max_confidence)
+        ''', self._aggregate_rollups(records))
+
+    def _flush(self, records, alarms, events=()):
+        """在一个事务中写入一批记录"""
+        start_ns = time.perf_counter_ns()
         try:
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # 检查并创建识别记录表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS recognition_records (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        input_type TEXT NOT NULL,
-                        target_type TEXT NOT NULL,
-                        confidence REAL NOT NULL,
-                        risk_level TEXT NOT NULL,
-                        image_path TEXT
-                    )
-                ''')
-                
-                # 检查并创建告警日志表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS alarm_logs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TEXT NOT NULL,
-                        risk_level TEXT NOT NULL,
-                        target_info TEXT NOT NULL,
-                        handle_status TEXT DEFAULT '未处理'
-                    )
-                ''')
-                
-                conn.commit()
-                conn.close()
+            with self.conn:
+                if records:
+                    self._insert_records(self.conn, records)
+                if alarms:
+                    self.conn.executemany('''
+                        INSERT INTO alarm_logs
+                        (timestamp, ts, risk_level, target_info, handle_status)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', alarms)
+                if events:
+                    # 同一事件在一批中的多次更新按顺序执行，最后一次生效
+                    self.conn.executemany('''
+                        INSERT INTO alert_events
+                        (event_uid, ts, source, target_type, risk_level, track_id, last_ts, end_ts, duration,
+                         frame_count, max_targets, max_confidence, status, summary, zone_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (event_uid) DO UPDATE SET
+                            risk_level = excluded.risk_level, last_ts = excluded.last_ts, end_ts = excluded.end_ts,
+                            duration = excluded.duration, frame_count = excluded.frame_count,
+                            max_targets = excluded.max_targets, max_confidence = excluded.max_confidence,
+                            status = excluded.status, summary = excluded.summary
+                    ''', events)
+            self.written_count += len(records) + len(alarms) + len(events)
+            self.flush_count += 1
         except Exception as e:
-            print(f"确保表存在时出错: {str(e)}")
-    
+            self.error_occurred.emit(f"批量写入失败: {str(e)}")
+        finally:
+            duration_ns = time.perf_counter_ns() - start_ns
+            self.last_flush_latency = duration_ns / 1e9
+            profiler.record('storage_write', duration_ns)
+
     def clean_old_records(self):
         """清理过期记录"""
-        try:
-            retention_days = self.config['database'].get('retention_days', 30)
-            cutoff_date = datetime.now() - timedelta(days=retention_days)
-            cutoff_str = cutoff_date.strftime("%Y-%m-%d %H:%M:%S")
-            
-            with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
+        db_config = self.config['database']
+        now = datetime.now()
+        retention_days = db_config.get('retention_days', 30)
+        cutoff_ts = int((now - timedelta(days=retention_days)).timestamp())
+        # 汇总数据可以比原始记录保留更久
+        rollup_retention = db_config.get('rollup_retention_days') or {}
+        rollup_cutoffs = [
+            (granularity, int((now - timedelta(days=rollup_retention.get(name, 365))).timestamp()))
+            for name, granularity in ROLLUP_GRANULARITIES.items()
+        ]
+
+        def clean(conn):
+            with conn:
                 # 删除过期的识别记录
-                cursor.execute('''
-                    DELETE FROM recognition_records WHERE timestamp < ?
-                ''', (cutoff_str,))
+                cursor = conn.execute('''
+                    DELETE FROM recognition_records WHERE ts < ?
+                ''', (cutoff_ts,))
                 records_deleted = cursor.rowcount
-                
+
                 # 删除过期的告警日志
-                cursor.execute('''
-                    DELETE FROM alarm_logs WHERE timestamp < ?
-                ''', (cutoff_str,))
+                cursor = conn.execute('''
+                    DELETE FROM alarm_logs WHERE ts < ?
+                ''', (cutoff_ts,))
                 logs_deleted = cursor.rowcount
-                
-                conn.commit()
-                conn.close()
-                
-                print(f"清理了 {records_deleted} 条识别记录和 {logs_deleted} 条告警日志")
-                
+
+                # 删除过期的告警事件
+                conn.execute('''
+                    DELETE FROM alert_events WHERE ts < ?
+                ''', (cutoff_ts,))
+
+                # 按粒度删除过期的汇总数据
+                for granularity, rollup_cutoff in rollup_cutoffs:
+                    conn.execute('''
+                        DELETE FROM detection_rollups WHERE granularity = ? AND bucket_ts < ?
+                    ''', (granularity, rollup_cutoff))
+            return records_deleted, logs_deleted
+
+        try:
+            result = self.run_task(clean)
+            if result:
+                print(f"清理了 {result[0]} 条识别记录和 {result[1]} 条告警日志")
         except Exception as e:
             self.error_occurred.emit(f"清理过期记录失败: {str(e)}")
-    
+
+    def _query_page(self, table, columns, filters, params, limit, cursor):
+        """按时间倒序的 keyset 分页查询，返回 (字典列表, 下一页 cursor)"""
+        if cursor is not None:
+            # cursor 为上一页最后一条记录的 (ts, id)
+            filters = filters + ['(ts, id) < (?, ?)']
+            params = params + [cursor[0], cursor[1]]
+
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        if filters:
+            sql += " WHERE " + " AND ".join(filters)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        params = params + [limit]
+
+        with self.lock:
+            rows = self.read_conn.execute(sql, params).fetchall()
+
+        records = [dict(zip(columns, row)) for row in rows]
+        next_cursor = (records[-1]['ts'], records[-1]['id']) if len(records) == limit else None
+        return records, next_cursor
+
+    @staticmethod
+    def _time_filters(start_ts, end_ts):
+        """时间范围条件（start_ts 含，end_ts 不含，单位为秒）"""
+        filters, params = [], []
+        if start_ts is not None:
+            filters.append('ts >= ?')
+            params.append(int(start_ts))
+        if end_ts is not None:
+            filters.append('ts < ?')
+            params.append(int(end_ts))
+        return filters, params
+
+    @staticmethod
+    def _in_filter(column, values, filters, params):
+        """IN 条件"""
+        if values:
+            values = [values] if isinstance(values, str) else list(values)
+            filters.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+    def query_records(self, start_ts=None, end_ts=None, target_types=None, risk_levels=None,
+                      input_type=None, source=None, track_id=None, limit=100, cursor=None):
+        """按时间范围、类别、风险等级、输入源和跟踪ID分页查询识别记录
+
+        返回 (记录字典列表, 下一页 cursor)；将 cursor 传回即可获取下一页，为 None 表示没有更多记录
+        """
+        try:
+            filters, params = self._time_filters(start_ts, end_ts)
+            self._in_filter('target_type', target_types, filters, params)
+            self._in_filter('risk_level', risk_levels, filters, params)
+            if input_type is not None:
+                filters.append('input_type = ?')
+                params.append(input_type)
+            if source is not None:
+                filters.append('source = ?')
+                params.append(source)
+            if track_id is not None:
+                filters.append('track_id = ?')
+                params.append(track_id)
+
+            columns = ['id', 'ts', 'timestamp', 'input_type', 'source', 'target_type',
+                       'confidence', 'risk_level', 'image_path', 'track_id']
+            return self._query_page('recognition_records', columns, filters, params, limit, cursor)
+
+        except Exception as e:
+            self.error_occurred.emit(f"查询识别记录失败: {str(e)}")
+            return [], None
+
+    def query_alarms(self, start_ts=None, end_ts=None, risk_levels=None, handle_status=None,
+                     limit=100, cursor=None):
+        """按时间范围、风险等级和处理状态分页查询告警日志，返回 (记录字典列表, 下一页 cursor)"""
+        try:
+            filters, params = self._time_filters(start_ts, end_ts)
+            self._in_filter('risk_level', risk_levels, filters, params)
+            if handle_status is not None:
+                filters.append('handle_status = ?')
+                params.append(handle_status)
+
+            columns = ['id', 'ts', 'timestamp', 'risk_level', 'target_info', 'handle_status']
+            return self._query_page('alarm_logs', columns, filters, params, limit, cursor)
+
+        except Exception as e:
+            self.error_occurred.emit(f"查询告警日志失败: {str(e)}")
+            return [], None
+
+    def query_alert_events(self, start_ts=None, end_ts=None, risk_levels=None, source=None, status=None,
+                           zone_id=None, limit=100, cursor=None):
+        """按开始时间范围、风险等级、输入源、事件状态和区域分页查询告警事件，返回 (记录字典列表, 下一页 cursor)"""
+        try:
+            filters, params = self._time_filters(start_ts, end_ts)
+            self._in_filter('risk_level', risk_levels, filters, params)
+            if source is not None:
+                filters.append('source = ?')
+                params.append(source)
+            if status is not None:
+                filters.append('status = ?')
+                params.append(status)
+            if zone_id is not None:
+                filters.append('zone_id = ?')
+                params.append(zone_id)
+
+            columns = ['id', 'ts', 'event_uid', 'source', 'target_type', 'risk_level', 'track_id', 'last_ts',
+                       'end_ts', 'duration', 'frame_count', 'max_targets', 'max_confidence', 'status', 'summary',
+                       'handle_status', 'zone_id']
+            return self._query_page('alert_events', columns, filters, params, limit, cursor)
+
+        except Exception as e:
+            self.error_occurred.emit(f"查询告警事件失败: {str(e)}")
+            return [], None
+
+    def query_trend(self, granularity='hour', start_ts=None, end_ts=None, target_types=None,
+                    risk_levels=None, source=None, group_by_source=False):
+        """从汇总表查询检测趋势（如每小时每路摄像头的未戴安全帽次数）
+
+        granularity 为 minute/hour/day；返回按桶时间升序的字典列表，
+        每项包含 bucket_ts、count、max_confidence，group_by_source 时另含 source
+        """
+        try:
+            filters = ['granularity = ?']
+            params = [ROLLUP_GRANULARITIES[granularity]]
+            if start_ts is not None:
+                filters.append('bucket_ts >= ?')
+                params.append(self._bucket_start(int(start_ts), params[0]))
+            if end_ts is not None:
+                filters.append('bucket_ts < ?')
+                params.append(int(end_ts))
+            self._in_filter('target_type', target_types, filters, params)
+            self._in_filter('risk_level', risk_levels, filters, params)
+            if source is not None:
+                filters.append('source = ?')
+                params.append(source)
+
+            group_columns = ['bucket_ts', 'source'] if group_by_source else ['bucket_ts']
+            sql = f'''
+                SELECT {', '.join(group_columns)}, SUM(count), MAX(max_confidence)
+                FROM detection_rollups
+                WHERE {' AND '.join(filters)}
+                GROUP BY {', '.join(group_columns)}
+                ORDER BY {', '.join(group_columns)}
+            '''
+            with self.lock:
+                rows = self.read_conn.execute(sql, params).fetchall()
+
+            columns = group_columns + ['count', 'max_confidence']
+            return [dict(zip(columns, row)) for row in rows]
+
+        except Exception as e:
+            self.error_occurred.emit(f"查询检测趋势失败: {str(e)}")
+            return []
+
     def query_recognition_records(self, limit=100):
         """查询识别记录"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
+                cursor = self.read_conn.cursor()
                 cursor.execute('''
-                    SELECT * FROM recognition_records 
-                    ORDER BY timestamp DESC 
+                    SELECT * FROM recognition_records
+                    ORDER BY ts DESC, id DESC
                     LIMIT ?
                 ''', (limit,))
-                
-                records = cursor.fetchall()
-                conn.close()
-                
-                return records
-                
+                return cursor.fetchall()
+
         except Exception as e:
             self.error_occurred.emit(f"查询识别记录失败: {str(e)}")
             return []
-    
+
     def query_alarm_logs(self, limit=100):
         """查询告警日志"""
         try:
             with self.lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
+                cursor = self.read_conn.cursor()
                 cursor.execute('''
-                    SELECT * FROM alarm_logs 
-                    ORDER BY timestamp DESC 
+                    SELECT * FROM alarm_logs
+                    ORDER BY ts DESC, id DESC
                     LIMIT ?
                 ''', (limit,))
-                
-                logs = cursor.fetchall()
-                conn.close()
-                
-                return logs
-                
+                return cursor.fetchall()
+
         except Exception as e:
             self.error_occurred.emit(f"查询告警日志失败: {str(e)}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,191 @@
+import numpy as np
+
+# 风险等级编码（数值越大风险越高），未知类别为 -1
+RISK_CODES = {'安全': 0, '中风险': 1, '高风险': 2, '紧急': 3}
+UNKNOWN_RISK_CODE = -1
+# 需要告警的最低风险等级
+ALERT_RISK_LEVEL = '中风险'
+
+
+class ClassTable:
+    """类别查找表：按类别下标存放名称、中文名和风险等级（字符串只保存一份），最后一项对应未知类别"""
+
+    def __init__(self, config):
+        classes = config['classes']
+        chinese_classes = config['chinese_classes']
+        risk_levels = config['risk_levels']
+
+        self.unknown_index = max(classes) + 1 if classes else 0
+        size = self.unknown_index + 1
+        class_names = ["未知"] * size
+        chinese_names = ["未知"] * size
+        risk_level_names = ["未知"] * size
+
+        for cls_id, class_name in classes.items():
+            class_names[cls_id] = class_name
+            chinese_names[cls_id] = chinese_classes.get(class_name, class_name)
+            risk_level_names[cls_id] = risk_levels.get(class_name, "未知")
+
+        self.class_names = np.array(class_names, dtype=object)
+        self.chinese_names = np.array(chinese_names, dtype=object)
+        self.risk_level_names = np.array(risk_level_names, dtype=object)
+        self.risk_codes = np.array([RISK_CODES.get(level, UNKNOWN_RISK_CODE) for level in risk_level_names],
+                                   dtype=np.int8)
+
+    def lookup(self, class_ids):
+        """类别编号 -> 查找表下标（越界视为未知类别）"""
+        return np.where((class_ids >= 0) & (class_ids < self.unknown_index), class_ids, self.unknown_index)
+
+
+class Detection:
+    """单个检测目标（迭代 Detections 时生成的只读记录）"""
+    __slots__ = ('bbox', 'confidence', 'class_id', 'class_name', 'chinese_name', 'risk_level', 'risk_code',
+                 'track_id', 'zone_id')
+
+    def __init__(self, bbox, confidence, class_id, class_name, chinese_name, risk_level, risk_code,
+                 track_id=None, zone_id=None):
+        self.bbox = bbox
+        self.confidence = confidence
+        self.class_id = class_id
+        self.class_name = class_name
+        self.chinese_name = chinese_name
+        self.risk_level = risk_level
+        self.risk_code = risk_code
+        self.track_id = track_id
+        self.zone_id = zone_id
+
+
+class Detections:
+    """一帧的检测结果，按列存储：检测框 (N, 4) int32、置信度 (N,) float32、类别编号 (N,) int32、查找表下标 (N,)、
+    跟踪ID (N,) int32（未跟踪为 -1）、所在区域ID (N,) object（未配置区域为 None）
+
+    切片返回共享底层数组的视图；按掩码或下标数组筛选返回新的 Detections
+    """
+    __slots__ = ('boxes', 'scores', 'class_ids', 'labels', 'table', 'track_ids', 'zone_ids')
+
+    # rows() 可用的列名
+    FIELDS = ('bbox', 'confidence', 'class_id', 'class_name', 'chinese_name', 'risk_level', 'risk_code',
+              'track_id', 'zone_id')
+
+    def __init__(self, boxes, scores, class_ids, labels, table, track_ids=None, zone_ids=None):
+        self.boxes = boxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.labels = labels
+        self.table = table
+        self.track_ids = track_ids if track_ids is not None else np.full(len(scores), -1, dtype=np.int32)
+        self.zone_ids = zone_ids if zone_ids is not None else np.full(len(scores), None, dtype=object)
+
+    @classmethod
+    def from_box_data(cls, box_data, table, track_ids=None, zone_ids=None):
+        """由检测框数组（每行 x1, y1, x2, y2, conf, cls）和可选的跟踪ID数组、区域ID数组创建"""
+        class_ids = box_data[:, 5].astype(np.int32)
+        return cls(
+            box_data[:, :4].astype(np.int32),
+            box_data[:, 4].astype(np.float32),
+            class_ids,
+            table.lookup(class_ids),
+            table,
+            track_ids,
+            zone_ids,
+        )
+
+    @classmethod
+    def empty(cls, table):
+        """空结果"""
+        return cls.from_box_data(np.zeros((0, 6), dtype=np.float32), table)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __bool__(self):
+        return len(self.scores) > 0
+
+    def __getitem__(self, key):
+        """整数下标返回 Detection；切片、布尔掩码或下标数组返回 Detections"""
+        if isinstance(key, (int, np.integer)):
+            label = self.labels[key]
+            return Detection(
+                tuple(self.boxes[key].tolist()),
+                float(self.scores[key]),
+                int(self.class_ids[key]),
+                self.table.class_names[label],
+                self.table.chinese_names[label],
+                self.table.risk_level_names[label],
+                int(self.table.risk_codes[label]),
+                self._track_id(int(self.track_ids[key])),
+                self.zone_ids[key],
+            )
+        return Detections(self.boxes[key], self.scores[key], self.class_ids[key], self.labels[key], self.table,
+                          self.track_ids[key], self.zone_ids[key])
+
+    @staticmethod
+    def _track_id(track_id):
+        """未跟踪的目标返回 None"""
+        return track_id if track_id >= 0 else None
+
+    def __iter__(self):
+        for values in self.rows(*self.FIELDS):
+            yield Detection(*values)
+
+    @property
+    def risk_codes(self):
+        """各目标的风险等级编码"""
+        return self.table.risk_codes[self.labels]
+
+    @property
+    def class_names(self):
+        return self.table.class_names[self.labels]
+
+    @property
+    def chinese_names(self):
+        return self.table.chinese_names[self.labels]
+
+    @property
+    def risk_levels(self):
+        return self.table.risk_level_names[self.labels]
+
+    def risk_mask(self, min_level=ALERT_RISK_LEVEL):
+        """风险等级不低于 min_level 的掩码"""
+        return self.risk_codes >= RISK_CODES[min_level]
+
+    def at_least(self, min_level=ALERT_RISK_LEVEL):
+        """筛选风险等级不低于 min_level 的目标"""
+        return self[self.risk_mask(min_level)]
+
+    def with_risk_levels(self, risk_levels):
+        """筛选风险等级属于 risk_levels 的目标"""
+        codes = [RISK_CODES.get(level, UNKNOWN_RISK_CODE) for level in risk_levels]
+        return self[np.isin(self.risk_codes, codes)]
+
+    def highest_risk(self):
+        """风险等级最高的目标（同等级取第一个），无目标时返回 None"""
+        if not self:
+            return None
+        return self[int(self.risk_codes.argmax())]
+
+    def rows(self, *fields):
+        """按指定列逐行返回 Python 值的元组，可直接用于 executemany"""
+        columns = []
+        for field in fields:
+            if field == 'bbox':
+                columns.append(map(tuple, self.boxes.tolist()))
+            elif field == 'confidence':
+                columns.append(self.scores.tolist())
+            elif field == 'class_id':
+                columns.append(self.class_ids.tolist())
+            elif field == 'class_name':
+                columns.append(self.class_names.tolist())
+            elif field == 'chinese_name':
+                columns.append(self.chinese_names.tolist())
+            elif field == 'risk_level':
+                columns.append(self.risk_levels.tolist())
+            elif field == 'risk_code':
+                columns.append(self.risk_codes.tolist())
+            elif field == 'track_id':
+                columns.append(map(self._track_id, self.track_ids.tolist()))
+            elif field == 'zone_id':
+                columns.append(self.zone_ids.tolist())
+            else:
+                raise KeyError(field)
+        return zip(*columns)
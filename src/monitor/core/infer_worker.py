@@ -0,0 +1,150 @@
+import threading
+import time
+from core.qt_compat import QObject, pyqtSignal, HEADLESS
+from core.profiler import profiler
+
+from core.model_infer import YoloInfer
+
+
+class LatestFrameMailbox:
+    """单槽最新帧邮箱，新帧覆盖未被取走的旧帧"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._put_time = 0.0
+        self._closed = False
+        # 被覆盖（丢弃）的帧数
+        self.dropped_count = 0
+
+    def put(self, item):
+        """放入一帧，若槽中已有未处理的帧则丢弃旧帧"""
+        with self._cond:
+            if self._item is not None:
+                self.dropped_count += 1
+            self._item = item
+            self._put_time = time.perf_counter()
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """取出最新帧，返回 (帧, 帧在邮箱中停留的秒数)，超时或关闭时返回 (None, 0.0)"""
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            if self._item is None:
+                return None, 0.0
+            item = self._item
+            self._item = None
+            return item, time.perf_counter() - self._put_time
+
+    def clear(self):
+        """清空邮箱"""
+        with self._cond:
+            self._item = None
+
+    def close(self):
+        """关闭邮箱并唤醒等待线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """重新打开邮箱并重置统计"""
+        with self._cond:
+            self._closed = False
+            self._item = None
+            self.dropped_count = 0
+
+
+class InferenceWorker(QObject):
+    """推理工作线程：独占模型，从最新帧邮箱取帧推理，避免阻塞界面线程"""
+    inference_finished = pyqtSignal(object)  # 推理结果字典
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+        self.model_infer = YoloInfer(config)
+        self.model_infer.error_occurred.connect(self.error_occurred)
+        self.mailbox = LatestFrameMailbox()
+        self.running = False
+        self.thread = None
+        # 切换输入源时由 clear 置位，推理线程在下一次推理前清空门控和跟踪器（模型状态只在推理线程中修改）
+        self.reset_requested = False
+        # 统计信息
+        self.processed_count = 0
+        self.last_queue_wait = 0.0
+        # 有界面显示时在推理线程中绘制标注图，界面线程只负责显示；无界面时保持按需绘制
+        self.draw_annotations = not HEADLESS
+
+    def load_model(self):
+        """加载模型"""
+        return self.model_infer.load_model()
+
+    def set_confidence_threshold(self, threshold):
+        """设置置信度阈值"""
+        self.model_infer.set_confidence_threshold(threshold)
+
+    @property
+    def dropped_count(self):
+        """因推理跟不上而被丢弃的帧数"""
+        return self.mailbox.dropped_count
+
+    def start(self):
+        """启动推理线程"""
+        if not self.running:
+            self.running = True
+            self.processed_count = 0
+            self.last_queue_wait = 0.0
+            self.mailbox.reopen()
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        """停止推理线程"""
+        self.running = False
+        self.mailbox.close()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+    def submit(self, frame):
+        """提交待推理的帧（只保留最新一帧）"""
+        if self.running:
+            self.mailbox.put(frame)
+
+    def clear(self):
+        """丢弃尚未处理的帧，并要求推理线程在下一次推理前清空场景变化门控的参考帧"""
+        self.reset_requested = True
+        self.mailbox.clear()
+
+    def _run(self):
+        """推理线程主循环"""
+        while self.running:
+            frame, queue_wait = self.mailbox.get(timeout=0.1)
+            if frame is None:
+                continue
+            profiler.record('queue_wait', int(queue_wait * 1e9))
+
+            try:
+                if self.reset_requested:
+                    self.reset_requested = False
+                    self.model_infer.reset_change_gates()
+
+                result_data = self.model_infer.infer_single_frame(frame)
+                if result_data is None:
+                    continue
+
+                self.processed_count += 1
+                self.last_queue_wait = queue_wait
+
+                # 附加邮箱统计信息
+                result_data['queue_wait'] = queue_wait
+                result_data['dropped_frames'] = self.mailbox.dropped_count
+
+                # 在发出结果之前绘制标注，避免界面线程首次访问 annotated_frame 时绘制
+                if self.draw_annotations:
+                    result_data.get_annotated_frame()
+                self.inference_finished.emit(result_data)
+            except Exception as e:
+                self.error_occurred.emit(f"推理线程错误: {str(e)}")
@@ -0,0 +1,108 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape_label(value):
+    """转义标签值中的反斜杠、双引号和换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricsWriter:
+    """按 Prometheus 文本格式拼装指标"""
+
+    def __init__(self, prefix='monitor_'):
+        self.prefix = prefix
+        self.lines = []
+
+    def add(self, name, metric_type, help_text, samples):
+        """添加 counter/gauge 指标，samples 为 [(标签字典, 值)] 列表"""
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def add_histograms(self, name, help_text, samples):
+        """添加直方图指标，samples 为 [(标签字典, StageHistogram.snapshot() 结果)] 列表"""
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, snapshot in samples:
+            for bound, cumulative in snapshot['buckets']:
+                bucket_labels = dict(labels, le=bound if bound == '+Inf' else repr(bound))
+                self.lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            self.lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum_ms'] / 1000.0)}")
+            self.lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+
+    def render(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+class MetricsServer:
+    """本地 HTTP 指标接口：在后台线程中响应 GET /metrics，抓取时才调用 collect 生成指标文本"""
+
+    def __init__(self, collect, host='127.0.0.1', port=9108):
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    def _make_handler(self):
+        collect = self.collect
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                try:
+                    body = collect().encode('utf-8')
+                except Exception as e:
+                    self.send_error(500, f"collect failed: {e}")
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 不打印每次抓取的访问日志
+                pass
+
+        return MetricsHandler
+
+    def start(self):
+        """启动指标服务线程"""
+        if self.server is not None:
+            return
+        self.server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.server.daemon_threads = True
+        # 端口为 0 时使用系统分配的端口
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """停止指标服务"""
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
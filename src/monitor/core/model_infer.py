@@ -1,15 +1,61 @@
-import torch
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from PyQt5.QtCore import QObject, pyqtSignal
+from core.qt_compat import QObject, pyqtSignal
+from core.backends import create_backend
+from core.preprocess import LetterboxPreprocessor
+from core.change_detector import SceneChangeGate
+from core.tracker import ObjectTracker
+from core.zones import ZoneSet
+from core.tiling import TileSlicer
+from core.cascade import CascadeModel
+from core.profiler import profiler
+from core.detections import ClassTable, Detections
 import time
+from functools import partial
 from PIL import Image, ImageDraw, ImageFont
 
+# 各风险等级的标注颜色（BGR格式）
+RISK_COLORS = {
+    '紧急': (0, 0, 255),    # 红色
+    '高风险': (0, 255, 255), # 黄色
+    '中风险': (0, 165, 255), # 橙色
+    '安全': (0, 255, 0)     # 绿色
+}
+DEFAULT_COLOR = (255, 255, 255)  # 默认白色
+
+
+class InferenceResult(dict):
+    """推理结果字典：annotated_frame 在首次访问时才绘制，不显示、不录像的结果不产生标注开销"""
+
+    def __init__(self, annotate=None, **kwargs):
+        super().__init__(**kwargs)
+        self._annotate = annotate
+
+    def __missing__(self, key):
+        if key == 'annotated_frame' and self._annotate is not None:
+            annotated_frame = self._annotate()
+            self[key] = annotated_frame
+            return annotated_frame
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        """与下标访问一致，get('annotated_frame') 同样按需绘制（dict.get 不会调用 __missing__）"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return super().__contains__(key) or (key == 'annotated_frame' and self._annotate is not None)
+
+    def get_annotated_frame(self):
+        """获取标注图，尚未绘制时立即绘制"""
+        return self['annotated_frame']
+
 
 class YoloInfer(QObject):
     """YOLO模型推理类"""
-    inference_finished = pyqtSignal(dict)  # 推理完成信号
+    inference_finished = pyqtSignal(object)  # 推理完成信号（推理结果字典）
     error_occurred = pyqtSignal(str)       # 错误信号
 
     def __init__(self, config):
@@ -17,63 +63,162 @@ class YoloInfer(QObject):
         self.config = config
         self.model = None
         self.confidence_threshold = config['model']['confidence_threshold']
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.device = 'cpu'
         self.classes = config['classes']
         self.chinese_classes = config['chinese_classes']
         self.risk_levels = config['risk_levels']
         # 添加推理超时设置（秒）
         self.inference_timeout = 5.0
-        # 添加推理缓存以提高重复帧的处理速度
-        self.last_frame_hash = None
-        self.last_result = None
+        # 场景变化门控（按输入源区分），画面无明显变化时复用上次检测结果
+        self.change_gates = {}
+        # 检测+跟踪模式（按输入源区分）：每隔若干帧检测一次，中间帧由跟踪器外推检测框，启用时不使用场景变化门控
+        self.tracking_enabled = (config.get('tracking') or {}).get('enabled', False)
+        self.trackers = {}
+        # 区域配置（按输入源区分）：只推理区域的外接矩形，丢弃区域外的检测目标
+        self.zone_config = config.get('zones') or {}
+        self.zone_sets = {}
+        # 切片推理（高分辨率画面中的远处小目标）
+        self.tiler = TileSlicer(config) if (config.get('tiling') or {}).get('enabled', False) else None
+        # letterbox 预处理（所有输入源共用，只缩放一次）
+        self.preprocessor = LetterboxPreprocessor(config['model']['input_size'])
+        # 类别 -> 名称/风险等级的查找表
+        self._build_lookup_tables()
+
+    def _build_lookup_tables(self):
+        """类别查找表和按类别下标索引的标注颜色"""
+        self.class_table = ClassTable(self.config)
+        self._colors = [RISK_COLORS.get(level, DEFAULT_COLOR) for level in self.class_table.risk_level_names]
+        # 标签文字宽度缓存（按类别）
+        self._label_widths = {}
 
-    def load_model(self):
-        """加载模型"""
+    def load_model(self, model_path=None):
+        """加载模型（推理后端由 config.yaml 中 model.backend 决定）"""
         try:
-            model_path = self.config['model']['path']
-            self.model = YOLO(model_path)
-            
-            # 设置模型为评估模式
-            if hasattr(self.model, 'model') and hasattr(self.model.model, 'eval'):
-                self.model.model.eval()
+            model_path = model_path or self.config['model']['path']
+            backend = create_backend(self.config, model_path)
+            backend.load(model_path)
+
+            # 级联模式：第二级模型只处理第一级结果不确定的输入
+            cascade_config = self.config.get('cascade') or {}
+            if cascade_config.get('enabled', False):
+                heavy_path = cascade_config['model_path']
+                heavy_config = dict(self.config, model=dict(self.config['model'],
+                                                            backend=cascade_config.get('backend', 'auto')))
+                heavy = create_backend(heavy_config, heavy_path)
+                heavy.load(heavy_path)
+                backend = CascadeModel(self.config, backend, heavy)
+
+            self.model = backend
+            self.device = backend.device
                 
-            print(f"模型加载成功，使用设备: {self.device}")
+            print(f"模型加载成功，推理后端: {backend.name}，使用设备: {self.device}")
             return True
         except Exception as e:
             self.error_occurred.emit(f"模型加载失败: {str(e)}")
             return False
 
+    def cascade_stats(self):
+        """级联模式的升级统计（未启用级联时返回 None）"""
+        return self.model.stats() if isinstance(self.model, CascadeModel) else None
+
     def set_confidence_threshold(self, threshold):
         """设置置信度阈值"""
         self.confidence_threshold = threshold
 
-    def infer_single_frame(self, frame):
-        """单帧推理"""
+    def _get_change_gate(self, key):
+        """获取指定输入源的场景变化门控"""
+        gate = self.change_gates.get(key)
+        if gate is None:
+            gate = SceneChangeGate(self.config)
+            self.change_gates[key] = gate
+        return gate
+
+    def reset_change_gates(self):
+        """清空所有门控的参考帧和跟踪器的轨迹（切换输入源时调用）"""
+        self.change_gates.clear()
+        self.trackers.clear()
+
+    def _get_zone_set(self, key):
+        """获取指定输入源的区域，未启用区域或该输入源区域为空时返回 None；未单独配置的输入源使用 default"""
+        if not self.zone_config.get('enabled', False):
+            return None
+        if key not in self.zone_sets:
+            sources = self.zone_config.get('sources') or {}
+            zones = sources.get(key, sources.get('default'))
+            zone_set = None
+            if zones:
+                zone_set = ZoneSet(zones, self.class_table, self.zone_config.get('crop_padding', 32))
+            self.zone_sets[key] = zone_set
+        return self.zone_sets[key]
+
+    def _get_tracker(self, key):
+        """获取指定输入源的跟踪器"""
+        tracker = self.trackers.get(key)
+        if tracker is None:
+            tracker = ObjectTracker(self.config)
+            self.trackers[key] = tracker
+        return tracker
+
+    def request_detection(self, key=None):
+        """跟踪模式下要求指定输入源的下一帧立即运行检测"""
+        if key in self.trackers:
+            self.trackers[key].request_detection()
+
+    def _track_result(self, frame, key):
+        """跟踪模式的非关键帧：不运行检测，由跟踪器外推检测框（外推后的位置需重新判断所在区域）"""
+        start_ns = time.perf_counter_ns()
+        box_data, track_ids = self._get_tracker(key).propagate(frame.shape)
+        profiler.record('track', time.perf_counter_ns() - start_ns)
+        result_data = self._parse_results(frame, box_data, 0.0, track_ids, self._get_zone_set(key))
+        result_data['reused'] = True
+        result_data['tracked'] = True
+        return result_data
+
+    def _keyframe_result(self, frame, box_data, zone_ids, inference_time, key):
+        """跟踪模式的关键帧：用检测结果更新跟踪器，结果附带跟踪ID（检测框顺序不变，沿用推理时得到的区域ID）"""
+        start_ns = time.perf_counter_ns()
+        box_data, track_ids = self._get_tracker(key).update(box_data, frame.shape)
+        profiler.record('track', time.perf_counter_ns() - start_ns)
+        result_data = self._parse_results(frame, box_data, inference_time, track_ids, self._get_zone_set(key),
+                                          zone_ids)
+        result_data['reused'] = False
+        result_data['tracked'] = False
+        return result_data
+
+    def infer_single_frame(self, frame, key=None):
+        """单帧推理（key 区分不同输入源的场景变化门控）"""
         try:
             if self.model is None:
                 self.error_occurred.emit("模型未加载")
                 return None
 
-            # 计算帧的哈希值，用于缓存优化
-            frame_hash = hash(frame.tobytes())
-            
-            # 如果是同一帧，直接返回缓存结果
-            if frame_hash == self.last_frame_hash and self.last_result is not None:
-                self.inference_finished.emit(self.last_result)
-                return self.last_result
+            zone_set = self._get_zone_set(key)
+
+            # 跟踪模式：非关键帧只外推跟踪结果
+            if self.tracking_enabled:
+                if not self._get_tracker(key).is_keyframe():
+                    result_data = self._track_result(frame, key)
+                    self.inference_finished.emit(result_data)
+                    return result_data
+                gate = None
+            else:
+                gate = self._get_change_gate(key)
+
+            # 场景无明显变化且结果未过期时，复用上次的检测结果（配置区域时只比较区域范围内的画面）
+            if gate is not None and not gate.should_infer(frame if zone_set is None else zone_set.crop(frame)[0]):
+                result_data = self._parse_results(frame, gate.last_box_data, 0.0, zone_set=zone_set,
+                                                  zone_ids=gate.last_zone_ids)
+                result_data['reused'] = True
+                self.inference_finished.emit(result_data)
+                return result_data
 
             # 记录开始时间
             start_time = time.time()
             
-            # 执行推理，添加超时机制
-            results = self.model(
-                frame, 
-                conf=self.confidence_threshold, 
-                device=self.device,
-                verbose=False,  # 减少日志输出
-                half=(self.device == 'cuda'),  # 如果使用CUDA则启用半精度
-                stream=False  # 禁用流式处理
-            )
+            # 执行推理
+            box_data, zone_ids = self._predict([frame], [zone_set])[0]
+            if gate is not None:
+                gate.commit(box_data, zone_ids)
             
             # 检查是否超时
             inference_time = time.time() - start_time
@@ -81,11 +226,12 @@ class YoloInfer(QObject):
                 print(f"警告: 推理时间过长 {inference_time:.2f}秒")
             
             # 解析结果
-            result_data = self._parse_results(frame, results, inference_time)
-            
-            # 缓存结果
-            self.last_frame_hash = frame_hash
-            self.last_result = result_data
+            if self.tracking_enabled:
+                result_data = self._keyframe_result(frame, box_data, zone_ids, inference_time, key)
+            else:
+                result_data = self._parse_results(frame, box_data, inference_time, zone_set=zone_set,
+                                                  zone_ids=zone_ids)
+                result_data['reused'] = False
             
             # 发送结果信号
             self.inference_finished.emit(result_data)
@@ -96,6 +242,120 @@ class YoloInfer(QObject):
             self.error_occurred.emit(f"推理错误: {str(e)}")
             return None
 
+    def infer_batch(self, frames, keys=None):
+        """批量推理：一次模型调用处理多帧，返回与输入顺序一致的结果列表
+        
+        keys 为各帧所属输入源的标识，指定时按输入源做场景变化门控，未变化的帧不进入批次；
+        跟踪模式下只有各输入源的关键帧进入批次，其余帧由跟踪器外推
+        """
+        try:
+            if self.model is None:
+                self.error_occurred.emit("模型未加载")
+                return None
+
+            if not frames:
+                return []
+
+            # 筛选需要推理的帧
+            tracking = self.tracking_enabled and keys is not None
+            gates = [self._get_change_gate(key) for key in keys] if keys is not None and not tracking else None
+            zone_sets = [self._get_zone_set(key) for key in keys] if keys is not None else \
+                [self._get_zone_set(None)] * len(frames)
+            if tracking:
+                infer_indices = [i for i, key in enumerate(keys) if self._get_tracker(key).is_keyframe()]
+            else:
+                infer_indices = [
+                    i for i, frame in enumerate(frames)
+                    if gates is None
+                    or gates[i].should_infer(frame if zone_sets[i] is None else zone_sets[i].crop(frame)[0])
+                ]
+
+            # 记录开始时间
+            start_time = time.time()
+
+            # 多帧合并为一个批次执行推理
+            box_data_list = self._predict([frames[i] for i in infer_indices],
+                                          [zone_sets[i] for i in infer_indices]) if infer_indices else []
+            predicted = dict(zip(infer_indices, box_data_list))
+
+            inference_time = time.time() - start_time
+            if inference_time > self.inference_timeout:
+                print(f"警告: 批量推理时间过长 {inference_time:.2f}秒 (批次大小 {len(infer_indices)})")
+
+            # 逐帧解析结果，未推理的帧复用上次检测结果
+            batch_results = []
+            for i, frame in enumerate(frames):
+                if tracking:
+                    if i in predicted:
+                        box_data, zone_ids = predicted[i]
+                        result_data = self._keyframe_result(frame, box_data, zone_ids, inference_time, keys[i])
+                    else:
+                        result_data = self._track_result(frame, keys[i])
+                elif i in predicted:
+                    box_data, zone_ids = predicted[i]
+                    if gates is not None:
+                        gates[i].commit(box_data, zone_ids)
+                    result_data = self._parse_results(frame, box_data, inference_time, zone_set=zone_sets[i],
+                                                      zone_ids=zone_ids)
+                    result_data['reused'] = False
+                else:
+                    result_data = self._parse_results(frame, gates[i].last_box_data, 0.0, zone_set=zone_sets[i],
+                                                      zone_ids=gates[i].last_zone_ids)
+                    result_data['reused'] = True
+                result_data['batch_size'] = len(infer_indices)
+                batch_results.append(result_data)
+
+            return batch_results
+
+        except Exception as e:
+            self.error_occurred.emit(f"批量推理错误: {str(e)}")
+            return None
+
+    def _predict(self, frames, zone_sets=None):
+        """letterbox 预处理后执行一次批量推理，返回各帧的 (原始帧坐标系下的检测框数组, 区域ID数组) 列表，
+        检测框每行 x1, y1, x2, y2, conf, cls
+
+        zone_sets 为各帧的区域（可为 None）：只推理区域的外接矩形，丢弃区域外的检测框并得到各检测框所在区域ID
+        （未配置区域的帧为 None）；
+        启用切片推理时每帧（或区域外接矩形）切成多个切片，所有帧的切片合并为一个批次
+        """
+        start_ns = time.perf_counter_ns()
+        zone_sets = zone_sets or [None] * len(frames)
+        crop_zones = self.tiler is None or self.tiler.zones_only
+        inputs, owners = [], []  # owners 为各输入所属的帧下标、在原始帧中的偏移、切片窗口和区域尺寸
+        for index, (frame, zone_set) in enumerate(zip(frames, zone_sets)):
+            region, (offset_x, offset_y) = zone_set.crop(frame) if zone_set is not None and crop_zones \
+                else (frame, (0, 0))
+            windows = self.tiler.windows(region.shape) if self.tiler is not None \
+                else [(0, 0, region.shape[1], region.shape[0])]
+            for window in windows:
+                x1, y1, x2, y2 = window
+                inputs.append(region[y1:y2, x1:x2])
+                owners.append((index, offset_x + x1, offset_y + y1, window, region.shape))
+        batch, infos = self.preprocessor.letterbox_batch(inputs)
+        preprocess_end_ns = time.perf_counter_ns()
+        box_data_list = self.model.predict(batch, self.confidence_threshold)
+        profiler.record('preprocess', preprocess_end_ns - start_ns)
+        profiler.record('inference', time.perf_counter_ns() - preprocess_end_ns)
+
+        # 映射回原始帧坐标
+        parts = [[] for _ in frames]
+        for box_data, info, (index, offset_x, offset_y, window, region_shape) in zip(box_data_list, infos, owners):
+            box_data = self.preprocessor.scale_boxes(box_data, info)
+            if self.tiler is not None:
+                box_data = self.tiler.drop_truncated(box_data, window, region_shape)
+            if offset_x or offset_y:
+                box_data[:, [0, 2]] += offset_x
+                box_data[:, [1, 3]] += offset_y
+            parts[index].append(box_data)
+
+        results = []
+        for frame, zone_set, frame_parts in zip(frames, zone_sets, parts):
+            # 跨切片合并重复检测
+            box_data = frame_parts[0] if len(frame_parts) == 1 else self.tiler.merge(frame_parts)
+            results.append(zone_set.select(box_data, frame.shape) if zone_set is not None else (box_data, None))
+        return results
+
     def _put_chinese_text(self, img, text, pos, font_size=20, color=(255, 255, 255)):
         """在图像上绘制中文文本"""
         # 为了提高性能，简化中文文本绘制
@@ -116,103 +376,90 @@ class YoloInfer(QObject):
             # 如果PIL方法失败，回退到OpenCV
             return img
 
-    def _parse_results(self, frame, results, inference_time):
-        """解析推理结果"""
-        # 获取第一个结果（我们只处理单帧）
-        result = results[0]
-        
-        # 提取边界框信息
-        boxes = result.boxes
-        if boxes is None:
-            # 没有检测到目标
-            return {
-                'frame': frame,
-                'annotated_frame': frame.copy(),
-                'detections': [],
-                'inference_time': inference_time
-            }
-        
-        # 提取边界框坐标、置信度和类别
-        box_data = boxes.data.cpu().numpy()
-        detections = []
-        
+    def _parse_results(self, frame, box_data, inference_time, track_ids=None, zone_set=None, zone_ids=None):
+        """解析推理结果（box_data 为原始帧坐标系下的检测框数组），按列向量化计算，标注延迟到首次访问时绘制
+
+        配置区域时为每个目标附加所在区域ID：zone_ids 为推理时已得到的区域ID，未提供时（跟踪外推的检测框）
+        在此判断所在区域并丢弃区域外的目标
+        """
+        start_ns = time.perf_counter_ns()
+        if zone_set is not None and zone_ids is None and len(box_data):
+            keep, zone_indices = zone_set.assign(box_data, frame.shape)
+            box_data = box_data[keep]
+            if track_ids is not None:
+                track_ids = track_ids[keep]
+            zone_ids = zone_set.zone_names[zone_indices[keep]]
+        detections = Detections.from_box_data(box_data, self.class_table, track_ids, zone_ids)
+        profiler.record('parse', time.perf_counter_ns() - start_ns)
+
+        return InferenceResult(
+            annotate=partial(self._annotate, frame, detections, zone_set),
+            frame=frame,
+            detections=detections,
+            inference_time=inference_time
+        )
+
+    def _label_width(self, index):
+        """标签文字宽度（按类别缓存，置信度固定为两位小数，宽度按 0.00 估计）"""
+        width = self._label_widths.get(index)
+        if width is None:
+            label = f"{self.class_table.chinese_names[index]} 0.00"
+            ((width, _), _) = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+            self._label_widths[index] = width
+        return width
+
+    def _track_id_width(self, track_id):
+        """跟踪ID前缀（如 "#12 "）的文字宽度，按位数缓存"""
+        key = ('track_id', len(str(track_id)))
+        width = self._label_widths.get(key)
+        if width is None:
+            ((width, _), _) = cv2.getTextSize(f"#{'0' * key[1]} ", cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+            self._label_widths[key] = width
+        return width
+
+    def _annotate(self, frame, detections, zone_set=None):
+        """在帧副本上绘制检测框和标签：同色的边框和标签背景各一次调用批量绘制"""
+        start_ns = time.perf_counter_ns()
+
         # 创建标注图像副本
         annotated_frame = frame.copy()
-        
-        # 颜色定义（BGR格式）
-        colors = {
-            '紧急': (0, 0, 255),    # 红色
-            '高风险': (0, 255, 255), # 黄色
-            '中风险': (0, 165, 255), # 橙色
-            '安全': (0, 255, 0)     # 绿色
-        }
-        
-        for box in box_data:
-            x1, y1, x2, y2, conf, cls_id = box
-            cls_id = int(cls_id)
-            
-            # 获取类别名称
-            if cls_id in self.classes:
-                class_name = self.classes[cls_id]
-                chinese_name = self.chinese_classes.get(class_name, class_name)
-                risk_level = self.risk_levels.get(class_name, "未知")
-            else:
-                class_name = "未知"
-                chinese_name = "未知"
-                risk_level = "未知"
-            
-            # 转换坐标为整数
-            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-            
-            # 添加到检测结果列表
-            detection = {
-                'bbox': (x1, y1, x2, y2),
-                'confidence': float(conf),
-                'class_id': cls_id,
-                'class_name': class_name,
-                'chinese_name': chinese_name,
-                'risk_level': risk_level
-            }
-            detections.append(detection)
-            
-            # 在图像上绘制边界框
-            color = colors.get(risk_level, (255, 255, 255))  # 默认白色
-            
-            # 绘制边界框
-            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-            
-            # 绘制标签
-            label = f"{chinese_name} {conf:.2f}"
-            
-            # 优化标签绘制，提高性能
-            try:
-                # 简化的标签绘制，避免复杂的PIL操作
-                ((text_width, text_height), _) = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-                
-                # 绘制标签背景
-                cv2.rectangle(annotated_frame, (x1, y1 - 20), (x1 + text_width, y1), color, -1)
-                
-                # 绘制标签文字
-                cv2.putText(annotated_frame, label, 
-                           (x1, y1 - 5), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 
-                           0.6, 
-                           (255, 255, 255), 
-                           1, 
-                           cv2.LINE_AA)
-            except Exception as e:
-                # 简单的文本绘制作为备选
-                cv2.putText(annotated_frame, label, 
-                           (x1, y1 - 10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 
-                           0.6, 
-                           (255, 255, 255), 
-                           1, 
-                           cv2.LINE_AA)
-        
-        return {
-            'frame': frame,
-            'annotated_frame': annotated_frame,
-            'detections': detections,
-            'inference_time': inference_time
-        }
\ No newline at end of file
+        if zone_set is not None:
+            zone_set.draw(annotated_frame)
+        if not detections:
+            profiler.record('annotate', time.perf_counter_ns() - start_ns)
+            return annotated_frame
+
+        boxes, labels = detections.boxes, detections.labels
+        x1, y1 = boxes[:, 0], boxes[:, 1]
+        track_ids = detections.track_ids.tolist()
+        label_widths = np.array([
+            self._label_width(index) + (self._track_id_width(track_id) if track_id >= 0 else 0)
+            for index, track_id in zip(labels.tolist(), track_ids)
+        ], dtype=np.int32)
+
+        # 边框和标签背景的四边形顶点 (N, 4, 2)
+        box_polygons = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        label_polygons = np.stack([x1, y1 - 20, x1 + label_widths, y1 - 20,
+                                   x1 + label_widths, y1, x1, y1], axis=1).reshape(-1, 4, 2)
+
+        # 按类别分组批量绘制（同一类别颜色相同）
+        for index in np.unique(labels).tolist():
+            mask = labels == index
+            color = self._colors[index]
+            cv2.polylines(annotated_frame, list(box_polygons[mask]), True, color, 2)
+            cv2.fillPoly(annotated_frame, list(label_polygons[mask]), color)
+
+        # 绘制标签文字
+        for x, y, chinese_name, score, track_id in zip(x1.tolist(), y1.tolist(), detections.chinese_names,
+                                                       detections.scores.tolist(), track_ids):
+            label = f"{chinese_name} {score:.2f}" if track_id < 0 else f"#{track_id} {chinese_name} {score:.2f}"
+            cv2.putText(annotated_frame, label,
+                        (x, y - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX,
+                        0.6,
+                        (255, 255, 255),
+                        1,
+                        cv2.LINE_AA)
+
+        profiler.record('annotate', time.perf_counter_ns() - start_ns)
+        return annotated_frame
@@ -0,0 +1,202 @@
+import threading
+import time
+from core.qt_compat import QObject, pyqtSignal
+from core.profiler import profiler
+
+from core.data_input import CameraInput, NetworkStreamInput, VideoInput, ImageFolderInput, default_process_fps
+from core.model_infer import YoloInfer
+
+
+class StreamState:
+    """单路视频流的调度状态"""
+
+    def __init__(self, stream_id, data_input, process_fps):
+        self.stream_id = stream_id
+        self.data_input = data_input
+        self.process_fps = process_fps
+        # 快速模式的输入源由帧队列提供背压，有新帧即处理
+        self.interval = 1.0 / process_fps if process_fps > 0 and not data_input.fast_mode else 0
+        self.next_due = 0.0
+        # 统计信息：实际推理的帧数和复用上次结果（门控未变化或跟踪外推）的帧数
+        self.inferred_count = 0
+        self.reused_count = 0
+        self.last_result_time = 0.0
+
+
+class MultiStreamManager(QObject):
+    """多路视频流管理器：同时运行多个输入源，每个调度周期将各路最新帧合并为一个批次推理"""
+    stream_result = pyqtSignal(str, object)  # 流标识, 推理结果字典
+    stream_error = pyqtSignal(str, str)      # 流标识, 错误信息
+    stream_status = pyqtSignal(str, str)     # 流标识, 状态信息（如网络流断开重连）
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, config, model_infer=None):
+        super().__init__()
+        self.config = config
+        stream_config = config.get('streams') or {}
+        self.max_batch = stream_config.get('max_batch', 16)
+        if (config.get('tracking') or {}).get('enabled', False):
+            # 跟踪模式下逐帧输出结果，默认帧率取 tracking.process_fps
+            self.default_process_fps = default_process_fps(config)
+        else:
+            self.default_process_fps = stream_config.get('default_process_fps', default_process_fps(config))
+        # 多路共享同一个模型实例
+        self.model_infer = model_infer or YoloInfer(config)
+        self.model_infer.error_occurred.connect(self.error_occurred)
+        self.streams = {}
+        self.running = False
+        self.thread = None
+        # 轮询起点：批次已满时下一轮从未取到帧的流开始，避免总是优先靠前的流
+        self.next_stream_index = 0
+        # 统计信息
+        self.batch_count = 0
+        self.last_batch_size = 0
+
+    def load_model(self):
+        """加载模型"""
+        return self.model_infer.load_model()
+
+    def add_stream(self, stream_id, data_input, process_fps=None):
+        """添加一路输入源"""
+        if stream_id in self.streams:
+            raise ValueError(f"流标识重复: {stream_id}")
+
+        process_fps = process_fps or self.default_process_fps
+        data_input.set_stream_id(stream_id)
+        # 输入源按处理帧率投递帧，管理器每个周期取各路最新帧
+        data_input.set_process_fps(process_fps)
+        data_input.error_occurred.connect(
+            lambda msg, sid=stream_id: self.stream_error.emit(sid, msg))
+        data_input.status_changed.connect(
+            lambda msg, sid=stream_id: self.stream_status.emit(sid, msg))
+        self.streams[stream_id] = StreamState(stream_id, data_input, process_fps)
+
+    def load_streams_from_config(self):
+        """根据 config.yaml 中的 streams.sources 创建输入源"""
+        stream_config = self.config.get('streams') or {}
+        for source_config in stream_config.get('sources') or []:
+            stream_id = str(source_config['id'])
+            source_type = source_config.get('type', 'camera')
+            source = source_config['source']
+
+            if source_type == 'camera':
+                data_input = CameraInput(self.config)
+                data_input.set_camera_id(source)
+            elif source_type == 'network':
+                data_input = NetworkStreamInput(self.config)
+                data_input.set_url(source)
+            elif source_type == 'video':
+                data_input = VideoInput(self.config)
+                data_input.set_video_path(source)
+                data_input.set_fast_mode(source_config.get('fast', False))
+            elif source_type == 'images':
+                data_input = ImageFolderInput(self.config)
+                data_input.set_image_path(source)
+                data_input.set_fast_mode(source_config.get('fast', False))
+            else:
+                self.error_occurred.emit(f"不支持的输入源类型: {source_type} ({stream_id})")
+                continue
+
+            self.add_stream(stream_id, data_input, source_config.get('process_fps'))
+
+    def start(self):
+        """启动所有输入源和批量推理线程"""
+        if self.running:
+            return
+
+        self.running = True
+        for state in self.streams.values():
+            state.next_due = 0.0
+            state.data_input.start()
+
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """停止所有输入源和批量推理线程"""
+        self.running = False
+        for state in self.streams.values():
+            state.data_input.stop()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+    def set_confidence_threshold(self, threshold):
+        """设置置信度阈值"""
+        self.model_infer.set_confidence_threshold(threshold)
+
+    def get_stream_stats(self):
+        """获取各路流的统计信息"""
+        return {
+            stream_id: {
+                'process_fps': state.process_fps,
+                'captured': state.data_input.captured_count,
+                'inferred': state.inferred_count,
+                'reused': state.reused_count,
+                'dropped': state.data_input.dropped_count,
+                'queue_depth': state.data_input.frame_queue.qsize(),
+                **state.data_input.get_input_stats(),
+            }
+            for stream_id, state in self.streams.items()
+        }
+
+    def _collect_batch(self, now):
+        """从轮询起点开始收集到期且有新帧的各路最新帧"""
+        states = list(self.streams.values())
+        start = self.next_stream_index
+        batch = []
+        for offset in range(len(states)):
+            if len(batch) >= self.max_batch:
+                break
+            index = (start + offset) % len(states)
+            state = states[index]
+            if now < state.next_due:
+                continue
+
+            item = state.data_input.get_latest_frame()
+            if item is None:
+                continue
+            profiler.record('queue_wait', time.perf_counter_ns() - state.data_input.last_put_ns)
+
+            original_frame, processed_frame = item
+            batch.append((state, processed_frame))
+            state.next_due = now + state.interval
+            # 下一轮从本轮最后取到帧的流之后开始
+            self.next_stream_index = index + 1
+        return batch
+
+    def _run(self):
+        """批量推理线程主循环"""
+        # 调度周期取各路处理间隔的最小值
+        intervals = [state.interval for state in self.streams.values() if state.interval > 0]
+        tick = min(intervals) if intervals else 0.02
+        # 存在快速模式输入源时，取到帧后不等待直接进入下一轮
+        has_fast_stream = any(state.interval == 0 for state in self.streams.values())
+
+        while self.running:
+            tick_start = time.time()
+            batch = self._collect_batch(tick_start)
+
+            if batch:
+                try:
+                    frames = [frame for _, frame in batch]
+                    keys = [state.stream_id for state, _ in batch]
+                    results = self.model_infer.infer_batch(frames, keys)
+                    if results:
+                        self.batch_count += 1
+                        self.last_batch_size = len(frames)
+                        for (state, _), result_data in zip(batch, results):
+                            if result_data.get('reused'):
+                                state.reused_count += 1
+                            else:
+                                state.inferred_count += 1
+                            state.last_result_time = time.time()
+                            result_data['stream_id'] = state.stream_id
+                            self.stream_result.emit(state.stream_id, result_data)
+                except Exception as e:
+                    self.error_occurred.emit(f"多路推理错误: {str(e)}")
+
+            # 等待下一个调度周期
+            elapsed = time.time() - tick_start
+            if elapsed < tick and not (batch and has_fast_stream):
+                time.sleep(tick - elapsed)
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+
+class LetterboxInfo:
+    """一次 letterbox 变换的参数，用于将检测框映射回原始帧坐标"""
+    __slots__ = ('ratio', 'pad_x', 'pad_y', 'orig_width', 'orig_height')
+
+    def __init__(self, ratio, pad_x, pad_y, orig_width, orig_height):
+        self.ratio = ratio
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.orig_width = orig_width
+        self.orig_height = orig_height
+
+
+class LetterboxPreprocessor:
+    """letterbox 预处理：等比例缩放一次并居中填充到模型输入尺寸，写入复用的预分配缓冲区"""
+
+    def __init__(self, input_size, pad_value=114):
+        # input_size 与 config.yaml 一致，为 [宽, 高]
+        self.width, self.height = int(input_size[0]), int(input_size[1])
+        self.pad_value = pad_value
+        self._buffer = None
+        # 按原始帧尺寸缓存缩放参数
+        self._geometry_cache = {}
+
+    def allocate(self, batch_size=1):
+        """分配（或扩容）批量缓冲区，返回形状为 (N, H, W, 3) 的 uint8 数组"""
+        if self._buffer is None or self._buffer.shape[0] < batch_size:
+            self._buffer = np.full((batch_size, self.height, self.width, 3), self.pad_value, dtype=np.uint8)
+        return self._buffer
+
+    def _geometry(self, orig_height, orig_width):
+        """计算缩放比例、缩放后尺寸和填充偏移"""
+        key = (orig_height, orig_width)
+        geometry = self._geometry_cache.get(key)
+        if geometry is None:
+            ratio = min(self.width / orig_width, self.height / orig_height)
+            new_width = max(1, int(round(orig_width * ratio)))
+            new_height = max(1, int(round(orig_height * ratio)))
+            pad_x = (self.width - new_width) // 2
+            pad_y = (self.height - new_height) // 2
+            geometry = (ratio, new_width, new_height, pad_x, pad_y)
+            self._geometry_cache[key] = geometry
+        return geometry
+
+    def letterbox_into(self, frame, out):
+        """将帧 letterbox 到 out（形状为 (H, W, 3) 的缓冲区），返回 LetterboxInfo"""
+        orig_height, orig_width = frame.shape[:2]
+        ratio, new_width, new_height, pad_x, pad_y = self._geometry(orig_height, orig_width)
+
+        # 只重新填充边框区域，图像区域直接由 resize 写入
+        if pad_y > 0:
+            out[:pad_y] = self.pad_value
+            out[pad_y + new_height:] = self.pad_value
+        if pad_x > 0:
+            out[:, :pad_x] = self.pad_value
+            out[:, pad_x + new_width:] = self.pad_value
+
+        region = out[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        if new_width == orig_width and new_height == orig_height:
+            region[...] = frame
+        else:
+            cv2.resize(frame, (new_width, new_height), dst=region, interpolation=cv2.INTER_LINEAR)
+
+        return LetterboxInfo(ratio, pad_x, pad_y, orig_width, orig_height)
+
+    def letterbox_batch(self, frames):
+        """将多帧 letterbox 到批量缓冲区，返回 (缓冲区视图 (N, H, W, 3), LetterboxInfo 列表)"""
+        buffer = self.allocate(len(frames))
+        infos = [self.letterbox_into(frame, buffer[i]) for i, frame in enumerate(frames)]
+        return buffer[:len(frames)], infos
+
+    @staticmethod
+    def scale_boxes(boxes, info):
+        """将 letterbox 坐标系下的 (x1, y1, x2, y2) 检测框原地映射回原始帧坐标"""
+        if len(boxes) == 0:
+            return boxes
+        boxes[:, [0, 2]] -= info.pad_x
+        boxes[:, [1, 3]] -= info.pad_y
+        boxes[:, :4] /= info.ratio
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, info.orig_width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, info.orig_height)
+        return boxes
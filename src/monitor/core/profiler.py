@@ -0,0 +1,176 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# 流水线各阶段
+STAGES = (
+    'capture',        # 采集/解码
+    'preprocess',     # letterbox 预处理
+    'queue_wait',     # 帧在队列中的等待时间
+    'inference',      # 模型推理
+    'cascade',        # 级联第二级模型推理（只含升级的输入，已计入 inference）
+    'track',          # 目标跟踪（关联或外推）
+    'parse',          # 解析检测结果
+    'annotate',       # 绘制标注
+    'display',        # 界面显示转换
+    'storage_write',  # 数据库批量写入
+)
+
+# 直方图桶上界（纳秒），覆盖 10 微秒 ~ 10 秒
+DEFAULT_BOUNDS_NS = tuple(
+    int(base * scale)
+    for scale in (1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+    for base in (1, 1.5, 2.5, 4, 6)
+) + (int(1e10),)
+
+
+class StageHistogram:
+    """固定分桶的耗时直方图，记录开销为一次二分查找和几次整数加法"""
+
+    def __init__(self, bounds_ns=DEFAULT_BOUNDS_NS):
+        self.bounds_ns = bounds_ns
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(bounds_ns) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._lock = threading.Lock()
+
+    def record(self, duration_ns):
+        """记录一次耗时（纳秒）"""
+        index = bisect.bisect_left(self.bounds_ns, duration_ns)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ns += duration_ns
+            if duration_ns > self.max_ns:
+                self.max_ns = duration_ns
+
+    def percentile(self, q):
+        """按桶内线性插值估算分位数（纳秒），q 取 0~100"""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            max_ns = self.max_ns
+        if count == 0:
+            return 0.0
+
+        target = count * q / 100.0
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= target:
+                lower = self.bounds_ns[index - 1] if index > 0 else 0
+                upper = self.bounds_ns[index] if index < len(self.bounds_ns) else max_ns
+                upper = min(upper, max_ns)
+                fraction = (target - cumulative) / bucket_count
+                return lower + (upper - lower) * fraction
+            cumulative += bucket_count
+        return float(max_ns)
+
+    def snapshot(self):
+        """返回统计摘要（毫秒）和累计分桶计数（上界为秒，便于导出为 Prometheus 格式）"""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            total_ns = self.total_ns
+            max_ns = self.max_ns
+
+        buckets = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds_ns + (None,), counts):
+            cumulative += bucket_count
+            buckets.append(('+Inf' if bound is None else bound / 1e9, cumulative))
+
+        return {
+            'count': count,
+            'sum_ms': total_ns / 1e6,
+            'mean_ms': total_ns / count / 1e6 if count else 0.0,
+            'max_ms': max_ns / 1e6,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p95_ms': self.percentile(95) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'buckets': buckets,
+        }
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self.counts = [0] * (len(self.bounds_ns) + 1)
+            self.count = 0
+            self.total_ns = 0
+            self.max_ns = 0
+
+
+class PipelineProfiler:
+    """流水线分阶段耗时统计，各模块在热路径上用 perf_counter_ns 计时后调用 record"""
+
+    def __init__(self):
+        self.enabled = True
+        self.dump_path = None
+        self.start_time = time.time()
+        self.histograms = {stage: StageHistogram() for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def configure(self, config):
+        """读取 config.yaml 中的 profiler 配置"""
+        profiler_config = config.get('profiler') or {}
+        self.enabled = profiler_config.get('enabled', True)
+        self.dump_path = profiler_config.get('dump_path')
+
+    def record(self, stage, duration_ns):
+        """记录某个阶段的一次耗时（纳秒）"""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, StageHistogram())
+        histogram.record(duration_ns)
+
+    def snapshot(self):
+        """返回各阶段的统计摘要"""
+        return {
+            stage: histogram.snapshot()
+            for stage, histogram in list(self.histograms.items())
+        }
+
+    def format_table(self):
+        """格式化为文本表格（只包含有数据的阶段）"""
+        lines = [f"{'阶段':<14}{'次数':>8}{'平均(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}"]
+        for stage, stats in self.snapshot().items():
+            if stats['count'] == 0:
+                continue
+            lines.append(
+                f"{stage:<14}{stats['count']:>8}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}"
+                f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """将统计结果保存为 JSON 文件，返回文件路径"""
+        path = path or self.dump_path
+        if not path:
+            return None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'start_time': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.start_time)),
+                'dump_time': time.strftime("%Y-%m-%d %H:%M:%S"),
+                'stages': self.snapshot(),
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+    def reset(self):
+        """清空所有阶段的统计"""
+        self.start_time = time.time()
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+
+# 进程内共享的全局实例
+profiler = PipelineProfiler()
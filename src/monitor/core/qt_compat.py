@@ -0,0 +1,72 @@
+"""
+Qt 兼容层
+界面模式下直接使用 PyQt5 的 QObject/pyqtSignal；
+无界面模式（环境变量 MONITOR_HEADLESS=1 或未安装 PyQt5）下使用纯 Python 回调实现，
+核心模块无需导入 Qt 即可运行。
+"""
+
+import os
+import threading
+
+HEADLESS = os.environ.get('MONITOR_HEADLESS', '') == '1'
+
+if not HEADLESS:
+    try:
+        from PyQt5.QtCore import QObject, pyqtSignal
+    except ImportError:
+        HEADLESS = True
+
+if HEADLESS:
+
+    class BoundSignal:
+        """绑定到实例的信号，emit 时在调用线程中同步执行所有回调"""
+
+        def __init__(self):
+            self._slots = []
+            self._lock = threading.Lock()
+
+        def connect(self, slot):
+            """连接回调（也可以连接另一个信号）"""
+            with self._lock:
+                self._slots.append(slot)
+
+        def disconnect(self, slot=None):
+            """断开指定回调，不指定时断开全部"""
+            with self._lock:
+                if slot is None:
+                    self._slots.clear()
+                elif slot in self._slots:
+                    self._slots.remove(slot)
+
+        def emit(self, *args):
+            """触发信号"""
+            with self._lock:
+                slots = list(self._slots)
+            for slot in slots:
+                slot(*args)
+
+        __call__ = emit
+
+    class pyqtSignal:
+        """pyqtSignal 的纯 Python 替代，作为类属性声明，按实例生成 BoundSignal"""
+
+        def __init__(self, *types):
+            self.types = types
+            self.name = None
+
+        def __set_name__(self, owner, name):
+            self.name = name
+
+        def __get__(self, obj, objtype=None):
+            if obj is None:
+                return self
+            # 首次访问时缓存到实例字典，之后直接命中实例属性
+            bound = BoundSignal()
+            obj.__dict__[self.name] = bound
+            return bound
+
+    class QObject:
+        """QObject 的最小替代"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__()
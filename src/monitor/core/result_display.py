@@ -1,9 +1,19 @@
 import cv2
 import numpy as np
-from PyQt5.QtCore import QObject, pyqtSignal, QTimer, Qt
-from PyQt5.QtGui import QImage, QPixmap
-import winsound
 import time
+from core.qt_compat import QObject, pyqtSignal, HEADLESS
+from core.profiler import profiler
+
+# 界面相关组件仅在界面模式下导入
+if not HEADLESS:
+    from PyQt5.QtCore import QTimer, Qt
+    from PyQt5.QtGui import QImage, QPixmap
+
+# winsound 仅在 Windows 平台可用
+try:
+    import winsound
+except ImportError:
+    winsound = None
 
 
 class ResultDisplay(QObject):
@@ -26,6 +36,8 @@ class ResultDisplay(QObject):
             return
             
         try:
+            start_ns = time.perf_counter_ns()
+
             # 转换颜色空间 BGR to RGB
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             
@@ -42,6 +54,7 @@ class ResultDisplay(QObject):
                 Qt.KeepAspectRatio,
                 Qt.SmoothTransformation
             ))
+            profiler.record('display', time.perf_counter_ns() - start_ns)
         except Exception as e:
             print(f"显示帧错误: {str(e)}")
     
@@ -50,11 +63,7 @@ class ResultDisplay(QObject):
         try:
             current_time = time.strftime("%H:%M:%S")
             
-            for detection in detections:
-                class_name = detection['chinese_name']
-                confidence = detection['confidence']
-                risk_level = detection['risk_level']
-                
+            for class_name, confidence, risk_level in detections.rows('chinese_name', 'confidence', 'risk_level'):
                 # 创建列表项文本
                 item_text = f"[{current_time}] {class_name} (置信度: {confidence:.2f}) - {risk_level}"
                 
@@ -82,37 +91,41 @@ class ResultDisplay(QObject):
     def trigger_alert(self, detections, sound_enabled):
         """触发告警"""
         try:
-            # 检查是否有需要告警的目标
-            high_risk_detections = [
-                d for d in detections 
-                if d['risk_level'] in ["紧急", "高风险", "中风险"]
-            ]
-            
-            if not high_risk_detections:
+            # 检查是否有需要告警的目标，找到最高风险等级
+            highest_risk = detections.at_least().highest_risk()
+            if highest_risk is None:
                 return
                 
-            # 找到最高风险等级
-            risk_order = {"紧急": 3, "高风险": 2, "中风险": 1}
-            highest_risk = max(high_risk_detections, 
-                             key=lambda x: risk_order.get(x['risk_level'], 0))
-            risk_level = highest_risk['risk_level']
-            class_name = highest_risk['chinese_name']
-            
-            # 发送告警信号
-            alert_msg = f"检测到 {class_name}，风险等级: {risk_level}"
-            self.alert_triggered.emit(risk_level, alert_msg)
-            
-            # 声音告警（带冷却时间限制）
-            current_time = time.time()
-            if sound_enabled and (current_time - self.last_sound_time) >= self.sound_cooldown:
-                self._play_sound_alert(risk_level)
-                self.last_sound_time = current_time
+            risk_level = highest_risk.risk_level
+            class_name = highest_risk.chinese_name
+            self._raise_alert(risk_level, f"检测到 {class_name}，风险等级: {risk_level}", sound_enabled)
                 
         except Exception as e:
             print(f"触发告警错误: {str(e)}")
+
+    def trigger_event_alert(self, event, sound_enabled):
+        """告警事件开启时触发告警（事件持续期间不再重复告警）"""
+        try:
+            self._raise_alert(event.risk_level, f"检测到 {event.label()}，风险等级: {event.risk_level}", sound_enabled)
+        except Exception as e:
+            print(f"触发告警错误: {str(e)}")
+
+    def _raise_alert(self, risk_level, alert_msg, sound_enabled):
+        """发送告警信号并播放声音"""
+        self.alert_triggered.emit(risk_level, alert_msg)
+
+        # 声音告警（带冷却时间限制）
+        current_time = time.time()
+        if sound_enabled and (current_time - self.last_sound_time) >= self.sound_cooldown:
+            self._play_sound_alert(risk_level)
+            self.last_sound_time = current_time
     
     def _play_sound_alert(self, risk_level):
         """播放声音告警"""
+        if winsound is None:
+            # 非 Windows 平台不支持蜂鸣告警
+            return
+
         try:
             if risk_level == "紧急":
                 # 紧急告警 - 高频蜂鸣
@@ -0,0 +1,77 @@
+import math
+import numpy as np
+from core.backends import batched_nms
+
+# 检测框距切片内部边界不超过该像素数时视为被截断
+EDGE_MARGIN = 2
+
+
+class TileSlicer:
+    """切片推理：将全分辨率画面切成相互重叠的切片（混合模式再加整个画面），与其他帧的切片合并为一个批次推理，
+    各切片的检测框映射回画面坐标后做跨切片 NMS 合并
+
+    远处的小目标在切片中保持原始分辨率，不会因整帧缩放到模型输入尺寸而只剩几个像素
+    """
+
+    def __init__(self, config):
+        tile_config = config.get('tiling') or {}
+        # 切片尺寸 [宽, 高]（原始分辨率像素），通常与模型输入尺寸一致，切片不再缩放
+        self.tile_width, self.tile_height = (int(v) for v in tile_config.get('tile_size', config['model']['input_size']))
+        # 相邻切片的最小重叠比例
+        self.overlap = tile_config.get('overlap', 0.2)
+        # 混合模式：同时推理缩放后的整个画面，检测跨越多个切片的大目标
+        self.hybrid = tile_config.get('hybrid', True)
+        # 配置了区域时只对区域的外接矩形切片
+        self.zones_only = tile_config.get('zones_only', True)
+        # 跨切片合并的 NMS 交并比阈值
+        self.merge_iou = tile_config.get('merge_iou', 0.5)
+        self.max_det = config['model'].get('max_det', 300)
+        # 按画面尺寸缓存切片窗口
+        self._windows = {}
+
+    def _starts(self, length, tile):
+        """一个方向上各切片的起点：均匀分布，首尾切片与画面边界对齐"""
+        if length <= tile:
+            return [0]
+        stride = max(1, int(tile * (1 - self.overlap)))
+        count = math.ceil((length - tile) / stride) + 1
+        return np.linspace(0, length - tile, count).round().astype(int).tolist()
+
+    def windows(self, shape):
+        """画面（或区域裁剪）的切片窗口列表 [(x1, y1, x2, y2), ...]"""
+        height, width = shape[:2]
+        windows = self._windows.get((height, width))
+        if windows is None:
+            tile_width, tile_height = min(self.tile_width, width), min(self.tile_height, height)
+            windows = [
+                (x, y, x + tile_width, y + tile_height)
+                for y in self._starts(height, tile_height)
+                for x in self._starts(width, tile_width)
+            ]
+            if self.hybrid and len(windows) > 1:
+                windows.append((0, 0, width, height))
+            self._windows[(height, width)] = windows
+            print(f"切片推理: {width}x{height} 切成 {len(windows)} 个切片"
+                  + ("（含整个画面）" if self.hybrid and len(windows) > 1 else ""))
+        return windows
+
+    def drop_truncated(self, box_data, window, shape):
+        """混合模式下丢弃被切片内部边界截断的检测框（切片坐标系），小于重叠宽度的目标在相邻切片中完整出现，
+        更大的目标由整个画面的推理结果提供，避免截断的残框在 NMS 后与完整检测框并存"""
+        height, width = shape[:2]
+        x1, y1, x2, y2 = window
+        if not self.hybrid or len(box_data) == 0 or (x2 - x1, y2 - y1) == (width, height):
+            return box_data
+        truncated = (((box_data[:, 0] <= EDGE_MARGIN) & (x1 > 0))
+                     | ((box_data[:, 1] <= EDGE_MARGIN) & (y1 > 0))
+                     | ((box_data[:, 2] >= x2 - x1 - EDGE_MARGIN) & (x2 < width))
+                     | ((box_data[:, 3] >= y2 - y1 - EDGE_MARGIN) & (y2 < height)))
+        return box_data[~truncated]
+
+    def merge(self, parts):
+        """合并同一画面各切片的检测框数组（已映射到画面坐标），跨切片 NMS 去除重叠区域的重复检测"""
+        box_data = np.concatenate(parts)
+        if len(box_data) == 0:
+            return box_data
+        keep = batched_nms(box_data[:, :4], box_data[:, 4], box_data[:, 5], self.merge_iou)[:self.max_det]
+        return box_data[keep]
@@ -0,0 +1,188 @@
+import numpy as np
+
+# 卡尔曼滤波噪声系数（相对目标宽高），与 DeepSORT/ByteTrack 的取值一致
+STD_POSITION = 1.0 / 20
+STD_VELOCITY = 1.0 / 160
+
+
+def box_iou(boxes_a, boxes_b):
+    """两组检测框 (N, 4)、(M, 4) 的 IoU 矩阵 (N, M)，框格式为 x1, y1, x2, y2"""
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    lt = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    rb = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    wh = np.clip(rb - lt, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_match(iou, threshold):
+    """按 IoU 从高到低贪心匹配，返回 (行下标, 列下标) 列表"""
+    if iou.size == 0:
+        return []
+    rows, cols = np.nonzero(iou >= threshold)
+    order = np.argsort(-iou[rows, cols], kind='stable')
+    used_rows, used_cols = set(), set()
+    matches = []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((row, col))
+    return matches
+
+
+class ObjectTracker:
+    """单路输入源的多目标跟踪器：每隔若干帧检测一次，中间帧用恒速卡尔曼滤波外推检测框
+
+    状态为 (cx, cy, w, h, vcx, vcy, vw, vh)，所有目标的均值和协方差按数组存放，一次矩阵运算完成全部预测；
+    关键帧上按 IoU（同类别）贪心匹配检测结果与已有轨迹，未匹配的检测创建新轨迹，连续多个关键帧未匹配的轨迹删除
+    """
+
+    # 恒速运动模型
+    _F = np.eye(8)
+    _F[:4, 4:] = np.eye(4)
+
+    def __init__(self, config):
+        track_config = config.get('tracking') or {}
+        # 每隔多少帧运行一次检测（1 表示每帧检测，只做 ID 关联）
+        self.keyframe_interval = max(1, track_config.get('keyframe_interval', 5))
+        # 检测结果与轨迹匹配的最低 IoU
+        self.iou_threshold = track_config.get('iou_threshold', 0.3)
+        # 连续多少个关键帧未匹配后删除轨迹
+        self.max_missed = track_config.get('max_missed', 2)
+
+        self.next_id = 1
+        self.reset()
+
+    def reset(self):
+        """清空全部轨迹"""
+        self.mean = np.zeros((0, 8))
+        self.covariance = np.zeros((0, 8, 8))
+        self.track_ids = np.zeros(0, dtype=np.int32)
+        self.scores = np.zeros(0, dtype=np.float32)
+        self.class_ids = np.zeros(0, dtype=np.float32)
+        self.missed = np.zeros(0, dtype=np.int32)
+        self.frames_since_detection = 0
+        self.detection_requested = True
+
+    def request_detection(self):
+        """下一帧强制运行检测"""
+        self.detection_requested = True
+
+    def is_keyframe(self):
+        """当前帧是否需要运行检测"""
+        return self.detection_requested or self.frames_since_detection + 1 >= self.keyframe_interval
+
+    @staticmethod
+    def _to_xywh(boxes):
+        wh = boxes[:, 2:4] - boxes[:, :2]
+        return np.concatenate([boxes[:, :2] + wh / 2, wh], axis=1)
+
+    def _boxes(self):
+        """当前各轨迹的检测框 (x1, y1, x2, y2)"""
+        center, wh = self.mean[:, :2], np.maximum(self.mean[:, 2:4], 1.0)
+        return np.concatenate([center - wh / 2, center + wh / 2], axis=1)
+
+    def _predict(self):
+        """所有轨迹按恒速模型前进一帧"""
+        if not len(self.mean):
+            return
+        wh = self.mean[:, 2:4]
+        std = np.concatenate([STD_POSITION * wh, STD_POSITION * wh, STD_VELOCITY * wh, STD_VELOCITY * wh], axis=1)
+        noise = np.zeros_like(self.covariance)
+        noise[:, np.arange(8), np.arange(8)] = std ** 2
+        self.mean = self.mean @ self._F.T
+        self.covariance = self._F @ self.covariance @ self._F.T + noise
+
+    def _correct(self, indices, measurements):
+        """用检测框 (cx, cy, w, h) 更新指定轨迹"""
+        mean, covariance = self.mean[indices], self.covariance[indices]
+        wh = mean[:, 2:4]
+        std = STD_POSITION * np.concatenate([wh, wh], axis=1)
+        innovation_cov = covariance[:, :4, :4].copy()
+        innovation_cov[:, np.arange(4), np.arange(4)] += std ** 2
+        # K = P H^T S^-1
+        gain = np.linalg.solve(innovation_cov, covariance[:, :4, :]).transpose(0, 2, 1)
+        innovation = measurements - mean[:, :4]
+        self.mean[indices] = mean + np.einsum('nij,nj->ni', gain, innovation)
+        self.covariance[indices] = covariance - gain @ covariance[:, :4, :]
+
+    def _initiate(self, measurements):
+        """为未匹配的检测创建轨迹的初始状态"""
+        count = len(measurements)
+        mean = np.concatenate([measurements, np.zeros((count, 4))], axis=1)
+        wh = measurements[:, 2:4]
+        std = np.concatenate([2 * STD_POSITION * wh, 2 * STD_POSITION * wh,
+                              10 * STD_VELOCITY * wh, 10 * STD_VELOCITY * wh], axis=1)
+        covariance = np.zeros((count, 8, 8))
+        covariance[:, np.arange(8), np.arange(8)] = std ** 2
+        return mean, covariance
+
+    def _output(self, frame_shape):
+        """上个关键帧仍被检测到的轨迹，返回 (检测框数组, 跟踪ID数组)"""
+        active = self.missed == 0
+        boxes = self._boxes()[active]
+        if frame_shape is not None:
+            height, width = frame_shape[:2]
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width - 1)
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height - 1)
+        box_data = np.concatenate([
+            boxes, self.scores[active, None], self.class_ids[active, None]
+        ], axis=1).astype(np.float32)
+        return box_data, self.track_ids[active]
+
+    def propagate(self, frame_shape=None):
+        """非关键帧：外推各轨迹的位置，返回 (检测框数组, 跟踪ID数组)"""
+        self._predict()
+        self.frames_since_detection += 1
+        return self._output(frame_shape)
+
+    def update(self, box_data, frame_shape=None):
+        """关键帧：用检测结果（每行 x1, y1, x2, y2, conf, cls）更新轨迹，返回检测框数组和对应的跟踪ID数组"""
+        self._predict()
+        self.frames_since_detection = 0
+        self.detection_requested = False
+
+        det_boxes = box_data[:, :4].astype(np.float64)
+        det_classes = box_data[:, 5]
+        iou = box_iou(self._boxes(), det_boxes)
+        # 只匹配同类别的目标
+        iou[self.class_ids[:, None] != det_classes[None, :]] = 0.0
+        matches = greedy_match(iou, self.iou_threshold)
+
+        det_track_ids = np.zeros(len(det_boxes), dtype=np.int32)
+        measurements = self._to_xywh(det_boxes)
+        self.missed += 1
+        if matches:
+            track_indices = np.array([m[0] for m in matches])
+            det_indices = np.array([m[1] for m in matches])
+            self._correct(track_indices, measurements[det_indices])
+            self.scores[track_indices] = box_data[det_indices, 4]
+            self.missed[track_indices] = 0
+            det_track_ids[det_indices] = self.track_ids[track_indices]
+
+        # 删除长时间未匹配的轨迹
+        keep = self.missed <= self.max_missed
+        if not keep.all():
+            self.mean, self.covariance = self.mean[keep], self.covariance[keep]
+            self.track_ids, self.scores = self.track_ids[keep], self.scores[keep]
+            self.class_ids, self.missed = self.class_ids[keep], self.missed[keep]
+
+        # 未匹配的检测创建新轨迹
+        unmatched = np.setdiff1d(np.arange(len(det_boxes)), [m[1] for m in matches])
+        if len(unmatched):
+            new_ids = np.arange(self.next_id, self.next_id + len(unmatched), dtype=np.int32)
+            self.next_id += len(unmatched)
+            mean, covariance = self._initiate(measurements[unmatched])
+            self.mean = np.concatenate([self.mean, mean])
+            self.covariance = np.concatenate([self.covariance, covariance])
+            self.track_ids = np.concatenate([self.track_ids, new_ids])
+            self.scores = np.concatenate([self.scores, box_data[unmatched, 4].astype(np.float32)])
+            self.class_ids = np.concatenate([self.class_ids, det_classes[unmatched].astype(np.float32)])
+            self.missed = np.concatenate([self.missed, np.zeros(len(unmatched), dtype=np.int32)])
+            det_track_ids[unmatched] = new_ids
+
+        return box_data, det_track_ids
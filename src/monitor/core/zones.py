@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+# 区域标签图相对原始帧的缩小倍数（只用于判断检测框中心所在区域）
+ZONE_MAP_SCALE = 4
+# 区域轮廓的标注颜色（BGR格式）
+ZONE_COLOR = (255, 200, 0)
+
+
+class ZoneGeometry:
+    """区域在某一帧尺寸下的像素几何：裁剪范围、多边形顶点和缩小的区域标签图"""
+    __slots__ = ('crop', 'polygons', 'label_map')
+
+    def __init__(self, crop, polygons, label_map):
+        self.crop = crop
+        self.polygons = polygons
+        self.label_map = label_map
+
+
+class ZoneSet:
+    """一路输入源的多边形区域
+
+    顶点坐标为相对帧宽高的比例（0~1），同一配置适用于不同分辨率；推理只使用全部区域的外接矩形（裁剪），
+    中心点不在任何区域内的检测目标被丢弃，区域可限定适用的类别。区域重叠时取配置中靠前的区域。
+    """
+
+    def __init__(self, zones, class_table, padding=0):
+        self.class_table = class_table
+        self.padding = padding
+        self.zone_ids = [str(zone.get('id', index + 1)) for index, zone in enumerate(zones)]
+        self.points = [np.array(zone['points'], dtype=np.float32).reshape(-1, 2) for zone in zones]
+        # 区域下标 -> 区域ID，下标 0 表示不在任何区域内
+        self.zone_names = np.array([None] + self.zone_ids, dtype=object)
+        # 各区域适用的类别：allowed[区域下标, 类别查找表下标]
+        self.allowed = np.zeros((len(zones) + 1, len(class_table.class_names)), dtype=bool)
+        for index, zone in enumerate(zones, start=1):
+            classes = zone.get('classes')
+            self.allowed[index] = np.isin(class_table.class_names, classes) if classes else True
+        # 按帧尺寸缓存像素几何
+        self._geometry = {}
+
+    def geometry(self, shape):
+        """指定帧尺寸下的区域几何"""
+        height, width = shape[:2]
+        geometry = self._geometry.get((height, width))
+        if geometry is None:
+            polygons = [np.round(points * (width, height)).astype(np.int32) for points in self.points]
+            corners = np.concatenate(polygons)
+            x1, y1 = (corners.min(axis=0) - self.padding).tolist()
+            x2, y2 = (corners.max(axis=0) + self.padding + 1).tolist()
+            crop = (max(0, x1), max(0, y1), min(width, x2), min(height, y2))
+
+            label_map = np.zeros((-(-height // ZONE_MAP_SCALE), -(-width // ZONE_MAP_SCALE)), dtype=np.uint8)
+            # 倒序绘制，重叠部分由靠前的区域覆盖
+            for index in range(len(polygons), 0, -1):
+                cv2.fillPoly(label_map, [polygons[index - 1] // ZONE_MAP_SCALE], index)
+
+            geometry = ZoneGeometry(crop, polygons, label_map)
+            self._geometry[(height, width)] = geometry
+        return geometry
+
+    def crop(self, frame):
+        """裁剪出全部区域的外接矩形（视图，不拷贝），返回 (裁剪后的帧, (x 偏移, y 偏移))"""
+        x1, y1, x2, y2 = self.geometry(frame.shape).crop
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def assign(self, box_data, shape):
+        """按检测框中心判断所在区域，返回 (保留掩码, 区域下标数组)"""
+        label_map = self.geometry(shape).label_map
+        map_height, map_width = label_map.shape
+        cx = ((box_data[:, 0] + box_data[:, 2]) / (2 * ZONE_MAP_SCALE)).astype(np.int32).clip(0, map_width - 1)
+        cy = ((box_data[:, 1] + box_data[:, 3]) / (2 * ZONE_MAP_SCALE)).astype(np.int32).clip(0, map_height - 1)
+        zone_indices = label_map[cy, cx]
+        labels = self.class_table.lookup(box_data[:, 5].astype(np.int32))
+        return self.allowed[zone_indices, labels], zone_indices
+
+    def select(self, box_data, shape):
+        """丢弃区域外（或区域不适用该类别）的检测框，返回 (保留的检测框, 对应的区域ID数组)"""
+        if len(box_data) == 0:
+            return box_data, self.zone_names[:0]
+        keep, zone_indices = self.assign(box_data, shape)
+        return box_data[keep], self.zone_names[zone_indices[keep]]
+
+    def draw(self, frame):
+        """在帧上绘制区域轮廓"""
+        cv2.polylines(frame, self.geometry(frame.shape).polygons, True, ZONE_COLOR, 2)
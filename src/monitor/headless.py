@@ -0,0 +1,358 @@
+"""
+电站安全监控无界面服务模式
+不依赖 PyQt5 和 winsound，使用纯 Python 回调运行 输入 → 推理 → 告警 → 存储 流程，
+适合在 Linux 推理服务器上以多进程方式部署。
+
+用法:
+    python src/monitor/headless.py                  # 使用 config.yaml 中 streams.sources 配置的多路输入
+    python src/monitor/headless.py --source 0       # 单路摄像头
+    python src/monitor/headless.py --source rtsp://192.168.1.64/stream1   # 网络摄像头
+    python src/monitor/headless.py --source a.mp4   # 单路视频
+    python src/monitor/headless.py --source photos/ # 图片目录（大批量离线分析请使用 batch_images.py）
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+import yaml
+
+# 必须在导入核心模块之前设置，核心模块将使用纯 Python 信号实现
+os.environ['MONITOR_HEADLESS'] = '1'
+
+# 添加监控系统目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.data_input import ImageInput, ImageFolderInput, CameraInput, NetworkStreamInput, VideoInput
+from core.multi_stream import MultiStreamManager
+from core.result_display import ResultDisplay
+from core.data_storage import SqliteStorage
+from core.alert_events import AlertEventEngine
+from core.profiler import profiler
+from core.metrics import MetricsWriter, MetricsServer
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_config(config_path):
+    """加载配置文件"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def create_input(config, source, fast=False):
+    """根据命令行参数创建输入源：数字为摄像头编号，rtsp:// 等地址为网络摄像头，目录或通配符为图片目录，
+    图片扩展名为图片，其余按视频处理（fast 为快速模式，不按时间节奏尽快处理）"""
+    if source.isdigit():
+        data_input = CameraInput(config)
+        data_input.set_camera_id(int(source))
+    elif NetworkStreamInput.is_stream_url(source):
+        data_input = NetworkStreamInput(config)
+        data_input.set_url(source)
+    elif os.path.isdir(source) or any(c in source for c in '*?['):
+        data_input = ImageFolderInput(config)
+        data_input.set_image_path(source)
+        data_input.set_fast_mode(fast)
+    elif source.lower().endswith(IMAGE_EXTENSIONS):
+        data_input = ImageInput(config)
+        data_input.set_image_path(source)
+    else:
+        data_input = VideoInput(config)
+        data_input.set_video_path(source)
+        data_input.set_fast_mode(fast)
+    return data_input
+
+
+class HeadlessMonitor:
+    """无界面监控服务"""
+
+    def __init__(self, config, sound_enabled=False):
+        self.config = config
+        self.sound_enabled = sound_enabled
+        profiler.configure(config)
+        self.manager = MultiStreamManager(config)
+        self.result_display = ResultDisplay(config)
+        self.storage = SqliteStorage(config)
+        self.alert_engine = AlertEventEngine(config)
+        self.stop_event = threading.Event()
+        self.finished_streams = set()
+        # 统计信息
+        self.result_count = 0
+        self.alert_count = 0
+        self.alert_counts = {}
+        self.start_time = time.time()
+        # 指标接口（config.yaml 中 metrics.enabled 或命令行 --metrics-port 启用）
+        self.metrics_server = None
+
+        # 连接回调（在发出信号的线程中同步执行）
+        self.manager.stream_result.connect(self.on_stream_result)
+        self.manager.stream_error.connect(self.on_stream_error)
+        self.manager.stream_status.connect(self.on_stream_status)
+        self.manager.error_occurred.connect(self.on_error)
+        self.result_display.alert_triggered.connect(self.on_alert_triggered)
+        self.storage.error_occurred.connect(self.on_error)
+        self.alert_engine.event_opened.connect(self.on_event_opened)
+        self.alert_engine.event_updated.connect(self.on_event_updated)
+        self.alert_engine.event_closed.connect(self.on_event_closed)
+
+    def add_source(self, stream_id, data_input, process_fps=None):
+        """添加一路输入源"""
+        self.manager.add_stream(stream_id, data_input, process_fps)
+
+    def load_sources_from_config(self):
+        """添加 config.yaml 中配置的输入源"""
+        self.manager.load_streams_from_config()
+
+    def enable_metrics(self, host='127.0.0.1', port=9108):
+        """启用 HTTP 指标接口"""
+        self.metrics_server = MetricsServer(self.collect_metrics, host, port)
+
+    def run(self, duration=None, stats_interval=10.0):
+        """运行监控服务直到收到停止信号、达到运行时长或所有输入源结束"""
+        if not self.manager.streams:
+            print("未配置任何输入源")
+            return
+
+        if not self.manager.load_model():
+            print("模型加载失败，请检查模型路径配置")
+            return
+
+        for stream_id, state in self.manager.streams.items():
+            state.data_input.finished.connect(
+                lambda sid=stream_id: self.on_stream_finished(sid))
+
+        self.storage.clean_old_records()
+        self.manager.start()
+        print(f"无界面监控已启动，共 {len(self.manager.streams)} 路输入")
+
+        if self.metrics_server is not None:
+            try:
+                self.metrics_server.start()
+                print(f"指标接口已启动: http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+            except OSError as e:
+                print(f"指标接口启动失败: {str(e)}")
+                self.metrics_server = None
+
+        start_time = time.time()
+        self.start_time = start_time
+        last_stats_time = start_time
+        try:
+            while not self.stop_event.wait(0.5):
+                now = time.time()
+                if duration and now - start_time >= duration:
+                    break
+                if self._all_streams_drained():
+                    print("所有输入源已结束")
+                    break
+                if stats_interval and now - last_stats_time >= stats_interval:
+                    self.print_stats()
+                    last_stats_time = now
+        finally:
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+            self.manager.stop()
+            self.alert_engine.close_all()
+            self.storage.close()
+            self.print_stats()
+            self.dump_profile()
+
+    def stop(self):
+        """请求停止服务"""
+        self.stop_event.set()
+
+    def _all_streams_drained(self):
+        """所有输入源均已结束且没有待推理的帧"""
+        if len(self.finished_streams) < len(self.manager.streams):
+            return False
+        return all(state.data_input.frame_queue.empty()
+                   for state in self.manager.streams.values())
+
+    def on_stream_result(self, stream_id, result_data):
+        """处理单路推理结果：告警事件与存储"""
+        self.result_count += 1
+        detections = result_data['detections']
+
+        # 告警事件（没有目标的帧也要处理，用于关闭事件）
+        input_type = self.manager.streams[stream_id].data_input.input_type
+        self.alert_engine.update(stream_id, detections, still=input_type == "图片")
+
+        # 复用上次检测结果或跟踪外推的帧不重复存储
+        if not detections or result_data.get('reused'):
+            return
+
+        # 存储识别记录
+        self.storage.insert_recognition_record(input_type, detections, source=stream_id)
+
+    def on_event_opened(self, event):
+        """告警事件开启：告警并记录一条告警日志"""
+        self.result_display.trigger_event_alert(event, self.sound_enabled)
+        self.storage.insert_alarm_log(
+            event.risk_level, f"[{event.source}] {event.label()} (置信度: {event.max_confidence:.2f})")
+        self.storage.upsert_alert_events([event.to_row()])
+
+    def on_event_updated(self, event):
+        """进行中的告警事件定期更新持续时间"""
+        self.storage.upsert_alert_events([event.to_row()])
+
+    def on_event_closed(self, event):
+        """告警事件结束"""
+        print(f"[告警结束] {time.strftime('%H:%M:%S')} {event.summary()}")
+        self.storage.upsert_alert_events([event.to_row()])
+
+    def on_stream_finished(self, stream_id):
+        """输入源结束"""
+        self.finished_streams.add(stream_id)
+
+    def on_stream_status(self, stream_id, message):
+        """输入源状态变化（如网络流重连）"""
+        print(f"[{stream_id}] {message}")
+
+    def on_stream_error(self, stream_id, error_msg):
+        """输入源错误"""
+        print(f"[{stream_id}] 数据输入错误: {error_msg}")
+        self.finished_streams.add(stream_id)
+
+    def on_error(self, error_msg):
+        """推理或存储错误"""
+        print(f"错误: {error_msg}")
+
+    def on_alert_triggered(self, risk_level, message):
+        """告警触发"""
+        self.alert_count += 1
+        self.alert_counts[risk_level] = self.alert_counts.get(risk_level, 0) + 1
+        print(f"[告警] {time.strftime('%H:%M:%S')} {message}")
+
+    def print_stats(self):
+        """打印运行统计"""
+        stats = self.manager.get_stream_stats()
+        parts = [f"{sid}: 推理 {s['inferred']} 帧, 复用 {s['reused']} 帧, 丢弃 {s['dropped']} 帧"
+                 + (f", 延迟 {s['lag']:.2f} 秒, 重连 {s['reconnects']} 次, 丢失 {s['lost']} 帧" if 'lag' in s else "")
+                 for sid, s in stats.items()]
+        cascade = self.manager.model_infer.cascade_stats()
+        print(f"[统计] 结果 {self.result_count} | 告警 {self.alert_count} (进行中 {self.alert_engine.active_count()})"
+              f" | 已写入 {self.storage.written_count} 条"
+              f" | 批次 {self.manager.batch_count}"
+              f" (最近批次大小 {self.manager.last_batch_size})"
+              + (f" | 级联升级 {cascade['escalation_rate'] * 100:.1f}%"
+                 f" (+{cascade['added_latency'] * 1000:.1f}ms/输入)" if cascade else "")
+              + " | " + "; ".join(parts))
+        if profiler.enabled:
+            print(profiler.format_table())
+
+    def collect_metrics(self):
+        """生成 Prometheus 文本格式的指标（在指标接口线程中调用，只读取计数器）"""
+        writer = MetricsWriter()
+        stats = self.manager.get_stream_stats()
+
+        writer.add('uptime_seconds', 'gauge', 'Seconds since the monitor started.',
+                   [({}, time.time() - self.start_time)])
+        writer.add('frames_captured_total', 'counter', 'Frames read from each source.',
+                   [({'source': sid}, s['captured']) for sid, s in stats.items()])
+        writer.add('frames_dropped_total', 'counter', 'Frames overwritten before being inferred.',
+                   [({'source': sid}, s['dropped']) for sid, s in stats.items()])
+        writer.add('frames_inferred_total', 'counter', 'Frames that ran through the model.',
+                   [({'source': sid}, s['inferred']) for sid, s in stats.items()])
+        writer.add('frames_reused_total', 'counter', 'Frames that reused the previous result (scene unchanged or propagated by the tracker).',
+                   [({'source': sid}, s['reused']) for sid, s in stats.items()])
+        writer.add('queue_depth', 'gauge', 'Frames waiting in each source queue.',
+                   [({'source': sid}, s['queue_depth']) for sid, s in stats.items()])
+
+        # 网络摄像头
+        network = {sid: s for sid, s in stats.items() if 'lag' in s}
+        if network:
+            writer.add('stream_connected', 'gauge', 'Whether each network stream is connected.',
+                       [({'source': sid}, int(s['connected'])) for sid, s in network.items()])
+            writer.add('stream_lag_seconds', 'gauge', 'How far each network stream lags behind real time.',
+                       [({'source': sid}, s['lag']) for sid, s in network.items()])
+            writer.add('stream_reconnects_total', 'counter', 'Network stream reconnect attempts.',
+                       [({'source': sid}, s['reconnects']) for sid, s in network.items()])
+            writer.add('stream_stalls_total', 'counter', 'Network stream stalls (read failure, frozen timestamps or excess lag).',
+                       [({'source': sid}, s['stalls']) for sid, s in network.items()])
+            writer.add('frames_lost_total', 'counter', 'Frames missing from network streams, estimated from timestamp gaps.',
+                       [({'source': sid}, s['lost']) for sid, s in network.items()])
+
+        writer.add('batches_total', 'counter', 'Batched model calls.',
+                   [({}, self.manager.batch_count)])
+        writer.add('last_batch_size', 'gauge', 'Number of frames in the latest batch.',
+                   [({}, self.manager.last_batch_size)])
+        writer.add('alerts_total', 'counter', 'Alert events opened, by risk level.',
+                   [({'risk_level': level}, count) for level, count in list(self.alert_counts.items())])
+        writer.add('alert_events_active', 'gauge', 'Alert events currently open.',
+                   [({}, self.alert_engine.active_count())])
+        writer.add('alert_events_suppressed_total', 'counter', 'Risk conditions that cleared before min_duration.',
+                   [({}, self.alert_engine.suppressed_count)])
+
+        cascade = self.manager.model_infer.cascade_stats()
+        if cascade is not None:
+            writer.add('cascade_inputs_total', 'counter', 'Model inputs run through the first cascade stage.',
+                       [({}, cascade['inputs'])])
+            writer.add('cascade_escalated_total', 'counter', 'Model inputs escalated to the second cascade stage.',
+                       [({}, cascade['escalated'])])
+            writer.add('cascade_escalation_seconds_total', 'counter', 'Time spent in the second cascade stage.',
+                       [({}, cascade['escalation_seconds'])])
+
+        writer.add('storage_pending', 'gauge', 'Records waiting in the storage write queue.',
+                   [({}, self.storage.pending.qsize())])
+        writer.add('storage_written_total', 'counter', 'Rows written to SQLite.',
+                   [({}, self.storage.written_count)])
+        writer.add('storage_dropped_total', 'counter', 'Records dropped because the write queue was full.',
+                   [({}, self.storage.dropped_count)])
+        writer.add('storage_last_flush_seconds', 'gauge', 'Duration of the latest storage flush.',
+                   [({}, self.storage.last_flush_latency)])
+
+        writer.add_histograms('stage_duration_seconds', 'Pipeline stage latency.',
+                              [({'stage': stage}, snapshot) for stage, snapshot in profiler.snapshot().items()])
+        return writer.render()
+
+    def dump_profile(self):
+        """保存流水线耗时统计"""
+        try:
+            dump_path = profiler.dump()
+            if dump_path:
+                print(f"流水线耗时统计已保存到: {dump_path}")
+        except Exception as e:
+            print(f"保存流水线耗时统计失败: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='电站安全监控无界面服务')
+    parser.add_argument('--config', type=str, default=DEFAULT_CONFIG_PATH, help='配置文件路径')
+    parser.add_argument('--source', type=str, action='append',
+                        help='输入源（摄像头编号、网络流地址、视频、图片或图片目录），可多次指定；不指定时使用配置文件中的 streams.sources')
+    parser.add_argument('--process-fps', type=float, default=None, help='每路每秒处理帧数')
+    parser.add_argument('--duration', type=float, default=None, help='运行时长（秒），默认一直运行')
+    parser.add_argument('--stats-interval', type=float, default=10.0, help='统计信息打印间隔（秒）')
+    parser.add_argument('--fast', action='store_true',
+                        help='快速模式：视频和图片目录不按时间节奏，尽快处理（离线回看录像）')
+    parser.add_argument('--sound', action='store_true', help='启用声音告警（仅 Windows）')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='启用 HTTP 指标接口并监听指定端口（默认使用配置文件中的 metrics 设置）')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    monitor = HeadlessMonitor(config, sound_enabled=args.sound)
+
+    metrics_config = config.get('metrics') or {}
+    if args.metrics_port is not None or metrics_config.get('enabled', False):
+        port = args.metrics_port if args.metrics_port is not None else metrics_config.get('port', 9108)
+        monitor.enable_metrics(metrics_config.get('host', '127.0.0.1'), port)
+
+    if args.source:
+        for index, source in enumerate(args.source):
+            monitor.add_source(f"src{index}", create_input(config, source, args.fast), args.process_fps)
+    else:
+        monitor.load_sources_from_config()
+
+    # Ctrl+C / SIGTERM 时优雅退出
+    signal.signal(signal.SIGINT, lambda signum, frame: monitor.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: monitor.stop())
+
+    monitor.run(duration=args.duration, stats_interval=args.stats_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import sys
 import os
 import yaml
-from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QMessageBox, QDialog,
+                             QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                             QComboBox, QPushButton, QLabel, QInputDialog)
 from PyQt5.QtCore import Qt, pyqtSlot, QTimer
 from PyQt5.uic import loadUi
 import numpy as np
@@ -10,10 +12,99 @@ import time
 # 添加src目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from core.data_input import ImageInput, CameraInput, VideoInput
-from core.model_infer import YoloInfer
+from core.data_input import ImageInput, CameraInput, NetworkStreamInput, VideoInput
+from core.infer_worker import InferenceWorker
 from core.result_display import ResultDisplay
 from core.data_storage import SqliteStorage
+from core.alert_events import AlertEventEngine
+from core.profiler import profiler
+
+
+class HistoryDialog(QDialog):
+    """历史记录查询对话框（按时间范围和风险等级筛选，分页加载）"""
+
+    TIME_RANGES = [("最近1小时", 3600), ("最近24小时", 86400), ("最近7天", 7 * 86400), ("最近30天", 30 * 86400)]
+    RISK_FILTERS = [("全部", None), ("紧急", ["紧急"]), ("高风险", ["高风险"]),
+                    ("中风险", ["中风险"]), ("中风险及以上", ["紧急", "高风险", "中风险"])]
+    PAGE_SIZE = 100
+
+    def __init__(self, storage, chinese_classes, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self.chinese_classes = chinese_classes
+        self.cursor = None
+        self.setWindowTitle("历史记录查询")
+        self.resize(800, 500)
+
+        # 筛选条件
+        self.combo_time = QComboBox()
+        for name, _ in self.TIME_RANGES:
+            self.combo_time.addItem(name)
+        self.combo_time.setCurrentIndex(1)
+        self.combo_risk = QComboBox()
+        for name, _ in self.RISK_FILTERS:
+            self.combo_risk.addItem(name)
+        self.btn_query = QPushButton("查询")
+        self.btn_more = QPushButton("加载更多")
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("时间范围:"))
+        filter_layout.addWidget(self.combo_time)
+        filter_layout.addWidget(QLabel("风险等级:"))
+        filter_layout.addWidget(self.combo_risk)
+        filter_layout.addWidget(self.btn_query)
+        filter_layout.addStretch()
+
+        # 记录表格
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["时间", "输入源", "目标", "置信度", "风险等级"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.label_count = QLabel()
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.table)
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.label_count)
+        bottom_layout.addStretch()
+        bottom_layout.addWidget(self.btn_more)
+        layout.addLayout(bottom_layout)
+
+        self.btn_query.clicked.connect(self.on_query)
+        self.btn_more.clicked.connect(self.load_page)
+        self.on_query()
+
+    def on_query(self):
+        """按当前筛选条件重新查询"""
+        self.table.setRowCount(0)
+        self.cursor = None
+        self.load_page()
+
+    def load_page(self):
+        """加载下一页记录"""
+        seconds = self.TIME_RANGES[self.combo_time.currentIndex()][1]
+        risk_levels = self.RISK_FILTERS[self.combo_risk.currentIndex()][1]
+
+        # 先刷新写入队列，保证能查到最新记录
+        self.storage.flush()
+        records, self.cursor = self.storage.query_records(
+            start_ts=time.time() - seconds,
+            risk_levels=risk_levels,
+            limit=self.PAGE_SIZE,
+            cursor=self.cursor
+        )
+
+        for record in records:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            source = record['source'] or record['input_type']
+            target = self.chinese_classes.get(record['target_type'], record['target_type'])
+            values = [record['timestamp'], source, target, f"{record['confidence']:.2f}", record['risk_level']]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+        self.btn_more.setEnabled(self.cursor is not None)
+        self.label_count.setText(f"已加载 {self.table.rowCount()} 条记录")
 
 
 class SafetyMonitorWindow(QMainWindow):
@@ -99,15 +190,20 @@ class SafetyMonitorWindow(QMainWindow):
     
     def init_modules(self):
         """初始化各功能模块"""
+        # 流水线分阶段耗时统计
+        profiler.configure(self.config)
+        
         # 数据输入模块
         self.image_input = ImageInput(self.config)
         self.camera_input = CameraInput(self.config)
+        self.network_input = NetworkStreamInput(self.config)
         self.video_input = VideoInput(self.config)
         
-        # 模型推理模块
-        self.model_infer = YoloInfer(self.config)
-        if not self.model_infer.load_model():
+        # 模型推理模块（独立推理线程，不阻塞界面）
+        self.infer_worker = InferenceWorker(self.config)
+        if not self.infer_worker.load_model():
             QMessageBox.critical(self, "错误", "模型加载失败，请检查模型路径配置")
+        self.infer_worker.start()
         
         # 结果展示模块
         self.result_display = ResultDisplay(self.config)
@@ -115,6 +211,9 @@ class SafetyMonitorWindow(QMainWindow):
         # 数据存储模块
         self.storage = SqliteStorage(self.config)
         
+        # 告警事件引擎（风险条件持续期间只告警和记录一次）
+        self.alert_engine = AlertEventEngine(self.config)
+        
         # 当前输入源
         self.current_input = None
         
@@ -137,14 +236,17 @@ class SafetyMonitorWindow(QMainWindow):
         # 数据输入信号
         self.image_input.frame_ready.connect(self.on_frame_ready)
         self.camera_input.frame_ready.connect(self.on_frame_ready)
+        self.network_input.frame_ready.connect(self.on_frame_ready)
         self.video_input.frame_ready.connect(self.on_frame_ready)
         self.image_input.error_occurred.connect(self.on_input_error)
         self.camera_input.error_occurred.connect(self.on_input_error)
+        self.network_input.error_occurred.connect(self.on_input_error)
+        self.network_input.status_changed.connect(self.on_input_status)
         self.video_input.error_occurred.connect(self.on_input_error)
         
         # 模型推理信号
-        self.model_infer.inference_finished.connect(self.on_inference_finished)
-        self.model_infer.error_occurred.connect(self.on_inference_error)
+        self.infer_worker.inference_finished.connect(self.on_inference_finished)
+        self.infer_worker.error_occurred.connect(self.on_inference_error)
         
         # 结果展示信号
         self.result_display.alert_triggered.connect(self.on_alert_triggered)
@@ -152,6 +254,11 @@ class SafetyMonitorWindow(QMainWindow):
         # 数据存储信号
         self.storage.error_occurred.connect(self.on_storage_error)
         
+        # 告警事件信号
+        self.alert_engine.event_opened.connect(self.on_event_opened)
+        self.alert_engine.event_updated.connect(self.on_event_updated)
+        self.alert_engine.event_closed.connect(self.on_event_closed)
+        
     def set_initial_state(self):
         """设置初始状态"""
         # 默认选中本地图片
@@ -187,14 +294,33 @@ class SafetyMonitorWindow(QMainWindow):
     
     @pyqtSlot()
     def on_camera_selected(self):
-        """选择摄像头"""
+        """选择摄像头（本地设备编号或网络摄像头地址）"""
         if self.current_input:
             self.current_input.stop()
             
-        # 默认使用摄像头0
-        self.camera_input.set_camera_id(0)
-        self.current_input = self.camera_input
-        self.label_alert.setText("状态：已选择摄像头")
+        # 候选项：本地摄像头0和配置文件中的网络摄像头，也可直接输入地址
+        stream_config = self.config.get('streams') or {}
+        items = ["0"] + [str(source['source']) for source in stream_config.get('sources') or []
+                         if source.get('type') == 'network']
+        source, ok = QInputDialog.getItem(
+            self, "选择摄像头", "摄像头编号或网络地址 (rtsp://...):", items, 0, True
+        )
+        source = source.strip()
+        if not ok or not source:
+            self.btn_camera.setChecked(False)
+            return
+
+        if NetworkStreamInput.is_stream_url(source):
+            self.network_input.set_url(source)
+            self.current_input = self.network_input
+            self.label_alert.setText("状态：已选择网络摄像头")
+        elif source.isdigit():
+            self.camera_input.set_camera_id(int(source))
+            self.current_input = self.camera_input
+            self.label_alert.setText("状态：已选择摄像头")
+        else:
+            QMessageBox.warning(self, "警告", "请输入摄像头编号或 rtsp:// 等网络地址")
+            self.btn_camera.setChecked(False)
     
     @pyqtSlot()
     def on_video_selected(self):
@@ -259,6 +385,12 @@ class SafetyMonitorWindow(QMainWindow):
         """停止识别"""
         if self.current_input:
             self.current_input.stop()
+        
+        # 丢弃尚未推理的帧
+        self.infer_worker.clear()
+        
+        # 关闭进行中的告警事件
+        self.alert_engine.close_all()
             
         # 更新按钮状态
         self.btn_start.setEnabled(True)
@@ -278,7 +410,7 @@ class SafetyMonitorWindow(QMainWindow):
         """置信度阈值改变"""
         threshold = value / 100.0
         self.label_confidence_value.setText(f"{threshold:.2f}")
-        self.model_infer.set_confidence_threshold(threshold)
+        self.infer_worker.set_confidence_threshold(threshold)
     
     @pyqtSlot(object, object)
     def on_frame_ready(self, original_frame, processed_frame):
@@ -289,45 +421,51 @@ class SafetyMonitorWindow(QMainWindow):
         # 显示原始帧（总是显示）
         self.result_display.display_frame(self.display_original, original_frame)
         
-        # 执行模型推理（控制处理频率）
-        self.model_infer.infer_single_frame(processed_frame)
+        # 提交到推理线程（只保留最新帧，推理慢时丢弃旧帧）
+        self.infer_worker.submit(processed_frame)
     
-    @pyqtSlot(dict)
+    @pyqtSlot(object)
     def on_inference_finished(self, result_data):
         """推理完成"""
         # 忽略空结果
         if result_data is None:
             return
             
-        # 记录推理时间用于统计
-        self.inference_times.append(result_data['inference_time'])
-        if len(self.inference_times) > 30:  # 限制列表长度以反映近期性能
-            self.inference_times.pop(0)
+        # 记录推理时间用于统计（复用上次结果的帧不计入）
+        if not result_data.get('reused'):
+            self.inference_times.append(result_data['inference_time'])
+            if len(self.inference_times) > 30:  # 限制列表长度以反映近期性能
+                self.inference_times.pop(0)
         
         # 显示标注后的帧
         self.result_display.display_frame(self.display_annotated, result_data['annotated_frame'])
         
-        # 更新风险列表
-        self.result_display.update_risk_list(self.list_risk, result_data['detections'])
+        # 更新风险列表（跟踪外推的帧不重复列出）
+        if not result_data.get('tracked'):
+            self.result_display.update_risk_list(self.list_risk, result_data['detections'])
         
-        # 触发告警
-        sound_enabled = self.checkbox_alarm_sound.isChecked()
-        self.result_display.trigger_alert(result_data['detections'], sound_enabled)
+        # 更新告警事件（风险条件开始时告警，持续期间不重复告警和记录）
+        input_type = self.get_current_input_type()
+        self.alert_engine.update(input_type, result_data['detections'], still=input_type == "图片")
         
-        # 存储数据（限制频率以提高性能）
-        if len(self.inference_times) % 5 == 0:  # 每5帧存储一次数据
-            input_type = self.get_current_input_type()
+        # 存储每次实际推理的结果（异步批量写入，不阻塞界面）
+        if not result_data.get('reused'):
             self.storage.insert_recognition_record(input_type, result_data['detections'])
-            
-            # 检查是否有高风险目标需要记录到告警日志
-            high_risk_detections = [
-                d for d in result_data['detections'] 
-                if d['risk_level'] in ["紧急", "高风险", "中风险"]
-            ]
-            
-            for detection in high_risk_detections:
-                target_info = f"{detection['chinese_name']} (置信度: {detection['confidence']:.2f})"
-                self.storage.insert_alarm_log(detection['risk_level'], target_info)
+    
+    def on_event_opened(self, event):
+        """告警事件开启：告警并记录一条告警日志"""
+        sound_enabled = self.checkbox_alarm_sound.isChecked()
+        self.result_display.trigger_event_alert(event, sound_enabled)
+        self.storage.insert_alarm_log(event.risk_level, f"{event.label()} (置信度: {event.max_confidence:.2f})")
+        self.storage.upsert_alert_events([event.to_row()])
+    
+    def on_event_updated(self, event):
+        """进行中的告警事件定期更新持续时间"""
+        self.storage.upsert_alert_events([event.to_row()])
+    
+    def on_event_closed(self, event):
+        """告警事件结束"""
+        self.storage.upsert_alert_events([event.to_row()])
     
     @pyqtSlot(str)
     def on_input_error(self, error_msg):
@@ -335,6 +473,11 @@ class SafetyMonitorWindow(QMainWindow):
         QMessageBox.critical(self, "数据输入错误", error_msg)
         self.on_stop_clicked()
     
+    @pyqtSlot(str)
+    def on_input_status(self, message):
+        """数据输入状态变化（如网络流断开重连）"""
+        self.label_alert.setText(f"状态：{message}")
+    
     @pyqtSlot(str)
     def on_inference_error(self, error_msg):
         """推理错误"""
@@ -355,7 +498,7 @@ class SafetyMonitorWindow(QMainWindow):
         if self.btn_image.isChecked():
             return "图片"
         elif self.btn_camera.isChecked():
-            return "摄像头"
+            return self.current_input.input_type if self.current_input else "摄像头"
         elif self.btn_video.isChecked():
             return "视频"
         else:
@@ -364,7 +507,8 @@ class SafetyMonitorWindow(QMainWindow):
     @pyqtSlot()
     def on_history_clicked(self):
         """查询历史记录"""
-        QMessageBox.information(self, "功能提示", "历史记录查询功能将在后续版本中实现")
+        dialog = HistoryDialog(self.storage, self.config['chinese_classes'], self)
+        dialog.exec_()
     
     def update_performance_info(self):
         """更新性能信息"""
@@ -384,6 +528,12 @@ class SafetyMonitorWindow(QMainWindow):
             status_text = f"显示FPS: {self.fps:.1f}"
             if self.avg_inference_time > 0:
                 status_text += f" | 平均推理时间: {self.avg_inference_time*1000:.1f}ms"
+            status_text += f" | 丢帧: {self.infer_worker.dropped_count}"
+            status_text += f" | 队列等待: {self.infer_worker.last_queue_wait*1000:.1f}ms"
+            cascade = self.infer_worker.model_infer.cascade_stats()
+            if cascade:
+                status_text += (f" | 级联升级: {cascade['escalation_rate']*100:.1f}%"
+                                f" (+{cascade['added_latency']*1000:.1f}ms)")
             
             self.statusBar().showMessage(status_text)
     
@@ -392,6 +542,21 @@ class SafetyMonitorWindow(QMainWindow):
         # 停止所有输入源
         if self.current_input:
             self.current_input.stop()
+        
+        # 停止推理线程
+        self.infer_worker.stop()
+        
+        # 关闭进行中的告警事件，刷新积压记录并关闭数据库
+        self.alert_engine.close_all()
+        self.storage.close()
+        
+        # 保存流水线耗时统计
+        try:
+            dump_path = profiler.dump()
+            if dump_path:
+                print(f"流水线耗时统计已保存到: {dump_path}")
+        except Exception as e:
+            print(f"保存流水线耗时统计失败: {str(e)}")
             
         # 停止性能监控定时器
         if self.performance_timer.isActive():